@@ -0,0 +1,83 @@
+# agent/execution_budget.py
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from langchain.agents import AgentExecutor
+
+from observability.metrics import AGENT_EARLY_STOPS
+from tools.result_store import ToolResultStore
+
+# Budget of the agent run executing in this context
+_current_budget: ContextVar[Optional['ExecutionBudget']] = ContextVar('execution_budget', default=None)
+
+
+class ExecutionBudget:
+    """
+    Per-request limits on one agent run: a wall-clock deadline, counted from when the
+    request arrived, and an early exit once a product search returned a match more similar
+    than early_exit_score to what was asked. `stopped` names what ended the run early, if
+    anything.
+
+    Only free-text results carry a similarity. A filtered search returns products meeting
+    all of its filters, so without the feature bonuses each of them would score exactly
+    1.0: its match_score cannot tell a strong match from any other.
+    """
+    __slots__ = ('deadline', 'early_exit_score', 'results', 'stopped')
+
+    def __init__(self, deadline_seconds: Optional[float] = None, early_exit_score: Optional[float] = None):
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.early_exit_score = early_exit_score or None
+        self.results: Optional[ToolResultStore] = None
+        self.stopped: Optional[str] = None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (negative once it passed), None without one"""
+        return self.deadline - time.monotonic() if self.deadline is not None else None
+
+    @contextmanager
+    def watch(self, results: ToolResultStore, early_exit: bool = True):
+        """Apply the budget to agent runs inside the block; strong matches are looked for in results"""
+        self.results = results
+        if not early_exit:
+            self.early_exit_score = None
+        token = _current_budget.set(self)
+        try:
+            yield self
+        finally:
+            _current_budget.reset(token)
+
+    def stop(self, reason: str):
+        if self.stopped is None:
+            self.stopped = reason
+            AGENT_EARLY_STOPS.inc(reason=reason)
+
+    def check(self, iterations: int, time_elapsed: float) -> Optional[str]:
+        """Why the run should not take another step, or None to go on"""
+        if self.early_exit_score is not None and self.results is not None:
+            products = self.results.latest('search_products')
+            if any((getattr(product, 'similarity', None) or 0.0) > self.early_exit_score for product in products):
+                return 'strong_match'
+        remaining = self.remaining()
+        # Another step is expected to take as long as the average one so far
+        if remaining is not None and (remaining <= 0 or (iterations and remaining < time_elapsed / iterations)):
+            return 'deadline'
+        return None
+
+
+class BudgetedAgentExecutor(AgentExecutor):
+    """AgentExecutor that also stops between ReAct steps when the current ExecutionBudget says so"""
+
+    def _should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        if not super()._should_continue(iterations, time_elapsed):
+            return False
+        budget = _current_budget.get()
+        if budget is None:
+            return True
+        reason = budget.check(iterations, time_elapsed)
+        if reason is not None:
+            budget.stop(reason)
+            return False
+        return True
@@ -0,0 +1,156 @@
+# agent/fast_router.py
+
+import threading
+from typing import Dict, List, Any, Optional
+
+from tools.firestore_tools import FirestoreProductTool, FirestoreCategoryTool
+from tools.query_matcher import match_query, CONVERSATIONAL_WORDS
+from agent.response_cache import residual_keywords
+
+# Longer messages usually carry context the templates can't honour
+MAX_ROUTED_TOKENS = 10
+MAX_LISTED_PRODUCTS = 5
+# Words a routed product search may carry besides its filters: they ask for products without
+# constraining them. Any other leftover word ("dollars", "year", "office") goes to the agent
+ROUTABLE_WORDS = frozenset([
+    'and', 'all', 'you', 'your', 'sell', 'carry', 'stock', 'available', 'shop', 'store', 'one'
+])
+FOLLOW_UP_QUESTION = "Would you like care tips for any of these, or should I narrow the list down further?"
+
+
+class FastRoute:
+    """A templated answer produced without running the LLM agent"""
+    __slots__ = ('name', 'response', 'products')
+
+    def __init__(self, name: str, response: str, products: List[Dict[str, Any]] = None):
+        self.name = name
+        self.response = response
+        self.products = products or []
+
+
+class FastPathRouter:
+    """
+    Answers simple, unambiguous messages ("show me categories", "pet safe plants",
+    "succulents under $20") straight from the tools with a templated response.
+    Everything else returns None and goes to the ReAct agent.
+    """
+
+    def __init__(self, product_tool: FirestoreProductTool, category_tool: FirestoreCategoryTool):
+        self.product_tool = product_tool
+        self.category_tool = category_tool
+        self._lock = threading.Lock()
+        self.route_hits: Dict[str, int] = {}
+        self.agent_fallthroughs = 0
+
+    def route(self, user_message: str, analysis: Dict[str, Any]) -> Optional[FastRoute]:
+        kind = self._classify(user_message, analysis)
+        if kind == 'categories':
+            return self._finish(self._categories_route(self.category_tool.find_categories()))
+        if kind == 'product_search':
+            products = self.product_tool.find_products(user_message)
+            return self._finish(self._products_route(analysis['entities'], products))
+        return self._finish(None)
+
+    async def aroute(self, user_message: str, analysis: Dict[str, Any]) -> Optional[FastRoute]:
+        kind = self._classify(user_message, analysis)
+        if kind == 'categories':
+            return self._finish(self._categories_route(await self.category_tool.afind_categories()))
+        if kind == 'product_search':
+            products = await self.product_tool.afind_products(user_message)
+            return self._finish(self._products_route(analysis['entities'], products))
+        return self._finish(None)
+
+    def stats(self) -> Dict[str, Any]:
+        routed = sum(self.route_hits.values())
+        total = routed + self.agent_fallthroughs
+        return {
+            'routes': dict(self.route_hits),
+            'agent_fallthroughs': self.agent_fallthroughs,
+            'routed_ratio': routed / total if total else 0.0
+        }
+
+    def _classify(self, user_message: str, analysis: Dict[str, Any]) -> Optional[str]:
+        match = match_query(user_message)
+        if len(match.tokens) > MAX_ROUTED_TOKENS or not CONVERSATIONAL_WORDS.isdisjoint(match.tokens):
+            return None
+        if analysis['intent'] == 'category_inquiry' and not analysis['entities']:
+            return 'categories'
+        if analysis['intent'] == 'product_recommendation' and analysis['entities']:
+            # The template only honours the parsed filters, so every other word must be noise
+            if residual_keywords(user_message, analysis['entities'], analysis['keywords']) <= ROUTABLE_WORDS:
+                return 'product_search'
+        return None
+
+    def _finish(self, route: Optional[FastRoute]) -> Optional[FastRoute]:
+        with self._lock:
+            if route is None:
+                self.agent_fallthroughs += 1
+            else:
+                self.route_hits[route.name] = self.route_hits.get(route.name, 0) + 1
+        return route
+
+    def _categories_route(self, categories: List[Dict[str, Any]]) -> Optional[FastRoute]:
+        if not categories:
+            return None
+        lines = ["Here are the plant categories we carry:"]
+        for category in categories:
+            line = f"• {category['name']}"
+            if category.get('product_count'):
+                line += f" ({category['product_count']} products)"
+            if category.get('description'):
+                line += f" – {category['description']}"
+            lines.append(line)
+        lines.append("Which category would you like to explore?")
+        return FastRoute('categories', '\n'.join(lines))
+
+    def _products_route(self, filters: Dict[str, Any], products: List[Dict[str, Any]]) -> Optional[FastRoute]:
+        if not products:
+            # Nothing matched: the agent is better at broadening the search
+            return None
+        lines = [f"Here are some {describe_filters(filters)} I recommend:", *product_lines(products), FOLLOW_UP_QUESTION]
+        return FastRoute(_route_name(filters), '\n'.join(lines), products)
+
+
+def product_lines(products: List[Dict[str, Any]]) -> List[str]:
+    """One '• title – $price (traits)' line for each of the first MAX_LISTED_PRODUCTS products"""
+    lines = []
+    for product in products[:MAX_LISTED_PRODUCTS]:
+        details = product.get('details', {})
+        traits = [t for t in (details.get('maintenance') and f"{details['maintenance']} maintenance",
+                              details.get('sunlight'), details.get('toxicity')) if t]
+        line = f"• {product.get('title', '')} – ${float(product.get('price', 0)):.2f}"
+        if traits:
+            line += f" ({', '.join(traits)})"
+        lines.append(line)
+    return lines
+
+
+def describe_filters(filters: Dict[str, Any]) -> str:
+    """Readable description of _parse_query filters, e.g. 'low-maintenance Succulents & Cacti under $20'"""
+    words = []
+    if filters.get('maintenance_level'):
+        words.append(f"{filters['maintenance_level']}-maintenance")
+    if filters.get('pet_safe'):
+        words.append("pet-safe")
+    noun = filters.get('sub_category') or filters.get('category') or (filters.get('type', 'plant') + 's').lower()
+    if filters.get('sub_category') and filters.get('category'):
+        noun = f"{filters['category']} ({filters['sub_category']})"
+    words.append(noun)
+    if filters.get('sunlight'):
+        words.append(f"for {filters['sunlight']} light")
+    if filters.get('price_min') and filters.get('price_max'):
+        words.append(f"between ${filters['price_min']:.0f} and ${filters['price_max']:.0f}")
+    elif filters.get('price_max'):
+        words.append(f"under ${filters['price_max']:.0f}")
+    return ' '.join(words)
+
+
+def _route_name(filters: Dict[str, Any]) -> str:
+    """Per-route counter name: the dominant filter of a product search"""
+    if filters.get('pet_safe'):
+        return 'pet_safe_search'
+    if filters.get('price_max') or filters.get('price_min'):
+        return 'budget_search'
+    if filters.get('category') or filters.get('sub_category') or filters.get('type'):
+        return 'category_search'
+    return 'attribute_search'
@@ -0,0 +1,148 @@
+# agent/llm_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from langchain_core._api import suppress_langchain_beta_warning
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from observability.metrics import LLM_CACHE_LOOKUPS
+
+# Share of max_bytes left after an eviction pass, so every insert does not evict again
+EVICTION_TARGET = 0.9
+
+
+def completion_key(prompt: str, llm_string: str) -> str:
+    """
+    sha256 of the LLM configuration (model, temperature, max tokens, stop sequences, as
+    LangChain serializes them into llm_string) and the full rendered prompt.
+    """
+    return hashlib.sha256(llm_string.encode('utf-8') + b'\0' + prompt.encode('utf-8')).hexdigest()
+
+
+class SQLiteCompletionCache(BaseCache):
+    """
+    LangChain LLM cache persisted in a local SQLite file, so identical prompts (the same
+    ReAct step reached from different messages, replayed eval conversations) skip the
+    model call, across restarts too.
+
+    Entries are evicted least recently used first once the stored completions exceed
+    max_bytes. Several worker processes may share one file.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS completions '
+                         '(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS completions_used ON completions (used)')
+        self._bytes = self._stored_bytes()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['SQLiteCompletionCache']:
+        path = os.getenv('LLM_CACHE_PATH', '')
+        if not path:
+            return None
+        try:
+            return cls(path, max_bytes=int(float(os.getenv('LLM_CACHE_MAX_MB', '64')) * 1024 * 1024))
+        except (sqlite3.Error, OSError) as e:
+            print(f"LLM cache disabled, cannot open {path}: {e}")
+            return None
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = completion_key(prompt, llm_string)
+        try:
+            with self._lock:
+                row = self._db.execute('SELECT value FROM completions WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self._db.execute('UPDATE completions SET used = ? WHERE key = ?', (time.time(), key))
+            generations = self._decode(row[0]) if row is not None else None
+        except sqlite3.Error as e:
+            print(f"LLM cache lookup error: {e}")
+            generations = None
+        if generations is None:
+            self.misses += 1
+            LLM_CACHE_LOOKUPS.inc(result='miss')
+            return None
+        self.hits += 1
+        LLM_CACHE_LOOKUPS.inc(result='hit')
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        value = dumps(list(return_val))
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock:
+                self._db.execute('INSERT OR REPLACE INTO completions (key, value, size, used) VALUES (?, ?, ?, ?)',
+                                 (completion_key(prompt, llm_string), value, size, time.time()))
+                self._bytes += size
+                if self._bytes > self.max_bytes:
+                    self._evict()
+        except sqlite3.Error as e:
+            print(f"LLM cache update error: {e}")
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._db.execute('DELETE FROM completions')
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM completions').fetchone()[0]
+        return {
+            'entries': entries,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions
+        }
+
+    def _decode(self, value: str) -> Optional[RETURN_VAL_TYPE]:
+        try:
+            with suppress_langchain_beta_warning():
+                generations = loads(value)
+        except Exception as e:
+            # Written by an incompatible LangChain version: treat as a miss, the update replaces it
+            print(f"LLM cache entry could not be decoded: {e}")
+            return None
+        return generations if isinstance(generations, list) else None
+
+    def _stored_bytes(self) -> int:
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM completions').fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries down to EVICTION_TARGET of max_bytes (caller holds the lock)"""
+        # Other processes sharing the file write too, and replaced keys were counted twice
+        self._bytes = self._stored_bytes()
+        excess = self._bytes - int(self.max_bytes * EVICTION_TARGET)
+        while excess > 0:
+            doomed = []
+            for key, size in self._db.execute('SELECT key, size FROM completions ORDER BY used LIMIT 64').fetchall():
+                doomed.append((key,))
+                excess -= size
+                self._bytes -= size
+                if excess <= 0:
+                    break
+            if not doomed:
+                break
+            self._db.executemany('DELETE FROM completions WHERE key = ?', doomed)
+            self.evictions += len(doomed)
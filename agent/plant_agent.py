@@ -1,41 +1,78 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import create_react_agent, AgentExecutor
+from langchain.agents import create_react_agent
 from langchain.tools import Tool
 from langchain.prompts import PromptTemplate
 from tools.firestore_tools import FirestoreProductTool, FirestoreCareGuideTool, FirestoreCategoryTool
+from tools.tool_memo import ToolMemo
+from tools.single_flight import SingleFlight
+from tools.result_store import ToolResultStore, result_scope
+from tools.observation_renderer import ObservationRenderer
+from tools.query_matcher import (
+    match_query, CARE_INTENT_PHRASES, CARE_MENTION_TERMS, URGENT_TERMS, PRODUCT_INTENT_PHRASES,
+    CATEGORY_INTENT_PHRASES, PRODUCT_CONTEXT_TERMS, FALLBACK_BEGINNER_TERMS, FALLBACK_LOW_LIGHT_TERMS, FALLBACK_SUCCULENT_TERMS,
+    FALLBACK_PET_TERMS, PRICE_MENTION_TERMS, SPECIFIC_TERMS, CONVERSATIONAL_WORDS
+)
+from agent.response_cache import ResponseCache, canonical_query_key
+from agent.llm_cache import SQLiteCompletionCache
+from agent.fast_router import FastPathRouter, FastRoute, product_lines, FOLLOW_UP_QUESTION
+from agent.execution_budget import ExecutionBudget, BudgetedAgentExecutor
+from agent.session_store import SessionStore, Session
+from observability.callbacks import TraceCallbackHandler
+from observability.tracing import span, traced
+import asyncio
 import json
-import re
-from typing import Dict, List, Any
+import os
+from typing import Dict, List, Any, AsyncIterator, Tuple, Optional
+
+# Text the ReAct output parser splits the final answer on
+FINAL_ANSWER_MARKER = "Final Answer:"
+FALLBACK_RESPONSE = "I found some plants that might interest you! Let me know if you'd like more specific recommendations or have questions about plant care."
 
 class PlantRecommendationAgent:
-    def __init__(self, gemini_api_key: str):
+    def __init__(self, gemini_api_key: str, max_concurrency: int = 4):
+        # Identical prompts (the same ReAct step reached again, replayed conversations) are answered
+        # from a local completion cache when LLM_CACHE_PATH is set
+        self.llm_cache = SQLiteCompletionCache.from_env()
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-1.5-flash",
             google_api_key=gemini_api_key,
             temperature=0.2,  # Reduced for more consistent results
-            max_tokens=1200   # Increased for more comprehensive responses
+            max_tokens=1200,  # Increased for more comprehensive responses
+            cache=self.llm_cache
         )
         
-        # Initialize tools
-        self.product_tool = FirestoreProductTool()
-        self.care_tool = FirestoreCareGuideTool()
-        self.category_tool = FirestoreCategoryTool()
+        # Initialize tools; repeated searches with the same parsed filters share one result
+        self.tool_memo = ToolMemo(ttl_seconds=float(os.getenv("TOOL_MEMO_TTL_SECONDS", "30")))
+        # Tools show the LLM a compact, token-budgeted rendering of their results
+        self.observation_renderer = ObservationRenderer.from_env()
+        self.product_tool = FirestoreProductTool(memo=self.tool_memo, renderer=self.observation_renderer)
+        self.care_tool = FirestoreCareGuideTool(memo=self.tool_memo, renderer=self.observation_renderer)
+        self.category_tool = FirestoreCategoryTool(renderer=self.observation_renderer)
         
         self.tools = [
             Tool(
                 name="search_products",
                 description="Search for plant products. ALWAYS use this tool first for plant recommendations. Use broad keywords initially, then narrow if needed. Examples: 'low light plants', 'beginner plants', 'pet safe succulents', 'under $30'.",
-                func=self.product_tool.search_products
+                func=self.product_tool.search_products,
+                coroutine=self.product_tool.asearch_products
+            ),
+            Tool(
+                name="multi_search",
+                description="Run several product searches at once and get one merged, deduplicated list. Use instead of repeated search_products calls. Separate the variants with ';'. Example: 'low light plants; pet safe plants; succulents under $30'.",
+                func=self.product_tool.multi_search,
+                coroutine=self.product_tool.amulti_search
             ),
             Tool(
                 name="get_care_guides",
                 description="Get plant care instructions. Use after finding products or when asked about plant care. Include plant names or care topics.",
-                func=self.care_tool.get_care_guides
+                func=self.care_tool.get_care_guides,
+                coroutine=self.care_tool.aget_care_guides
             ),
             Tool(
                 name="get_categories",
                 description="Get available product categories. Use when customer wants to explore options or when no specific products found.",
-                func=self.category_tool.get_categories
+                func=self.category_tool.get_categories,
+                coroutine=self.category_tool.aget_categories
             )
         ]
         
@@ -45,13 +82,14 @@ You are an expert plant consultant helping customers find plants and care guidan
 CRITICAL INSTRUCTIONS:
 1. ALWAYS use search_products tool first when customers ask for plant recommendations
 2. If initial search yields few results, try broader search terms
-3. Use multiple searches with different keywords if needed
+3. To try several keywords, use ONE multi_search with all the variants instead of several search_products calls
 4. Only ask clarifying questions AFTER attempting to find relevant products
 5. Provide specific product recommendations with prices and care tips
 6. Include care guidance when relevant
 
 Your tools provide real-time data from our inventory:
 - search_products: Find plants matching customer needs (use broad terms first)
+- multi_search: Several searches in one step, e.g. "low light plants; pet safe plants"
 - get_care_guides: Get detailed care instructions 
 - get_categories: Browse available plant types
 
@@ -59,7 +97,7 @@ SEARCH STRATEGY:
 - Start with broad terms: "indoor plants", "low light", "beginner"
 - Then try specific terms: "succulents", "air purifying", "pet safe"
 - Include budget if mentioned: "under $50", "budget plants"
-- Try multiple searches to find the best matches
+- Combine alternative keywords in one multi_search to find the best matches
 
 RESPONSE FORMAT:
 - Lead with product recommendations when found
@@ -83,6 +121,12 @@ Observation: the result of the action
 Thought: I now have enough information to provide helpful recommendations
 Final Answer: [Provide specific product recommendations with details, prices, and care tips. If few products found, suggest alternatives and ask clarifying questions.]
 
+CONVERSATION CONTEXT:
+- Use it to resolve follow-ups such as "cheaper ones?" or "which of those are pet safe?"
+- Answer from the products already shown when they hold the needed details; search only for new options
+
+{conversation_context}
+
 Begin!
 
 Customer message: {input}
@@ -90,103 +134,445 @@ Customer message: {input}
 """)
         
         self.agent = create_react_agent(self.llm, self.tools, self.prompt)
-        self.executor = AgentExecutor(
+        # Also stops between ReAct steps on a request's deadline or once a search found strong matches
+        self.executor = BudgetedAgentExecutor(
             agent=self.agent, 
             tools=self.tools, 
             verbose=True,
             max_iterations=6,  # Increased to allow more tool usage
             handle_parsing_errors=True,
-            return_intermediate_steps=True
+            # Invoke rather than stream each step so the completion cache is consulted; astream_events
+            # (/chat/stream) still makes the model stream its tokens
+            stream_runnable=False
+        )
+        # Times every LLM call and tool invocation (/metrics) and records the ReAct steps of traced requests
+        self.trace_handler = TraceCallbackHandler()
+        
+        # Caps how many agent executions run at once on the async path
+        self._execution_slots = asyncio.Semaphore(max_concurrency)
+        
+        # Per-request latency budget (none unless set here or in ChatRequest.deadline_ms) and the text
+        # similarity above which a free-text product search ends the run (a query naming a product scores
+        # about 0.85-0.9 against it, the next closest product rarely above 0.6); 0 turns either off
+        self.deadline_seconds = float(os.getenv("AGENT_DEADLINE_MS", "0")) / 1000
+        self.early_exit_score = float(os.getenv("AGENT_EARLY_EXIT_SCORE", "0.8"))
+        
+        # Answers for paraphrased messages are reused until they expire or a product they mention changes
+        self.response_cache = ResponseCache(
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+        )
+        if self.product_tool.catalog is not None:
+            self.product_tool.catalog.add_listener(self.response_cache.invalidate_products)
+            self.product_tool.catalog.add_listener(lambda changed_ids: self.tool_memo.clear('search_products'))
+        if self.care_tool.index is not None:
+            self.care_tool.index.add_listener(lambda changed_ids: self.tool_memo.clear('get_care_guides'))
+        
+        # Concurrent requests with the same canonical query share one fast path / agent run
+        self.in_flight = None
+        if os.getenv("ENABLE_REQUEST_COALESCING", "true").lower() != "false":
+            self.in_flight = SingleFlight()
+        
+        # Simple lookups ("show me categories", "succulents under $20") are answered without the LLM
+        self.fast_router = None
+        if os.getenv("ENABLE_FAST_PATH", "true").lower() != "false":
+            self.fast_router = FastPathRouter(self.product_tool, self.category_tool)
+        
+        # Bounded memory of recent turns per ChatRequest.session_id
+        self.sessions = SessionStore(
+            max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "1000")),
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "1800"))
         )
     
-    def get_recommendation(self, user_message: str, user_id: str = None) -> Dict[str, Any]:
+    def get_recommendation(self, user_message: str, user_id: str = None, session_id: str = None, deadline_ms: int = None) -> Dict[str, Any]:
         """Process user message and return recommendations"""
+        budget = self._budget(deadline_ms)
+        session = self.sessions.get(session_id)
+        cache_key = self._request_cache_key(user_message, session)
+        session = self._conversation(session, cache_key)
+        cached = self._cached_output(cache_key, user_message)
+        if cached is not None:
+            return self._remember(session_id, user_message, cached)
+        
         try:
+            output = self._coalesce(cache_key, user_message, lambda: self._recommend(user_message, session, cache_key, budget))
+            return self._remember(session_id, user_message, output)
+        except Exception as e:
+            print(f"Agent execution error: {str(e)}")
+            # Fallback: try direct product search
+            with self.tool_memo.request_scope():
+                return self._build_fallback_output(user_message, self._fallback_product_search(user_message))
+
+    async def aget_recommendation(self, user_message: str, user_id: str = None, session_id: str = None, deadline_ms: int = None) -> Dict[str, Any]:
+        """Async variant of get_recommendation; never blocks the event loop"""
+        budget = self._budget(deadline_ms)
+        session = self.sessions.get(session_id)
+        cache_key = self._request_cache_key(user_message, session)
+        session = self._conversation(session, cache_key)
+        cached = self._cached_output(cache_key, user_message)
+        if cached is not None:
+            return self._remember(session_id, user_message, cached)
+        
+        try:
+            output = await self._acoalesce(cache_key, user_message, lambda: self._arecommend(user_message, session, cache_key, budget))
+            return self._remember(session_id, user_message, output)
+        except Exception as e:
+            print(f"Agent execution error: {str(e)}")
+            with self.tool_memo.request_scope():
+                return self._build_fallback_output(user_message, await self._afallback_product_search(user_message))
+
+    def _recommend(self, user_message: str, session: Optional[Session], cache_key: Optional[str], budget: ExecutionBudget) -> Dict[str, Any]:
+        """Answer a message that missed the response cache (fast path or agent run); raises if the agent fails"""
+        with self.tool_memo.request_scope(), result_scope() as results, self.trace_handler.request_scope(), \
+                budget.watch(results, early_exit=self._early_exit_allowed(user_message)):
+            if cache_key is not None and self.fast_router is not None:
+                try:
+                    with span('fast_path'):
+                        route = self.fast_router.route(user_message, self._analyze_user_query(user_message))
+                    if route is not None:
+                        return self._fast_path_output(cache_key, user_message, route)
+                except Exception as e:
+                    print(f"Fast path error: {str(e)}")
+            
             # Execute agent with enhanced error handling
-            response = self.executor.invoke({
-                "input": user_message
-            })
+            response = self.executor.invoke(self._agent_inputs(user_message, session), config=self._run_config())
             
-            # Parse the response to extract structured data
-            agent_response = response.get('output', '')
+            products = self._extract_products_from_tool_results(results)
             
-            # Extract products and care guides from the agent's tool usage
-            products = self._extract_products_from_agent_response(response)
-            care_guides = self._extract_care_guides_from_agent_response(response)
+            # If no products found but agent didn't search, reuse the products it talked about
+            # from earlier turns, or try a fallback search
+            if not products and not self._agent_searched_products(results):
+                products = self._session_products(session, response) or self._fallback_product_search(user_message)
             
-            # If no products found but agent didn't search, try a fallback search
-            if not products and not self._agent_searched_products(response):
-                products = self._fallback_product_search(user_message)
+            return self._finish_run(user_message, cache_key, budget, response, results, products)
+
+    async def _arecommend(self, user_message: str, session: Optional[Session], cache_key: Optional[str], budget: ExecutionBudget) -> Dict[str, Any]:
+        with self.tool_memo.request_scope(), result_scope() as results, self.trace_handler.request_scope(), \
+                budget.watch(results, early_exit=self._early_exit_allowed(user_message)):
+            if cache_key is not None and self.fast_router is not None:
+                try:
+                    with span('fast_path'):
+                        route = await self.fast_router.aroute(user_message, self._analyze_user_query(user_message))
+                    if route is not None:
+                        return self._fast_path_output(cache_key, user_message, route)
+                except Exception as e:
+                    print(f"Fast path error: {str(e)}")
             
-            # Understand what the user was looking for
-            query_analysis = self._analyze_user_query(user_message)
+            response = await self._ainvoke_agent(self._agent_inputs(user_message, session), budget)
             
-            # Generate suggested actions
-            suggested_actions = self._generate_suggested_actions(user_message, products, care_guides, agent_response)
+            products = self._extract_products_from_tool_results(results)
             
-            # Calculate confidence score (more lenient)
-            confidence = self._calculate_confidence(user_message, products, care_guides, agent_response)
+            if not products and not self._agent_searched_products(results):
+                products = self._session_products(session, response) or await self._afallback_product_search(user_message)
             
-            return {
-                "response": agent_response,
-                "product_recommendations": products,
-                "care_guides": care_guides,
-                "suggested_actions": suggested_actions,
-                "confidence_score": confidence,
-                "query_understood": query_analysis
-            }
+            return self._finish_run(user_message, cache_key, budget, response, results, products)
+
+    async def _ainvoke_agent(self, inputs: Dict[str, Any], budget: ExecutionBudget) -> Dict[str, Any]:
+        """
+        executor.ainvoke in an execution slot. When the request's deadline passes first (waiting
+        for a slot included) the run is cancelled, and an empty response is returned: the tool
+        results gathered so far stay in the result store.
+        """
+        async def run():
+            async with self._execution_slots:
+                return await self.executor.ainvoke(inputs, config=self._run_config())
+        
+        remaining = budget.remaining()
+        if remaining is None:
+            return await run()
+        try:
+            return await asyncio.wait_for(run(), max(remaining, 0.0))
+        except asyncio.TimeoutError:
+            budget.stop('deadline')
+            return {}
+
+    def _budget(self, deadline_ms: Optional[int]) -> ExecutionBudget:
+        """Limits for a request's agent run, its deadline counted from now"""
+        deadline_seconds = deadline_ms / 1000 if deadline_ms else self.deadline_seconds
+        return ExecutionBudget(deadline_seconds, self.early_exit_score)
+
+    def _early_exit_allowed(self, user_message: str) -> bool:
+        # Care questions need the guides as well, so strong product matches do not end them early
+        if match_query(user_message).has_any(CARE_MENTION_TERMS):
+            return False
+        return self._analyze_user_query(user_message)["intent"] != "care_guidance"
+
+    def _finish_run(self, user_message: str, cache_key: Optional[str], budget: ExecutionBudget, response: Dict,
+                    results: ToolResultStore, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Output of an agent run; a run stopped before its Final Answer is answered from what its tools found"""
+        if budget.stopped is not None:
+            response = {"output": self._partial_answer(products, self._extract_care_guides_from_tool_results(results))}
+        output = self._build_output(user_message, response, results, products)
+        # An answer ended by a strong match is a good one; one cut short by the deadline is not kept
+        if cache_key is not None and budget.stopped != 'deadline':
+            self.response_cache.put(cache_key, output)
+        return output
+
+    def _partial_answer(self, products: List[Dict[str, Any]], care_guides: List[Dict[str, Any]]) -> str:
+        guide_titles = [guide.get('title', '') for guide in care_guides[:3]]
+        if products:
+            lines = ["Here are the best matches I found for you:", *product_lines(products)]
+            if guide_titles:
+                lines.append(f"Care guides that may help: {', '.join(guide_titles)}.")
+            lines.append(FOLLOW_UP_QUESTION)
+            return '\n'.join(lines)
+        if guide_titles:
+            return '\n'.join(["Here are care guides that should help:", *(f"• {title}" for title in guide_titles)])
+        return FALLBACK_RESPONSE
+
+    def _coalesce(self, cache_key: Optional[str], user_message: str, compute) -> Dict[str, Any]:
+        """
+        Run compute, or wait for the run already in flight for the same canonical query.
+        Follow-ups (no cache key) depend on their conversation and always run on their own.
+        A request that waits gets the leader's answer within the leader's budget: its own
+        deadline_ms is not applied, so it may wait past it (or get an answer cut short earlier).
+        """
+        if cache_key is None or self.in_flight is None:
+            return compute()
+        with span('single_flight') as current:
+            output, shared = self.in_flight.do(cache_key, compute)
+            if current is not None:
+                current.attributes['shared'] = shared
+        return self._shared_output(output, user_message) if shared else output
+
+    async def _acoalesce(self, cache_key: Optional[str], user_message: str, compute) -> Dict[str, Any]:
+        if cache_key is None or self.in_flight is None:
+            return await compute()
+        with span('single_flight') as current:
+            output, shared = await self.in_flight.ado(cache_key, compute)
+            if current is not None:
+                current.attributes['shared'] = shared
+        return self._shared_output(output, user_message) if shared else output
+
+    def _shared_output(self, output: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+        # The answer is shared between paraphrases; the query analysis is not
+        return {**output, "query_understood": self._analyze_user_query(user_message)}
+
+    async def astream_recommendation(self, user_message: str, user_id: str = None, session_id: str = None, deadline_ms: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of aget_recommendation. Yields (event, data) pairs as work completes:
+        "products" / "care_guides" when a tool call returns results, "token" for each piece of
+        the Final Answer as the LLM streams it, and "response" with the full output dict last.
+        The deadline and early exit are checked between ReAct steps only; a step in progress
+        is not cut off mid-stream.
+        """
+        budget = self._budget(deadline_ms)
+        session = self.sessions.get(session_id)
+        cache_key = self._request_cache_key(user_message, session)
+        session = self._conversation(session, cache_key)
+        output = self._cached_output(cache_key, user_message)
+        
+        with self.tool_memo.request_scope(), result_scope() as results, self.trace_handler.request_scope(), \
+                budget.watch(results, early_exit=output is None and self._early_exit_allowed(user_message)):
+            if output is None and cache_key is not None and self.fast_router is not None:
+                try:
+                    with span('fast_path'):
+                        route = await self.fast_router.aroute(user_message, self._analyze_user_query(user_message))
+                    if route is not None:
+                        output = self._fast_path_output(cache_key, user_message, route)
+                except Exception as e:
+                    print(f"Fast path error: {str(e)}")
             
-        except Exception as e:
-            print(f"Agent execution error: {str(e)}")
-            # Fallback: try direct product search
-            fallback_products = self._fallback_product_search(user_message)
+            if output is not None:
+                self._remember(session_id, user_message, output)
+                async for event in self._stream_finished_output(output):
+                    yield event
+                return
+            
+            streamed_answer = False
+            try:
+                async with self._execution_slots:
+                    response = None
+                    answer_runs: Dict[str, list] = {}
+                    shown_products = None
+                    async for event in self.executor.astream_events(self._agent_inputs(user_message, session), config=self._run_config(), version="v1"):
+                        kind = event["event"]
+                        if kind == "on_chat_model_stream":
+                            token = self._final_answer_delta(answer_runs, event["run_id"], event["data"]["chunk"].content)
+                            if token:
+                                streamed_answer = True
+                                yield "token", token
+                        elif kind == "on_tool_end" and event["name"] in ("search_products", "multi_search"):
+                            products = results.latest('search_products')
+                            if products and products is not shown_products:
+                                shown_products = products
+                                yield "products", products
+                        elif kind == "on_tool_end" and event["name"] == "get_care_guides":
+                            care_guides = results.latest('get_care_guides')
+                            if care_guides:
+                                yield "care_guides", care_guides
+                        elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                            response = event["data"].get("output")
+                
+                products = self._extract_products_from_tool_results(results)
+                if not products and not self._agent_searched_products(results):
+                    products = self._session_products(session, response or {}) or await self._afallback_product_search(user_message)
+                    if products:
+                        yield "products", products
+                
+                output = self._finish_run(user_message, cache_key, budget, response or {}, results, products)
+                self._remember(session_id, user_message, output)
+                
+            except Exception as e:
+                print(f"Agent execution error: {str(e)}")
+                products = await self._afallback_product_search(user_message)
+                output = self._build_fallback_output(user_message, products)
+                if products:
+                    yield "products", products
             
-            return {
-                "response": "I found some plants that might interest you! Let me know if you'd like more specific recommendations or have questions about plant care.",
-                "product_recommendations": fallback_products,
-                "care_guides": [],
-                "suggested_actions": self._generate_fallback_actions(user_message),
-                "confidence_score": 0.6 if fallback_products else 0.3,
-                "query_understood": self._analyze_user_query(user_message)
-            }
+            if not streamed_answer:
+                yield "token", output["response"]
+            yield "response", output
+
+    async def _stream_finished_output(self, output: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """Events for an answer that is already complete (response cache or fast path)"""
+        if output["product_recommendations"]:
+            yield "products", output["product_recommendations"]
+        if output["care_guides"]:
+            yield "care_guides", output["care_guides"]
+        yield "token", output["response"]
+        yield "response", output
+
+    def _final_answer_delta(self, answer_runs: Dict[str, list], run_id: str, chunk: str) -> str:
+        """
+        Part of a streamed LLM chunk that belongs to the Final Answer. Text of each LLM call
+        is buffered until FINAL_ANSWER_MARKER shows up; everything after it is passed through.
+        """
+        state = answer_runs.setdefault(run_id, [False, ""])  # [marker seen, buffered text]
+        if not state[0]:
+            state[1] += chunk
+            marker_at = state[1].find(FINAL_ANSWER_MARKER)
+            if marker_at < 0:
+                return ""
+            state[0] = True
+            chunk = state[1][marker_at + len(FINAL_ANSWER_MARKER):]
+            state[1] = ""
+        if not state[1]:
+            # Nothing passed through yet: drop the whitespace that follows the marker
+            chunk = chunk.lstrip()
+            state[1] = chunk
+        return chunk
+
+    def _cache_key(self, user_message: str) -> str:
+        analysis = self._analyze_user_query(user_message)
+        return canonical_query_key(user_message, analysis["entities"], analysis["intent"], analysis["keywords"])
+
+    def _request_cache_key(self, user_message: str, session: Optional[Session]) -> Optional[str]:
+        """Response cache key, or None for a follow-up whose answer depends on the conversation"""
+        # The request's first look at the message, so its parsing is timed here once; the
+        # helpers after it reuse the cached match (a span per _parse_query call cost more than the parse)
+        with span('parse_query'):
+            if self._is_follow_up(user_message, session):
+                return None
+            return self._cache_key(user_message)
+
+    def _conversation(self, session: Optional[Session], cache_key: Optional[str]) -> Optional[Session]:
+        """
+        The session whose turns and products the answer may draw on. A message with a cache key
+        is answered as a standalone question: that answer is cached and handed to concurrent
+        identical requests, so it must not carry one user's conversation to another.
+        """
+        return session if cache_key is None else None
+
+    def _is_follow_up(self, user_message: str, session: Optional[Session]) -> bool:
+        """A message that refers back to earlier turns ("cheaper ones?", "which of those...")"""
+        if session is None or not session.has_history:
+            return False
+        match = match_query(user_message)
+        return not CONVERSATIONAL_WORDS.isdisjoint(match.tokens) or not self._analyze_user_query(user_message)["entities"]
+
+    def _run_config(self) -> Dict[str, Any]:
+        """Per-call config; callbacks passed here are inherited by the agent's LLM and tool runs"""
+        return {"callbacks": [self.trace_handler]}
+
+    def _agent_inputs(self, user_message: str, session: Optional[Session]) -> Dict[str, Any]:
+        context = session.render() if session is not None else ''
+        return {
+            "input": user_message,
+            "conversation_context": context or "(this is the first message of the conversation)"
+        }
+
+    def _session_products(self, session: Optional[Session], response: Dict) -> List[Dict[str, Any]]:
+        """Products from earlier turns that the answer mentions by name"""
+        if session is None:
+            return []
+        return session.find_products(response.get('output', ''))[:5]
+
+    def _remember(self, session_id: Optional[str], user_message: str, output: Dict[str, Any]) -> Dict[str, Any]:
+        self.sessions.record_turn(session_id, user_message, output)
+        return output
+
+    def _cached_output(self, cache_key: Optional[str], user_message: str) -> Dict[str, Any]:
+        if cache_key is None:
+            return None
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return None
+        return self._shared_output(cached, user_message)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters exposed by the /stats endpoint"""
+        return {
+            "response_cache": self.response_cache.stats(),
+            "tool_memo": self.tool_memo.stats(),
+            "fast_path": self.fast_router.stats() if self.fast_router is not None else None,
+            "single_flight": self.in_flight.stats() if self.in_flight is not None else None,
+            "llm_cache": self.llm_cache.stats() if self.llm_cache is not None else None,
+            "sessions": self.sessions.stats()
+        }
+
+    def _fast_path_output(self, cache_key: str, user_message: str, route: FastRoute) -> Dict[str, Any]:
+        output = self._compose_output(user_message, route.response, route.products, [])
+        self.response_cache.put(cache_key, output)
+        return output
+
+    def _build_output(self, user_message: str, response: Dict, results: ToolResultStore, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Turn an executor response and the recorded tool results into the ChatResponse-shaped dict"""
+        agent_response = response.get('output', '')
+        care_guides = self._extract_care_guides_from_tool_results(results)
+        return self._compose_output(user_message, agent_response, products, care_guides)
+
+    def _compose_output(self, user_message: str, agent_response: str, products: List[Dict[str, Any]], care_guides: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Understand what the user was looking for
+        query_analysis = self._analyze_user_query(user_message)
+        
+        # Generate suggested actions
+        suggested_actions = self._generate_suggested_actions(user_message, products, care_guides, agent_response)
+        
+        # Calculate confidence score (more lenient)
+        confidence = self._calculate_confidence(user_message, products, care_guides, agent_response)
+        
+        return {
+            "response": agent_response,
+            "product_recommendations": products,
+            "care_guides": care_guides,
+            "suggested_actions": suggested_actions,
+            "confidence_score": confidence,
+            "query_understood": query_analysis
+        }
+
+    def _build_fallback_output(self, user_message: str, fallback_products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "response": FALLBACK_RESPONSE,
+            "product_recommendations": fallback_products,
+            "care_guides": [],
+            "suggested_actions": self._generate_fallback_actions(user_message),
+            "confidence_score": 0.6 if fallback_products else 0.3,
+            "query_understood": self._analyze_user_query(user_message)
+        }
     
-    def _agent_searched_products(self, response: Dict) -> bool:
+    def _agent_searched_products(self, results: ToolResultStore) -> bool:
         """Check if the agent actually used the search_products tool"""
-        try:
-            intermediate_steps = response.get('intermediate_steps', [])
-            for step in intermediate_steps:
-                if len(step) >= 2:
-                    action = step[0]
-                    if hasattr(action, 'tool') and action.tool == 'search_products':
-                        return True
-            return False
-        except:
-            return False
+        return results.called('search_products')
     
     def _fallback_product_search(self, user_message: str) -> List[Dict[str, Any]]:
         """Perform a fallback product search if agent didn't search"""
         try:
-            # Try a broad search based on common keywords
-            search_terms = []
-            query_lower = user_message.lower()
-            
-            if any(word in query_lower for word in ['beginner', 'easy', 'simple']):
-                search_terms.append('beginner plants')
-            elif any(word in query_lower for word in ['low light', 'dark', 'shade']):
-                search_terms.append('low light plants')
-            elif any(word in query_lower for word in ['succulent', 'cactus']):
-                search_terms.append('succulents')
-            elif any(word in query_lower for word in ['pet', 'cat', 'dog', 'safe']):
-                search_terms.append('pet safe plants')
-            else:
-                search_terms.append('indoor plants')
-            
             # Try each search term
-            for term in search_terms:
+            for term in self._fallback_search_terms(user_message):
                 try:
-                    result_str = self.product_tool.search_products(term)
-                    products = json.loads(result_str)
-                    if isinstance(products, list) and products:
+                    products = self.product_tool.find_products(term)
+                    if products:
                         return products[:5]  # Return first 5 results
                 except:
                     continue
@@ -195,73 +581,69 @@ Customer message: {input}
         except Exception as e:
             print(f"Fallback search error: {e}")
             return []
+
+    async def _afallback_product_search(self, user_message: str) -> List[Dict[str, Any]]:
+        try:
+            for term in self._fallback_search_terms(user_message):
+                try:
+                    products = await self.product_tool.afind_products(term)
+                    if products:
+                        return products[:5]
+                except:
+                    continue
+            
+            return []
+        except Exception as e:
+            print(f"Fallback search error: {e}")
+            return []
+
+    def _fallback_search_terms(self, user_message: str) -> List[str]:
+        # Try a broad search based on common keywords
+        search_terms = []
+        match = match_query(user_message)
+        
+        if match.has_any(FALLBACK_BEGINNER_TERMS):
+            search_terms.append('beginner plants')
+        elif match.has_any(FALLBACK_LOW_LIGHT_TERMS):
+            search_terms.append('low light plants')
+        elif match.has_any(FALLBACK_SUCCULENT_TERMS):
+            search_terms.append('succulents')
+        elif match.has_any(FALLBACK_PET_TERMS):
+            search_terms.append('pet safe plants')
+        else:
+            search_terms.append('indoor plants')
+        
+        return search_terms
     
     def _generate_fallback_actions(self, user_message: str) -> List[str]:
         """Generate fallback suggested actions"""
-        query_lower = user_message.lower()
+        match = match_query(user_message)
         actions = []
         
-        if 'care' not in query_lower:
+        if not match.has('care'):
             actions.append("Show me plant care guides")
-        if 'beginner' not in query_lower:
+        if not match.has('beginner'):
             actions.append("Find beginner-friendly plants")
-        if 'pet' not in query_lower:
+        if not match.has('pet'):
             actions.append("Show pet-safe options")
-        if 'low light' not in query_lower:
+        if not match.has('low light'):
             actions.append("Find plants for low light")
         
         return actions[:3]
    
-    def _extract_products_from_agent_response(self, response: Dict) -> List[Dict[str, Any]]:
-        """Extract product information from the latest relevant agent tool usage."""
-        try:
-            intermediate_steps = response.get('intermediate_steps', [])
-            
-            # Look for the most recent successful product search
-            for step in reversed(intermediate_steps): 
-                if len(step) >= 2:
-                    action, observation_str = step[0], step[1]
-                    if hasattr(action, 'tool') and action.tool == 'search_products':
-                        try:
-                            products_data = json.loads(observation_str)
-                            if isinstance(products_data, list) and products_data: 
-                                return products_data
-                        except json.JSONDecodeError:
-                            continue
-                        except Exception:
-                            continue
-            
-            return []
-            
-        except Exception as e:
-            print(f"Error in _extract_products_from_agent_response: {e}")
-            return []
+    @traced('extract_products')
+    def _extract_products_from_tool_results(self, results: ToolResultStore) -> List[Dict[str, Any]]:
+        """Products of the latest product search that found anything"""
+        return results.latest('search_products')
     
-    def _extract_care_guides_from_agent_response(self, response: Dict) -> List[Dict[str, Any]]:
-        """Extract care guide information from agent tool usage"""
-        try:
-            intermediate_steps = response.get('intermediate_steps', [])
-            
-            for step in reversed(intermediate_steps):
-                if len(step) >= 2:
-                    action, observation = step[0], step[1]
-                    if hasattr(action, 'tool') and action.tool == 'get_care_guides':
-                        try:
-                            care_guides_data = json.loads(observation)
-                            if isinstance(care_guides_data, list) and care_guides_data:
-                                return care_guides_data
-                        except json.JSONDecodeError:
-                            continue
-            
-            return []
-            
-        except Exception as e:
-            print(f"Error extracting care guides: {e}")
-            return []
+    @traced('extract_care_guides')
+    def _extract_care_guides_from_tool_results(self, results: ToolResultStore) -> List[Dict[str, Any]]:
+        """Care guides of the latest care guide lookup that found anything"""
+        return results.latest('get_care_guides')
 
     def _analyze_user_query(self, user_message: str) -> Dict[str, Any]:
         """Analyze the user's query to understand intent and extract key information."""
-        query_lower = user_message.lower()
+        match = match_query(user_message)
         analysis = {
             "original_query": user_message,
             "intent": "unknown",
@@ -271,21 +653,21 @@ Customer message: {input}
         }
 
         # Intent detection
-        if any(phrase in query_lower for phrase in ["how to care", "care guide", "problem with", "help with", "dying", "yellow leaves"]):
+        if match.has_any(CARE_INTENT_PHRASES):
             analysis["intent"] = "care_guidance"
-            analysis["urgency"] = "high" if any(word in query_lower for word in ["dying", "help", "problem"]) else "normal"
-        elif any(phrase in query_lower for phrase in ["looking for", "recommend", "buy", "find plant", "suggest", "need a plant", "want a plant"]):
+            analysis["urgency"] = "high" if match.has_any(URGENT_TERMS) else "normal"
+        elif match.has_any(PRODUCT_INTENT_PHRASES):
             analysis["intent"] = "product_recommendation"
-        elif any(phrase in query_lower for phrase in ["category", "categories", "types of plants", "what plants"]):
+        elif match.has_any(CATEGORY_INTENT_PHRASES):
             analysis["intent"] = "category_inquiry"
         else:
             # Try to infer from context
-            if any(word in query_lower for word in ["plant", "succulent", "flower", "tree"]):
+            if match.has_any(PRODUCT_CONTEXT_TERMS):
                 analysis["intent"] = "product_recommendation"
 
         # Extract keywords
         common_words = {"a", "an", "the", "is", "are", "for", "to", "of", "i", "me", "my", "need", "want", "can", "you", "help"}
-        analysis["keywords"] = [word for word in re.findall(r'\b\w+\b', query_lower) if word not in common_words and len(word) > 2]
+        analysis["keywords"] = [word for word in match.tokens if word not in common_words and len(word) > 2]
 
         # Extract entities using product tool parser
         try:
@@ -302,7 +684,7 @@ Customer message: {input}
     def _generate_suggested_actions(self, user_message: str, products: List[Dict], care_guides: List[Dict], agent_response: str) -> List[str]:
         """Generate relevant suggested actions based on context"""
         suggestions = []
-        query_lower = user_message.lower()
+        match = match_query(user_message)
         response_lower = agent_response.lower()
 
         # Check if agent asked clarifying questions
@@ -333,11 +715,11 @@ Customer message: {input}
                 suggestions.append(f"Care guide for {product_title}")
             
             # Add complementary searches
-            if 'low light' not in query_lower:
+            if not match.has('low light'):
                 suggestions.append("Show low-light options")
-            if 'pet safe' not in query_lower and 'pet' not in query_lower:
+            if not match.has('pet safe') and not match.has('pet'):
                 suggestions.append("Find pet-safe plants")
-            if not any(price_term in query_lower for price_term in ['$', 'budget', 'cheap', 'expensive']):
+            if not match.has_any(PRICE_MENTION_TERMS):
                 suggestions.append("Show budget-friendly options")
             
             suggestions.append("Browse plant categories")
@@ -394,9 +776,7 @@ Customer message: {input}
                 base_score += 0.1
         
         # Boost for specific queries
-        query_lower = user_message.lower()
-        specific_terms = ['beginner', 'low light', 'pet safe', 'succulent', 'indoor', 'office', 'bedroom']
-        specific_matches = sum(1 for term in specific_terms if term in query_lower)
+        specific_matches = match_query(user_message).count(SPECIFIC_TERMS)
         base_score += min(specific_matches * 0.05, 0.15)
         
         # Boost if agent provided helpful response
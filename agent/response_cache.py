@@ -0,0 +1,130 @@
+# agent/response_cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Set, Iterable
+
+from tools.query_matcher import FILTER_PHRASES, PRICE_TERMS, match_query
+
+# Words that carry no meaning once intent and filters are known
+FILLER_WORDS = frozenset([
+    'plant', 'plants', 'show', 'some', 'any', 'good', 'best', 'nice', 'please', 'find',
+    'looking', 'recommend', 'suggest', 'what', 'which', 'with', 'that', 'have', 'get',
+    'buy', 'like', 'would', 'could', 'options', 'friendly'
+])
+
+
+def residual_keywords(user_message: str, filters: Dict[str, Any], keywords: List[str]) -> Set[str]:
+    """
+    The keywords of a message that its filters do not already explain, singularized.
+    Numbers count as keywords ("for a 2 year old") unless they are the parsed price, and
+    the words framing a price are only explained when a price filter was parsed.
+    """
+    match = match_query(user_message)
+    explained = {word for phrase in FILTER_PHRASES if match.has(phrase) for word in phrase.split()}
+    prices = {filters[name] for name in ('price_min', 'price_max') if filters.get(name) is not None}
+    if prices:
+        explained |= PRICE_TERMS
+        explained |= {str(int(price)) for price in prices}
+
+    residual = set()
+    # keywords skips short tokens, which would drop most numbers
+    for word in list(keywords) + [token for token in match.tokens if token.isdigit()]:
+        stem = word[:-1] if word.endswith('s') and len(word) > 3 else word
+        if word in explained or stem in explained or word in FILLER_WORDS or stem in FILLER_WORDS:
+            continue
+        residual.add(stem)
+    return residual
+
+
+def canonical_query_key(user_message: str, filters: Dict[str, Any], intent: str, keywords: List[str]) -> str:
+    """
+    Canonical form of a chat message: the parsed filters, the detected intent and the
+    keywords that the filters do not already explain. Paraphrases such as
+    "beginner plants under $30" and "easy plants below $30" share one key.
+    """
+    residual = residual_keywords(user_message, filters, keywords)
+    return json.dumps([intent, filters, sorted(residual)], sort_keys=True)
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of agent outputs keyed by canonical_query_key.
+
+    Entries remember the ids of the products they recommend so a product change can
+    drop exactly the answers that mention it.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._keys_by_product: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, output, _ = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return output
+
+    def put(self, key: str, output: Dict[str, Any]):
+        product_ids = {p.get('id') for p in output.get('product_recommendations', []) if p.get('id')}
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, output, product_ids)
+            for product_id in product_ids:
+                self._keys_by_product.setdefault(product_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_products(self, product_ids: Iterable[str]):
+        """Forget every cached answer that recommended one of product_ids"""
+        with self._lock:
+            for product_id in product_ids:
+                for key in self._keys_by_product.pop(product_id, ()):
+                    if key in self._entries:
+                        self._drop(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_product.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
+
+    def _drop(self, key: str):
+        _, _, product_ids = self._entries.pop(key)
+        for product_id in product_ids:
+            keys = self._keys_by_product.get(product_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_product[product_id]
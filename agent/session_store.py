@@ -0,0 +1,149 @@
+# agent/session_store.py
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional
+
+# How much of a turn survives in the prompt once it is compacted into the summary
+MAX_SUMMARY_MESSAGE_CHARS = 80
+MAX_RECENT_RESPONSE_CHARS = 300
+# Most recently shown products listed in the prompt (more are remembered for reuse)
+MAX_CONTEXT_PRODUCTS = 8
+
+
+class Session:
+    """
+    Memory of one conversation: the last few turns verbatim, a short summary of the
+    older ones, and the product records already shown (newest last, capped).
+    """
+
+    def __init__(self, max_turns: int, max_products: int, max_summary_chars: int):
+        self.max_turns = max_turns
+        self.max_products = max_products
+        self.max_summary_chars = max_summary_chars
+        self.turns = deque()
+        self.summary_lines = deque()
+        self.products: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.turns or self.summary_lines)
+
+    def add_turn(self, user_message: str, output: Dict[str, Any]):
+        with self._lock:
+            self._add_turn(user_message, output)
+
+    def _add_turn(self, user_message: str, output: Dict[str, Any]):
+        product_ids = []
+        for product in output.get('product_recommendations', []):
+            if product.get('id'):
+                product_ids.append(product['id'])
+                self.products[product['id']] = product
+                self.products.move_to_end(product['id'])
+        while len(self.products) > self.max_products:
+            self.products.popitem(last=False)
+
+        self.turns.append((user_message, output.get('response', ''), product_ids))
+        while len(self.turns) > self.max_turns:
+            self._compact(*self.turns.popleft())
+
+    def _compact(self, user_message: str, response: str, product_ids: List[str]):
+        """Fold an old turn into one summary line: what was asked and what was shown"""
+        line = f"- Customer asked: \"{_clip(user_message, MAX_SUMMARY_MESSAGE_CHARS)}\""
+        titles = [self.products[pid].get('title', '') for pid in product_ids if pid in self.products]
+        if titles:
+            line += f"; shown: {', '.join(titles[:5])}"
+        self.summary_lines.append(line)
+        while self.summary_lines and sum(len(l) + 1 for l in self.summary_lines) > self.max_summary_chars:
+            self.summary_lines.popleft()
+
+    def find_products(self, text: str) -> List[Dict[str, Any]]:
+        """Shown products whose title appears in text (e.g. an answer that needed no new search)"""
+        text = text.lower()
+        with self._lock:
+            return [p for p in reversed(self.products.values())
+                    if p.get('title') and re.search(r'\b' + re.escape(p['title'].lower()) + r'\b', text)]
+
+    def render(self) -> str:
+        """Compact conversation context for the agent prompt"""
+        with self._lock:
+            return self._render()
+
+    def _render(self) -> str:
+        lines = []
+        if self.summary_lines:
+            lines.append("Earlier in this conversation:")
+            lines.extend(self.summary_lines)
+        if self.turns:
+            lines.append("Recent turns:")
+            for user_message, response, _ in self.turns:
+                lines.append(f"Customer: {_clip(user_message, MAX_RECENT_RESPONSE_CHARS)}")
+                lines.append(f"You: {_clip(response, MAX_RECENT_RESPONSE_CHARS)}")
+        if self.products:
+            lines.append("Products already shown (reuse these details instead of searching again):")
+            for product in list(reversed(self.products.values()))[:MAX_CONTEXT_PRODUCTS]:
+                details = product.get('details', {})
+                facts = [f"${float(product.get('price', 0)):.2f}", product.get('category'), details.get('maintenance'),
+                         details.get('sunlight'), details.get('toxicity')]
+                lines.append(f"- {product.get('title', '')} ({', '.join(fact for fact in facts if fact)})")
+        return '\n'.join(lines)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+
+class SessionStore:
+    """
+    LRU + TTL store of Session objects keyed by ChatRequest.session_id. Each session is
+    bounded (recent turns, summary length, remembered products), and so is their number.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800.0, max_turns: int = 3,
+                 max_products: int = 24, max_summary_chars: int = 600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.max_products = max_products
+        self.max_summary_chars = max_summary_chars
+        self._lock = threading.Lock()
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self.evictions = 0
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """The live session for session_id, or None when there is none"""
+        if not session_id:
+            return None
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if session.expires_at < time.monotonic():
+                del self._sessions[session_id]
+                self.evictions += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def record_turn(self, session_id: Optional[str], user_message: str, output: Dict[str, Any]):
+        if not session_id:
+            return
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.expires_at < time.monotonic():
+                session = Session(self.max_turns, self.max_products, self.max_summary_chars)
+                self._sessions[session_id] = session
+            session.add_turn(user_message, output)
+            session.expires_at = time.monotonic() + self.ttl_seconds
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {'sessions': len(self._sessions), 'evictions': self.evictions}
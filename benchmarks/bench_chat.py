@@ -0,0 +1,311 @@
+# benchmarks/bench_chat.py
+"""
+End-to-end /chat benchmark that runs entirely offline.
+
+    python -m benchmarks.bench_chat [--products 1000,10000,100000] [--concurrency 1,8,32]
+                                    [--requests 300] [--llm-latency-ms 0] [--rpc-latency-ms 0]
+                                    [--cold] [--stream] [--snapshot] [--burst MESSAGE]
+
+For each catalog size the FastAPI `app` from main.py is started against an in-process
+Firestore stand-in (benchmarks/fake_firestore.py) filled with synthetic products, care
+guides and categories, with Gemini replaced by a scripted ReAct model
+(benchmarks/fake_llm.py). Requests are sent through the ASGI interface at each
+concurrency level and the report gives p50/p95/p99 latency, throughput, and the time
+spent per stage: startup (catalog and index loading), fast path, agent run, LLM calls,
+each tool, and building the response.
+
+Everything else is configured as in production through the environment (e.g.
+ENABLE_PRODUCT_VECTOR_INDEX=false, AGENT_MAX_CONCURRENCY=8). --cold turns off the
+response cache and the cross-request tool memo so every request does the full work.
+--snapshot exports the synthetic data to a catalog snapshot and starts the app offline on
+it (CATALOG_SNAPSHOT_PATH, CATALOG_SNAPSHOT_OFFLINE), so no Firestore reads happen at all.
+--burst sends the same message in every request, like a campaign spike; with --cold the
+stage table then shows how many LLM and tool calls single-flight coalescing saved.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks import fake_firestore, synthetic_data
+from benchmarks.fake_llm import ScriptedChatModel, TRANSCRIPTS
+
+# Scripted agent conversations plus messages the fast path answers without the LLM
+MESSAGES = list(TRANSCRIPTS) + [
+    "succulents under $20",
+    "show me pet safe plants",
+    "what categories do you have",
+    "low light indoor plants",
+]
+
+
+class StageTimer(BaseCallbackHandler):
+    """Wall time per stage: LangChain runs through callbacks, other stages through wrap()"""
+
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[Any, Tuple[str, float]] = {}
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+
+    def wrap(self, obj, method: str, stage: str):
+        original = getattr(obj, method)
+        if asyncio.iscoroutinefunction(original):
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    self.add(stage, time.perf_counter() - start)
+        else:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.add(stage, time.perf_counter() - start)
+        setattr(obj, method, timed)
+
+    def _start(self, run_id, stage: str):
+        self._started[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.add(started[0], time.perf_counter() - started[1])
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, 'llm')
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, 'llm')
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._start(run_id, 'agent')
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, 'tool:' + (serialized or {}).get('name', 'unknown'))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+async def asgi_post(app, path: str, payload: Dict[str, Any]) -> Tuple[int, bytes]:
+    """POST payload as JSON straight through the ASGI interface (no sockets, no HTTP client)"""
+    body = json.dumps(payload).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [(b'host', b'bench'), (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('bench', 80),
+    }
+    request_sent = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+
+    await app(scope, receive, send)
+    return status, b''.join(chunks)
+
+
+def reset_shared_state():
+    """Forget the process-wide catalogs and indexes so the next app start loads the new data"""
+    from tools.product_catalog import ProductCatalog
+    from tools.care_guide_index import CareGuideIndex
+    from tools.category_catalog import CategoryCatalog
+    from tools.product_vector_index import ProductVectorIndex
+    from tools.firestore_access import FirestoreAccess
+    from tools.catalog_snapshot import CatalogSnapshot
+    CatalogSnapshot._shared, CatalogSnapshot._shared_loaded = None, False
+    for cls in (ProductCatalog, CareGuideIndex, CategoryCatalog, ProductVectorIndex, FirestoreAccess):
+        shared = cls._shared
+        if shared is not None and hasattr(shared, 'stop'):
+            shared.stop()
+        cls._shared = None
+
+
+async def start_app(args, product_count: int, timer: StageTimer):
+    """Fill a fresh Firestore stand-in, start main.app on it and return the module"""
+    start = time.perf_counter()
+    products = list(synthetic_data.products(product_count))
+    store = fake_firestore.FakeStore(rpc_latency_ms=args.rpc_latency_ms)
+    store.load('products', products)
+    store.load('care_guides', synthetic_data.care_guides(args.guides))
+    store.load('categories', synthetic_data.categories(products))
+    del products
+    timer.add('startup:generate_data', time.perf_counter() - start)
+
+    if args.snapshot:
+        from tools.catalog_snapshot import export_snapshot
+        path = os.path.join(tempfile.gettempdir(), f'bench-catalog-{product_count}.snap')
+        export_snapshot(fake_firestore.FakeFirestore(store), path)
+        os.environ['CATALOG_SNAPSHOT_PATH'] = path
+        os.environ['CATALOG_SNAPSHOT_OFFLINE'] = 'true'
+
+    reset_shared_state()
+    fake_firestore.install(store)
+    import agent.plant_agent as plant_agent
+    plant_agent.ChatGoogleGenerativeAI = lambda **kwargs: ScriptedChatModel(latency_ms=args.llm_latency_ms, cache=kwargs.get('cache'))
+    import main
+    main.plant_agent_instance = None
+
+    start = time.perf_counter()
+    await main.app.router.startup()
+    agent = await main.get_agent()
+    timer.add('startup:app', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    vector_index = agent.product_tool.vector_index
+    if vector_index is not None:
+        while not vector_index.ready:
+            await asyncio.sleep(0.05)
+    timer.add('startup:vector_index', time.perf_counter() - start)
+
+    agent.executor.verbose = False
+    agent.executor.callbacks = [timer]
+    agent.llm.callbacks = [timer]
+    for tool in agent.tools:
+        tool.callbacks = [timer]
+    if agent.fast_router is not None:
+        timer.wrap(agent.fast_router, 'aroute', 'fast_path')
+    timer.wrap(agent, '_build_output', 'build_response')
+    return main, store
+
+
+async def run_load(app, path: str, concurrency: int, total: int, messages: List[str] = MESSAGES) -> Tuple[List[float], int, float]:
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request, errors
+        while next_request < total:
+            i = next_request
+            next_request += 1
+            start = time.perf_counter()
+            status, _ = await asgi_post(app, path, {'message': messages[i % len(messages)]})
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def report_stages(timer: StageTimer, requests: int):
+    print(f"  {'stage':<26}{'calls/req':>10}{'mean ms':>10}{'p95 ms':>10}{'ms/req':>10}")
+    for stage, samples in sorted(timer.samples.items()):
+        if stage.startswith('startup:'):
+            continue
+        ms = np.array(samples) * 1000
+        print(f"  {stage:<26}{len(ms) / requests:>10.2f}{ms.mean():>10.3f}{np.percentile(ms, 95):>10.3f}{ms.sum() / requests:>10.3f}")
+
+
+async def main_async(args):
+    if args.cold:
+        os.environ['RESPONSE_CACHE_TTL_SECONDS'] = '0'
+        os.environ['TOOL_MEMO_TTL_SECONDS'] = '0'
+    os.environ.setdefault('GEMINI_API_KEY', 'offline-benchmark')
+    path = '/chat/stream' if args.stream else '/chat'
+    quiet = open(os.devnull, 'w') if not args.verbose else sys.stdout
+
+    for product_count in args.products:
+        timer = StageTimer()
+        with redirect_stdout(quiet):
+            main, store = await start_app(args, product_count, timer)
+        startup = {stage.split(':', 1)[1]: sum(s) * 1000 for stage, s in timer.samples.items()}
+        print(f"\n== {product_count:,} products, {args.guides:,} care guides "
+              f"(data {startup['generate_data']:.0f} ms, app start {startup['app']:.0f} ms, "
+              f"vector index {startup['vector_index']:.0f} ms)")
+
+        for concurrency in args.concurrency:
+            timer.reset()
+            rpcs_before = store.rpcs
+            with redirect_stdout(quiet):
+                # One warm-up pass per message so import-time and first-call costs stay out of the numbers
+                await run_load(main.app, path, 1, len(MESSAGES))
+                timer.reset()
+                latencies, errors, elapsed = await run_load(main.app, path, concurrency, args.requests,
+                                                            [args.burst] if args.burst else MESSAGES)
+            ms = np.array(latencies) * 1000
+            print(f"{path} concurrency {concurrency}: {len(ms)} requests, {errors} errors, "
+                  f"{len(ms) / elapsed:.1f} req/s, p50 {np.percentile(ms, 50):.2f} ms, "
+                  f"p95 {np.percentile(ms, 95):.2f} ms, p99 {np.percentile(ms, 99):.2f} ms, "
+                  f"{(store.rpcs - rpcs_before) / (len(ms) + len(MESSAGES)):.2f} Firestore RPCs/req")
+            report_stages(timer, len(ms))
+
+        await main.app.router.shutdown()
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(float(part)) for part in value.split(',') if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=_int_list, default=[1000, 10000, 100000],
+                        help='comma separated catalog sizes, e.g. 1000,1e6')
+    parser.add_argument('--guides', type=int, default=500)
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=300, help='requests per concurrency level')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='simulated time per LLM call')
+    parser.add_argument('--rpc-latency-ms', type=float, default=0.0, help='simulated Firestore round trip')
+    parser.add_argument('--cold', action='store_true', help='disable the response cache and cross-request tool memo')
+    parser.add_argument('--stream', action='store_true', help='benchmark /chat/stream instead of /chat')
+    parser.add_argument('--burst', metavar='MESSAGE', help='send this one message in every request')
+    parser.add_argument('--snapshot', action='store_true', help='serve offline from an exported catalog snapshot')
+    parser.add_argument('--verbose', action='store_true', help='keep the app and agent logs')
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
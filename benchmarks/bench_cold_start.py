@@ -0,0 +1,135 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold-start profile of the serverless entry point (api/index.py imports main).
+
+    python -m benchmarks.bench_cold_start [--runs 5] [--top 15] [--no-first-request]
+
+Every measurement runs in a fresh interpreter, as a cold start would. Reported:
+
+* `import main`: wall time until the app object exists (median and min over --runs)
+* the modules that dominate it, from `python -X importtime` (self and cumulative time)
+* the deferred part: importing the agent stack that main no longer loads up front
+* first request: building the agent and answering one /chat on the offline stand-ins
+  from bench_chat (Firestore stand-in, scripted LLM), i.e. what pre-warming saves
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_MAIN = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+IMPORT_AGENT_STACK = """
+import time
+import main
+start = time.perf_counter()
+import config.firebase_config, agent.plant_agent
+print(time.perf_counter() - start)
+"""
+
+FIRST_REQUEST = """
+import asyncio, os, time
+from benchmarks import synthetic_data
+products = list(synthetic_data.products(1000))
+guides = list(synthetic_data.care_guides(100))
+os.environ.setdefault('GEMINI_API_KEY', 'offline-benchmark')
+os.environ.setdefault('ENABLE_PRODUCT_VECTOR_INDEX', 'false')
+
+start = time.perf_counter()
+import main
+
+async def first_request():
+    # The stand-ins import the same heavy modules the agent does, so they count too
+    from benchmarks import fake_firestore
+    from benchmarks.fake_llm import ScriptedChatModel
+    from benchmarks.bench_chat import asgi_post
+    import agent.plant_agent as plant_agent
+    store = fake_firestore.FakeStore()
+    store.load('products', products)
+    store.load('care_guides', guides)
+    store.load('categories', synthetic_data.categories(products))
+    fake_firestore.install(store)
+    plant_agent.ChatGoogleGenerativeAI = lambda **kwargs: ScriptedChatModel()
+    await main.app.router.startup()
+    status, _ = await asgi_post(main.app, '/chat', {'message': 'Recommend a low maintenance plant for my office under $30'})
+    assert status == 200, status
+
+import contextlib, io
+with contextlib.redirect_stdout(io.StringIO()):
+    asyncio.run(first_request())
+print(time.perf_counter() - start)
+"""
+
+_IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_python(code: str, *flags: str) -> Tuple[str, str]:
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='1')
+    env.pop('PREWARM_AGENT', None)
+    result = subprocess.run([sys.executable, *flags, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def timed_runs(code: str, runs: int) -> List[float]:
+    return [float(run_python(code)[0].strip().splitlines()[-1]) for _ in range(runs)]
+
+
+def import_profile() -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) for every module imported by `import main`"""
+    _, stderr = run_python('import main', '-X', 'importtime')
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return rows
+
+
+def summarize(label: str, seconds: List[float]):
+    print(f"{label:<44} median {statistics.median(seconds) * 1000:8.1f} ms   min {min(seconds) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--no-first-request', action='store_true', help='skip the offline first-request measurement')
+    args = parser.parse_args()
+
+    summarize('import main', timed_runs(IMPORT_MAIN, args.runs))
+    summarize('deferred: import agent stack', timed_runs(IMPORT_AGENT_STACK, args.runs))
+    if not args.no_first_request:
+        summarize('import main + first /chat (offline)', timed_runs(FIRST_REQUEST, args.runs))
+
+    rows = import_profile()
+    packages: Dict[str, int] = {}
+    for module, self_us, _, _ in rows:
+        top_level = module.split('.')[0]
+        packages[top_level] = packages.get(top_level, 0) + self_us
+    total = sum(packages.values())
+
+    print(f"\n`import main` import-time profile (python -X importtime, {total / 1000:.1f} ms in imports)")
+    print(f"  {'top-level package':<36}{'self ms':>10}{'share':>8}")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {package:<36}{self_us / 1000:>10.1f}{100 * self_us / total:>7.1f}%")
+
+    print(f"\n  {'slowest top-level imports':<50}{'cumulative ms':>14}")
+    direct = [row for row in rows if row[3] == 1]
+    for module, _, cumulative_us, _ in sorted(direct, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {module:<50}{cumulative_us / 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+# benchmarks/bench_query_matcher.py
+"""
+Per-message CPU cost of the query helpers: the original one-scan-per-phrase-list code
+versus the shared compiled matcher in tools/query_matcher.py.
+
+    python -m benchmarks.bench_query_matcher [--rounds 2000]
+
+Both paths run the same six helpers (_parse_query, _analyze_user_query, the fallback
+search terms, _generate_fallback_actions, _generate_suggested_actions and
+_calculate_confidence) over the same messages. That their outputs are equal is checked by
+tests/test_query_matcher.py, which imports the reference copies below.
+"""
+
+import argparse
+import re
+import time
+
+from agent.plant_agent import PlantRecommendationAgent
+from tools.firestore_tools import FirestoreProductTool
+from tools.query_matcher import match_query
+
+MESSAGES = [
+    "Recommend a low maintenance plant for my office under $30",
+    "How to care for a Fiddle Leaf Fig?",
+    "Show me pet-safe plants",
+    "What are some good beginner friendly succulents?",
+    "I'm looking for a plant for a sunny spot.",
+    "easy plants below $30",
+    "large tropical statement plant for bright indirect light, $40 to $90",
+    "my monstera has yellow leaves, please help with this problem",
+    "what plants do you have? show me the categories",
+    "non toxic cat safe hanging herbs for a small desk, budget $25",
+]
+
+
+# ---- Reference copies of the helpers as they were before the compiled matcher ----
+
+def legacy_parse_query(query):
+    filters = {}
+    query_lower = query.lower()
+    if any(word in query_lower for word in ['beginner', 'new', 'easy', 'simple', 'low maintenance']):
+        filters['maintenance_level'] = 'low'
+    elif any(word in query_lower for word in ['advanced', 'expert', 'difficult', 'high maintenance']):
+        filters['maintenance_level'] = 'high'
+    if any(word in query_lower for word in ['low light', 'shade', 'dark', 'indirect']):
+        filters['sunlight'] = 'indirect'
+    elif any(word in query_lower for word in ['bright', 'direct sun', 'sunny', 'full sun']):
+        filters['sunlight'] = 'direct'
+    elif any(word in query_lower for word in ['medium light', 'partial']):
+        filters['sunlight'] = 'partial'
+    categories = {'succulent': 'Succulents & Cacti', 'cactus': 'Succulents & Cacti', 'flower': 'Flowering Plants',
+                  'flowering': 'Flowering Plants', 'herb': 'Herbs & Edibles', 'edible': 'Herbs & Edibles',
+                  'tree': 'Trees & Large Plants', 'tropical': 'Tropical Plants', 'air purifying': 'Air Purifying',
+                  'pot': 'Pots & Planters', 'planter': 'Pots & Planters', 'tool': 'Tools & Supplies',
+                  'fertilizer': 'Tools & Supplies'}
+    for keyword, category in categories.items():
+        if keyword in query_lower:
+            filters['category'] = category
+            break
+    sub_categories = {'hanging': 'Hanging Plants', 'trailing': 'Hanging Plants', 'desk': 'Desktop Plants',
+                      'small': 'Desktop Plants', 'tabletop': 'Desktop Plants', 'floor': 'Floor Plants',
+                      'large': 'Floor Plants', 'statement': 'Floor Plants'}
+    for keyword, sub_category in sub_categories.items():
+        if keyword in query_lower:
+            filters['sub_category'] = sub_category
+            break
+    types = {'indoor': 'Indoor Plant', 'houseplant': 'Indoor Plant', 'house plant': 'Indoor Plant',
+             'outdoor': 'Outdoor Plant', 'garden': 'Outdoor Plant', 'ceramic': 'Ceramic Pot',
+             'terracotta': 'Terracotta Pot', 'fertilizer': 'Fertilizer', 'plant food': 'Fertilizer',
+             'tool': 'Garden Tool'}
+    for keyword, plant_type in types.items():
+        if keyword in query_lower:
+            filters['type'] = plant_type
+            break
+    if any(word in query_lower for word in ['pet safe', 'cat safe', 'dog safe', 'non toxic']):
+        filters['pet_safe'] = True
+    for pattern in [r'under \$(\d+)', r'below \$(\d+)', r'less than \$(\d+)', r'\$(\d+) or less', r'budget \$(\d+)']:
+        price_match = re.search(pattern, query_lower)
+        if price_match:
+            filters['price_max'] = float(price_match.group(1))
+            break
+    range_match = re.search(r'\$(\d+)[-\s]?to[-\s]?\$(\d+)', query_lower)
+    if range_match:
+        filters['price_min'] = float(range_match.group(1))
+        filters['price_max'] = float(range_match.group(2))
+    return filters
+
+
+def legacy_analyze_user_query(user_message):
+    query_lower = user_message.lower()
+    analysis = {"original_query": user_message, "intent": "unknown", "keywords": [], "entities": {}, "urgency": "normal"}
+    if any(phrase in query_lower for phrase in ["how to care", "care guide", "problem with", "help with", "dying", "yellow leaves"]):
+        analysis["intent"] = "care_guidance"
+        analysis["urgency"] = "high" if any(word in query_lower for word in ["dying", "help", "problem"]) else "normal"
+    elif any(phrase in query_lower for phrase in ["looking for", "recommend", "buy", "find plant", "suggest", "need a plant", "want a plant"]):
+        analysis["intent"] = "product_recommendation"
+    elif any(phrase in query_lower for phrase in ["category", "categories", "types of plants", "what plants"]):
+        analysis["intent"] = "category_inquiry"
+    elif any(word in query_lower for word in ["plant", "succulent", "flower", "tree"]):
+        analysis["intent"] = "product_recommendation"
+    common_words = {"a", "an", "the", "is", "are", "for", "to", "of", "i", "me", "my", "need", "want", "can", "you", "help"}
+    analysis["keywords"] = [word for word in re.findall(r'\b\w+\b', query_lower) if word not in common_words and len(word) > 2]
+    extracted_filters = legacy_parse_query(user_message)
+    if extracted_filters:
+        analysis["entities"] = extracted_filters
+        if analysis["intent"] == "unknown":
+            analysis["intent"] = "product_recommendation"
+    return analysis
+
+
+def legacy_fallback_search_terms(user_message):
+    query_lower = user_message.lower()
+    if any(word in query_lower for word in ['beginner', 'easy', 'simple']):
+        return ['beginner plants']
+    elif any(word in query_lower for word in ['low light', 'dark', 'shade']):
+        return ['low light plants']
+    elif any(word in query_lower for word in ['succulent', 'cactus']):
+        return ['succulents']
+    elif any(word in query_lower for word in ['pet', 'cat', 'dog', 'safe']):
+        return ['pet safe plants']
+    return ['indoor plants']
+
+
+def legacy_fallback_actions(user_message):
+    query_lower = user_message.lower()
+    actions = []
+    if 'care' not in query_lower:
+        actions.append("Show me plant care guides")
+    if 'beginner' not in query_lower:
+        actions.append("Find beginner-friendly plants")
+    if 'pet' not in query_lower:
+        actions.append("Show pet-safe options")
+    if 'low light' not in query_lower:
+        actions.append("Find plants for low light")
+    return actions[:3]
+
+
+def legacy_product_suggestions(user_message):
+    query_lower = user_message.lower()
+    suggestions = []
+    if 'low light' not in query_lower:
+        suggestions.append("Show low-light options")
+    if 'pet safe' not in query_lower and 'pet' not in query_lower:
+        suggestions.append("Find pet-safe plants")
+    if not any(price_term in query_lower for price_term in ['$', 'budget', 'cheap', 'expensive']):
+        suggestions.append("Show budget-friendly options")
+    return suggestions
+
+
+def legacy_specific_matches(user_message):
+    query_lower = user_message.lower()
+    specific_terms = ['beginner', 'low light', 'pet safe', 'succulent', 'indoor', 'office', 'bedroom']
+    return sum(1 for term in specific_terms if term in query_lower)
+
+
+def run_legacy(message):
+    return (
+        legacy_parse_query(message),
+        legacy_analyze_user_query(message),
+        legacy_fallback_search_terms(message),
+        legacy_fallback_actions(message),
+        legacy_product_suggestions(message),
+        legacy_specific_matches(message),
+    )
+
+
+def make_compiled_runner():
+    agent = PlantRecommendationAgent.__new__(PlantRecommendationAgent)
+    agent.product_tool = FirestoreProductTool.__new__(FirestoreProductTool)
+    products = [{'title': 'x'}, {'title': 'y'}]
+
+    def run_compiled(message):
+        suggestions = agent._generate_suggested_actions(message, products, [], '')
+        return (
+            agent.product_tool._parse_query(message),
+            agent._analyze_user_query(message),
+            agent._fallback_search_terms(message),
+            agent._generate_fallback_actions(message),
+            [s for s in suggestions if s != "Browse plant categories"],
+            round((agent._calculate_confidence(message, [], [], '') - 0.2) / 0.05),
+        )
+    return run_compiled
+
+
+def bench(func, rounds, clear_cache=False):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in MESSAGES:
+            if clear_cache:
+                match_query.cache_clear()
+            func(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(MESSAGES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    run_compiled = make_compiled_runner()
+    legacy_us = bench(run_legacy, args.rounds)
+    compiled_us = bench(run_compiled, args.rounds, clear_cache=True)
+    print(f"messages: {len(MESSAGES)}, rounds: {args.rounds}")
+    print(f"legacy scans:     {legacy_us:8.2f} us/message")
+    print(f"compiled matcher: {compiled_us:8.2f} us/message")
+    print(f"reduction:        {100 * (1 - compiled_us / legacy_us):7.1f} %")
+
+
+if __name__ == '__main__':
+    main()
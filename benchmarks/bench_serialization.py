@@ -0,0 +1,121 @@
+# benchmarks/bench_serialization.py
+"""
+CPU cost of turning an agent output into the /chat response body.
+
+    python -m benchmarks.bench_serialization [--products 8] [--guides 3] [--guide-kb 1,20,60] [--rounds 500]
+
+The output holds --products product results and --guides care guide results built from
+catalog records (each guide's content sections padded to about --guide-kb KB). Compared:
+
+* fastapi: the endpoint validating into ChatResponse and returning the model, which FastAPI
+  validates again for response_model and encodes with jsonable_encoder and json.dumps
+* pydantic-core: the result dicts serialized as they are with pydantic_core.to_json
+* fragments: models.records.chat_response_json, splicing each record's cached JSON fragment
+  (first call per record serializes it, every later call reuses it)
+
+The bodies are checked to be the same JSON as ChatResponse.model_dump_json() first.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+from fastapi.routing import serialize_response
+from pydantic_core import to_json
+
+from main import app
+from benchmarks import synthetic_data
+from models.records import ProductRecord, CareGuideRecord, chat_response_json
+from models.schemas import ChatResponse
+
+PARAGRAPH = ('Check the top two centimetres of soil before watering; if it is still damp, wait a few days. '
+             'Yellowing lower leaves usually mean too much water, crispy brown edges too little humidity. ')
+
+
+def agent_output(product_count: int, guide_count: int, guide_kb: int) -> dict:
+    products = [ProductRecord.from_document(doc_id, data)
+                for doc_id, data in synthetic_data.products(product_count)]
+    guides = []
+    for doc_id, data in synthetic_data.care_guides(guide_count):
+        repeats = max(1, guide_kb * 1024 // (len(PARAGRAPH) * 4))
+        data['content'] = [{'title': f'Section {i + 1}', 'text': PARAGRAPH * repeats, 'imageURL': '', 'imageCaption': ''}
+                           for i in range(4)]
+        guides.append(CareGuideRecord.from_document(doc_id, data))
+    return {
+        'response': 'Here are some plants that should do well for you, and how to look after them.',
+        'product_recommendations': [record.to_result(0.9 - i / 100) for i, record in enumerate(products)],
+        'care_guides': [record.to_result(4.2 - i / 10) for i, record in enumerate(guides)],
+        'suggested_actions': ['Show similar plants', 'Add to cart', 'View care guide'],
+        'confidence_score': 0.85,
+        'query_understood': {'original_query': 'low maintenance plant', 'intent': 'product_recommendation',
+                             'keywords': ['low', 'maintenance', 'plant'], 'entities': {'maintenance_level': 'low'},
+                             'urgency': 'normal'},
+    }
+
+
+async def fastapi_body(output: dict, field) -> bytes:
+    model = ChatResponse(**output)
+    content = await serialize_response(field=field, response_content=model, is_coroutine=True)
+    # JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode('utf-8')
+
+
+def pydantic_core_body(output: dict) -> bytes:
+    return to_json({key: output[key] for key in ChatResponse.model_fields})
+
+
+def time_per_call(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def time_per_await(fn, rounds: int) -> float:
+    async def calls():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await fn()
+        return (time.perf_counter() - start) / rounds
+    return asyncio.run(calls())
+
+
+def run(guide_kb: int, args, field):
+    output = agent_output(args.products, args.guides, guide_kb)
+    expected = json.loads(ChatResponse(**output).model_dump_json())
+    bodies = {'fastapi': asyncio.run(fastapi_body(output, field)), 'pydantic-core': pydantic_core_body(output),
+              'fragments': chat_response_json(output)}
+    same = all(json.loads(body) == expected for body in bodies.values())
+
+    timings = {
+        'fastapi': time_per_await(lambda: fastapi_body(output, field), args.rounds),
+        'pydantic-core': time_per_call(lambda: pydantic_core_body(output), args.rounds),
+        'fragments': time_per_call(lambda: chat_response_json(output), args.rounds),
+    }
+    print(f"\n== {args.products} products, {args.guides} care guides of ~{guide_kb} KB "
+          f"(body {len(bodies['fragments']) / 1024:.1f} KB, same JSON: {same})")
+    for name, seconds in timings.items():
+        print(f"  {name:<14}{seconds * 1e6:10.1f} us/response  {1 / seconds:10,.0f} responses/s per core"
+              f"  ({timings['fastapi'] / seconds:.1f}x)")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(float(part)) for part in value.split(',') if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=8)
+    parser.add_argument('--guides', type=int, default=3)
+    parser.add_argument('--guide-kb', type=_int_list, default=[1, 20, 60])
+    parser.add_argument('--rounds', type=int, default=500)
+    args = parser.parse_args()
+    field = next(route.response_field for route in app.routes if getattr(route, 'path', None) == '/chat')
+    for guide_kb in args.guide_kb:
+        run(guide_kb, args, field)
+
+
+if __name__ == '__main__':
+    main()
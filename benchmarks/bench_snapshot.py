@@ -0,0 +1,147 @@
+# benchmarks/bench_snapshot.py
+"""
+Warm-up from a catalog snapshot versus from the Firestore listeners.
+
+    python -m benchmarks.bench_snapshot [--products 1000,10000,100000] [--guides 500] [--changes 50]
+
+For each catalog size, synthetic products, care guides and categories are put in the
+in-process Firestore stand-in, and the report compares:
+
+* listener warm-up: ProductCatalog, CareGuideIndex and CategoryCatalog filled from the
+  full first snapshot (every document read; the network time is not included)
+* export: writing the snapshot file with tools.catalog_snapshot.export_snapshot, and its size
+* snapshot warm-up: opening the file and loading the three catalogs from it
+* listener sync: product changes reported when the snapshot-loaded catalogs start their
+  listeners after --changes products were updated, one taken off sale and one deleted
+
+Searches on both warm-ups are compared to check that they return the same results.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+from benchmarks import fake_firestore, synthetic_data
+from tools.catalog_snapshot import CatalogSnapshot, export_snapshot
+from tools.product_catalog import ProductCatalog
+from tools.care_guide_index import CareGuideIndex
+from tools.category_catalog import CategoryCatalog
+
+FILTERS = (
+    {'category': 'Succulents & Cacti', 'price_max': 30.0},
+    {'maintenance_level': 'low', 'sunlight': 'indirect'},
+    {'pet_safe': True, 'type': 'Indoor Plant'},
+    {},
+)
+GUIDE_QUERIES = ('yellow leaves overwatering', 'succulent care for beginners', 'low light fern')
+
+
+def listener_warm_up(store: fake_firestore.FakeStore):
+    db = fake_firestore.FakeFirestore(store)
+    products = ProductCatalog()
+    products.start(db)
+    guides = CareGuideIndex()
+    guides.start(db)
+    categories = CategoryCatalog(products)
+    categories.start(db)
+    return products, guides, categories
+
+
+def snapshot_warm_up(path: str):
+    snapshot = CatalogSnapshot(path)
+    products = ProductCatalog()
+    products.load_snapshot(snapshot)
+    guides = CareGuideIndex()
+    guides.load_snapshot(snapshot)
+    categories = CategoryCatalog(products)
+    categories.load(list(snapshot.documents('categories').items()))
+    return snapshot, products, guides, categories
+
+
+def same_results(live, loaded) -> bool:
+    live_products, live_guides, live_categories = live
+    products, guides, categories = loaded
+    for filters in FILTERS:
+        live_matches = [(i, record.to_document(), score) for i, record, score in live_products.top_matches(filters)]
+        if live_matches != [(i, record.to_document(), score) for i, record, score in products.top_matches(filters)]:
+            return False
+    for query in GUIDE_QUERIES:
+        if [(i, round(s, 9)) for i, _, s in live_guides.search(query)] != [(i, round(s, 9)) for i, _, s in guides.search(query)]:
+            return False
+    return live_categories.categories() == categories.categories()
+
+
+def run(product_count: int, args, directory: str):
+    products = list(synthetic_data.products(product_count))
+    store = fake_firestore.FakeStore()
+    store.load('products', products)
+    store.load('care_guides', synthetic_data.care_guides(args.guides))
+    store.load('categories', synthetic_data.categories(products))
+
+    start = time.perf_counter()
+    live = listener_warm_up(store)
+    listener_seconds = time.perf_counter() - start
+
+    path = os.path.join(directory, f'catalog-{product_count}.snap')
+    start = time.perf_counter()
+    export_snapshot(fake_firestore.FakeFirestore(store), path)
+    export_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    snapshot, *loaded = snapshot_warm_up(path)
+    snapshot_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded[0].top_matches(FILTERS[0])
+    first_search_ms = (time.perf_counter() - start) * 1000
+    identical = same_results(live, loaded)
+
+    # Later changes: reprice some products, take one off sale and delete another
+    for doc_id, data in products[:args.changes]:
+        updated = dict(data, price=data['price'] + 1)
+        if doc_id == products[0][0]:
+            updated['stock'] = dict(data['stock'], availability=False)
+        store.set('products', doc_id, updated)
+    deleted_id = next(doc_id for doc_id, _ in reversed(products) if loaded[0].get(doc_id) is not None)
+    store.delete('products', deleted_id)
+    delivered: List[str] = []
+    loaded[0].add_listener(delivered.extend)
+    db = fake_firestore.FakeFirestore(store)
+    start = time.perf_counter()
+    for catalog in loaded:
+        catalog.start(db)
+    sync_seconds = time.perf_counter() - start
+    synced = loaded[0].get(products[1][0]) if args.changes > 1 else None
+
+    documents = len(products) + args.guides + len(list(store.collections['categories']))
+    print(f"\n== {product_count:,} products, {args.guides:,} care guides ({documents:,} documents)")
+    print(f"  listener warm-up      {listener_seconds * 1000:10.1f} ms   {documents:,} documents read")
+    print(f"  export                {export_seconds * 1000:10.1f} ms   {os.path.getsize(path) / 1e6:.1f} MB")
+    print(f"  snapshot warm-up      {snapshot_seconds * 1000:10.1f} ms   ({listener_seconds / snapshot_seconds:.0f}x faster), "
+          f"first search {first_search_ms:.2f} ms, same results: {identical}")
+    print(f"  listener sync         {sync_seconds * 1000:10.1f} ms   {len(delivered):,} product changes reported "
+          f"(price updated: {synced is not None and synced.price == products[1][1]['price'] + 1}, "
+          f"off sale removed: {loaded[0].get(products[0][0]) is None}, deleted removed: {loaded[0].get(deleted_id) is None})")
+    for catalog in (*live, *loaded):
+        if hasattr(catalog, 'stop'):
+            catalog.stop()
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(float(part)) for part in value.split(',') if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=_int_list, default=[1000, 10000, 100000])
+    parser.add_argument('--guides', type=int, default=500)
+    parser.add_argument('--changes', type=int, default=50, help='products changed after the snapshot')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for product_count in args.products:
+            run(product_count, args, directory)
+
+
+if __name__ == '__main__':
+    main()
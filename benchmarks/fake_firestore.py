@@ -0,0 +1,322 @@
+# benchmarks/fake_firestore.py
+"""
+In-process stand-in for the parts of the Firestore client API this repository uses, so
+the app can be benchmarked without a network or credentials.
+
+Supported: collection/document references, where (==, !=, <, <=, >, >=, in,
+array_contains), limit, select projections, stream, count() aggregations, get_all,
+on_snapshot listeners (initial snapshot plus ADDED/MODIFIED/REMOVED changes from set()
+and delete()), and the same surface on an async client. Every RPC can be given a fixed
+simulated round-trip latency.
+
+Documents are stored as plain dicts and handed out without copying: treat what to_dict()
+returns as read-only. Queries scan their collection (there are no indexes), which is
+fine for the fallback paths that still query Firestore.
+"""
+
+import asyncio
+import threading
+import time
+import types
+from typing import Dict, List, Any, Optional, Callable, Iterable
+
+from config.firebase_config import FirebaseConfig
+
+_MISSING = object()
+
+_OPERATORS = {
+    '==': lambda value, wanted: value == wanted,
+    '!=': lambda value, wanted: value is not _MISSING and value != wanted,
+    '<': lambda value, wanted: value is not _MISSING and value < wanted,
+    '<=': lambda value, wanted: value is not _MISSING and value <= wanted,
+    '>': lambda value, wanted: value is not _MISSING and value > wanted,
+    '>=': lambda value, wanted: value is not _MISSING and value >= wanted,
+    'in': lambda value, wanted: value in wanted,
+    'array_contains': lambda value, wanted: isinstance(value, list) and wanted in value,
+}
+
+
+def _get_path(data: Dict[str, Any], path: str) -> Any:
+    value: Any = data
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _project(data: Dict[str, Any], field_paths: Optional[List[str]]) -> Dict[str, Any]:
+    """data restricted to field_paths (all of it when None), like a select() read"""
+    if field_paths is None:
+        return data
+    projected: Dict[str, Any] = {}
+    for path in field_paths:
+        value = _get_path(data, path)
+        if value is _MISSING:
+            continue
+        target = projected
+        keys = path.split('.')
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = value
+    return projected
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]], field_paths: Optional[List[str]] = None):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = _project(data, field_paths) if data is not None else None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return self._data
+
+    def get(self, path: str) -> Any:
+        value = _get_path(self._data or {}, path)
+        return None if value is _MISSING else value
+
+
+class FakeStore:
+    """The shared data behind the sync and async clients: collection -> {doc id -> data}"""
+
+    def __init__(self, rpc_latency_ms: float = 0.0):
+        self.rpc_latency = rpc_latency_ms / 1000.0
+        self.collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self._watches: List['_Watch'] = []
+        self.rpcs = 0
+
+    def load(self, collection: str, docs: Iterable[tuple]):
+        """Bulk-insert (id, data) pairs before any listener is attached"""
+        with self._lock:
+            self.collections.setdefault(collection, {}).update(docs)
+
+    def rpc(self):
+        with self._lock:
+            self.rpcs += 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+
+    async def arpc(self):
+        with self._lock:
+            self.rpcs += 1
+        if self.rpc_latency:
+            await asyncio.sleep(self.rpc_latency)
+
+    def set(self, collection: str, doc_id: str, data: Dict[str, Any]):
+        with self._lock:
+            docs = self.collections.setdefault(collection, {})
+            before = docs.get(doc_id)
+            docs[doc_id] = data
+            watches = [watch for watch in self._watches if watch.query.collection == collection]
+        for watch in watches:
+            watch.changed(doc_id, before, data)
+
+    def delete(self, collection: str, doc_id: str):
+        with self._lock:
+            before = self.collections.get(collection, {}).pop(doc_id, None)
+            watches = [watch for watch in self._watches if watch.query.collection == collection]
+        if before is not None:
+            for watch in watches:
+                watch.changed(doc_id, before, None)
+
+
+class _Change:
+    def __init__(self, kind: str, document: FakeDocumentSnapshot):
+        self.type = types.SimpleNamespace(name=kind)
+        self.document = document
+
+
+class _Watch:
+    """One on_snapshot listener; callbacks run on the thread that made the change"""
+
+    def __init__(self, store: FakeStore, query: 'FakeQuery', callback: Callable):
+        self.store = store
+        self.query = query
+        self.callback = callback
+
+    def changed(self, doc_id: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        matched = before is not None and self.query.matches(before)
+        matches = after is not None and self.query.matches(after)
+        if matches:
+            change = _Change('MODIFIED' if matched else 'ADDED', FakeDocumentSnapshot(doc_id, after))
+        elif matched:
+            change = _Change('REMOVED', FakeDocumentSnapshot(doc_id, before))
+        else:
+            return
+        self.callback(None, [change], None)
+
+    def unsubscribe(self):
+        with self.store._lock:
+            if self in self.store._watches:
+                self.store._watches.remove(self)
+
+
+class FakeQuery:
+    def __init__(self, store: FakeStore, collection: str, filters: tuple = (), limit: Optional[int] = None,
+                 field_paths: Optional[List[str]] = None):
+        self.store = store
+        self.collection = collection
+        self.filters = filters
+        self._limit = limit
+        self.field_paths = field_paths
+
+    def _copy(self, **changes) -> 'FakeQuery':
+        values = {'filters': self.filters, 'limit': self._limit, 'field_paths': self.field_paths}
+        values.update(changes)
+        return type(self)(self.store, self.collection, **values)
+
+    def where(self, field_path: str, op_string: str, value: Any) -> 'FakeQuery':
+        return self._copy(filters=self.filters + ((field_path, _OPERATORS[op_string], value),))
+
+    def limit(self, count: int) -> 'FakeQuery':
+        return self._copy(limit=count)
+
+    def select(self, field_paths: List[str]) -> 'FakeQuery':
+        return self._copy(field_paths=list(field_paths))
+
+    def matches(self, data: Dict[str, Any]) -> bool:
+        return all(op(_get_path(data, path), wanted) for path, op, wanted in self.filters)
+
+    def _results(self) -> List[FakeDocumentSnapshot]:
+        with self.store._lock:
+            docs = list(self.store.collections.get(self.collection, {}).items())
+        results = []
+        for doc_id, data in docs:
+            if self.matches(data):
+                results.append(FakeDocumentSnapshot(doc_id, data, self.field_paths))
+                if self._limit is not None and len(results) >= self._limit:
+                    break
+        return results
+
+    def stream(self):
+        self.store.rpc()
+        return iter(self._results())
+
+    def get(self) -> List[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+    def count(self, alias: str = None) -> '_CountQuery':
+        return _CountQuery(self)
+
+    def on_snapshot(self, callback: Callable) -> _Watch:
+        """Deliver the current result set as ADDED changes, then every later change"""
+        watch = _Watch(self.store, self, callback)
+        with self.store._lock:
+            initial = [_Change('ADDED', doc) for doc in self._results()]
+            self.store._watches.append(watch)
+        callback(None, initial, None)
+        return watch
+
+
+class _CountQuery:
+    def __init__(self, query: FakeQuery):
+        self.query = query
+
+    def _result(self):
+        count = sum(1 for data in self.query.store.collections.get(self.query.collection, {}).values() if self.query.matches(data))
+        return [[types.SimpleNamespace(alias='count', value=count)]]
+
+    def get(self):
+        self.query.store.rpc()
+        return self._result()
+
+
+class FakeDocumentReference:
+    def __init__(self, store: FakeStore, collection: str, doc_id: str):
+        self.store = store
+        self.collection = collection
+        self.id = doc_id
+
+    def get(self, field_paths: List[str] = None) -> FakeDocumentSnapshot:
+        self.store.rpc()
+        return FakeDocumentSnapshot(self.id, self.store.collections.get(self.collection, {}).get(self.id), field_paths)
+
+    def set(self, data: Dict[str, Any]):
+        self.store.rpc()
+        self.store.set(self.collection, self.id, data)
+
+    def delete(self):
+        self.store.rpc()
+        self.store.delete(self.collection, self.id)
+
+
+class FakeCollectionReference(FakeQuery):
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self.store, self.collection, doc_id)
+
+
+class FakeFirestore:
+    """Sync client (the FirebaseConfig.get_db() surface)"""
+
+    def __init__(self, store: FakeStore):
+        self.store = store
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self.store, name)
+
+    def get_all(self, references: List[FakeDocumentReference], field_paths: List[str] = None):
+        self.store.rpc()
+        for ref in references:
+            yield FakeDocumentSnapshot(ref.id, self.store.collections.get(ref.collection, {}).get(ref.id), field_paths)
+
+
+# ---- async client (the FirebaseConfig.get_async_db() surface) ----
+
+class FakeAsyncQuery(FakeQuery):
+    async def stream(self):
+        await self.store.arpc()
+        for doc in self._results():
+            yield doc
+
+    async def get(self) -> List[FakeDocumentSnapshot]:
+        return [doc async for doc in self.stream()]
+
+    def count(self, alias: str = None) -> '_AsyncCountQuery':
+        return _AsyncCountQuery(self)
+
+
+class _AsyncCountQuery(_CountQuery):
+    async def get(self):
+        await self.query.store.arpc()
+        return self._result()
+
+
+class FakeAsyncDocumentReference(FakeDocumentReference):
+    async def get(self, field_paths: List[str] = None) -> FakeDocumentSnapshot:
+        await self.store.arpc()
+        return FakeDocumentSnapshot(self.id, self.store.collections.get(self.collection, {}).get(self.id), field_paths)
+
+    async def set(self, data: Dict[str, Any]):
+        await self.store.arpc()
+        self.store.set(self.collection, self.id, data)
+
+    async def delete(self):
+        await self.store.arpc()
+        self.store.delete(self.collection, self.id)
+
+
+class FakeAsyncCollectionReference(FakeAsyncQuery):
+    def document(self, doc_id: str) -> FakeAsyncDocumentReference:
+        return FakeAsyncDocumentReference(self.store, self.collection, doc_id)
+
+
+class FakeAsyncFirestore:
+    def __init__(self, store: FakeStore):
+        self.store = store
+
+    def collection(self, name: str) -> FakeAsyncCollectionReference:
+        return FakeAsyncCollectionReference(self.store, name)
+
+    async def get_all(self, references: List[FakeDocumentReference], field_paths: List[str] = None):
+        await self.store.arpc()
+        for ref in references:
+            yield FakeDocumentSnapshot(ref.id, self.store.collections.get(ref.collection, {}).get(ref.id), field_paths)
+
+
+def install(store: FakeStore):
+    """Point FirebaseConfig at store, so get_db()/get_async_db() and initialize_firebase() use it"""
+    FirebaseConfig._db = FakeFirestore(store)
+    FirebaseConfig._async_db = FakeAsyncFirestore(store)
+    FirebaseConfig.initialize_firebase = classmethod(lambda cls: cls._db)
+    return FirebaseConfig._db
@@ -0,0 +1,130 @@
+# benchmarks/fake_llm.py
+"""
+Deterministic chat model that replays scripted ReAct transcripts in place of Gemini.
+
+The agent prompt ends with "Customer message: <message>" followed by the scratchpad, so
+the model looks up the transcript for that message and returns its next step: the
+number of "Observation:" lines after the message is the number of steps already taken.
+Messages without a transcript get one derived from their wording (care question ->
+get_care_guides, category question -> get_categories, otherwise search_products), then a
+Final Answer. A fixed latency per call stands in for the model's response time, and
+_stream/_astream emit the reply word by word so /chat/stream sees token events.
+"""
+
+import asyncio
+import re
+import time
+from typing import Dict, List, Any, Optional, Iterator, AsyncIterator
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FINAL_ANSWER = (
+    "Thought: I now have enough information to provide helpful recommendations\n"
+    "Final Answer: Based on what is in stock right now, the plants above are a great fit. "
+    "Each one lists its price, light needs and care level; the first two are the easiest "
+    "to keep happy. Would you like pet safe options or care tips for any of them?"
+)
+
+
+def _action(tool: str, tool_input: str) -> str:
+    return f"Thought: I should use {tool} for this\nAction: {tool}\nAction Input: {tool_input}"
+
+
+# Scripted transcripts: customer message -> the model's replies, one per agent step
+TRANSCRIPTS: Dict[str, List[str]] = {
+    "Recommend a low maintenance plant for my office under $30": [
+        _action("search_products", "low maintenance plants under $30"),
+        FINAL_ANSWER,
+    ],
+    "My monstera has yellow leaves, what am I doing wrong?": [
+        _action("get_care_guides", "monstera yellow leaves"),
+        "Thought: I now know the likely cause\nFinal Answer: Yellow monstera leaves usually mean "
+        "overwatering. Let the top few centimetres of soil dry out before watering again.",
+    ],
+    "Which plants are safe for cats and also purify the air?": [
+        _action("multi_search", "pet safe plants; air purifying plants"),
+        FINAL_ANSWER,
+    ],
+    "I want a big statement plant for my living room and to know how to look after it": [
+        _action("search_products", "large statement indoor plants"),
+        _action("get_care_guides", "Fiddle Leaf Fig"),
+        FINAL_ANSWER,
+    ],
+    "Something green for a bathroom shelf": [
+        _action("search_products", "something green for a bathroom shelf"),
+        FINAL_ANSWER,
+    ],
+    "What kinds of plants do you sell?": [
+        _action("get_categories", ""),
+        "Thought: I can list the categories\nFinal Answer: We carry succulents, flowering, tropical "
+        "and air purifying plants, herbs, large plants, pots and plant care supplies.",
+    ],
+}
+
+_CARE_WORDS = ('care', 'yellow', 'dying', 'water', 'problem', 'help')
+_CATEGORY_WORDS = ('categories', 'category', 'kinds', 'types of')
+
+
+def default_transcript(message: str) -> List[str]:
+    lowered = message.lower()
+    if any(word in lowered for word in _CARE_WORDS):
+        return [_action("get_care_guides", message), FINAL_ANSWER]
+    if any(word in lowered for word in _CATEGORY_WORDS):
+        return [_action("get_categories", ""), FINAL_ANSWER]
+    return [_action("search_products", message), FINAL_ANSWER]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Replays TRANSCRIPTS (or default_transcript) one ReAct step per call"""
+
+    transcripts: Dict[str, List[str]] = TRANSCRIPTS
+    latency_ms: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-react"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        self.calls += 1
+        prompt = messages[-1].content if messages else ''
+        match = re.search(r'Customer message: (.*)\n', prompt)
+        message = match.group(1).strip() if match else ''
+        scratchpad = prompt[match.end():] if match else ''
+        steps = self.transcripts.get(message) or default_transcript(message)
+        return steps[min(scratchpad.count('Observation:'), len(steps) - 1)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        for piece in re.findall(r'\S+\s*', self._reply(messages)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        for piece in re.findall(r'\S+\s*', self._reply(messages)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
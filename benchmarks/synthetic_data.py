@@ -0,0 +1,125 @@
+# benchmarks/synthetic_data.py
+"""
+Deterministic synthetic catalogs shaped like the real collections: products with the
+fields FirestoreProductTool reads, care guides with sections, tips and problems, and the
+categories collection. Values come from small vocabularies (so repeated strings are
+shared objects and a 1M-product catalog stays within a few GB) that include every
+keyword the query parser and the scripted chat transcripts look for.
+"""
+
+import random
+from typing import Dict, List, Any, Iterator, Tuple
+
+CATEGORIES = {
+    'Succulents & Cacti': ('Aloe', 'Echeveria', 'Jade Plant', 'Haworthia', 'Golden Barrel Cactus', 'String of Pearls'),
+    'Flowering Plants': ('Peace Lily', 'Orchid', 'Anthurium', 'African Violet', 'Bromeliad', 'Kalanchoe'),
+    'Tropical Plants': ('Monstera', 'Bird of Paradise', 'Calathea', 'Philodendron', 'Pothos', 'Alocasia'),
+    'Air Purifying': ('Snake Plant', 'Spider Plant', 'Rubber Plant', 'ZZ Plant', 'Boston Fern', 'Dracaena'),
+    'Herbs & Edibles': ('Basil', 'Mint', 'Rosemary', 'Lemon Balm', 'Chili Pepper', 'Thyme'),
+    'Trees & Large Plants': ('Fiddle Leaf Fig', 'Olive Tree', 'Parlor Palm', 'Umbrella Tree', 'Ficus Audrey', 'Kentia Palm'),
+    'Pots & Planters': ('Ceramic Pot', 'Terracotta Pot', 'Hanging Planter', 'Self-Watering Pot', 'Plant Stand', 'Window Box'),
+    'Tools & Supplies': ('Pruning Shears', 'Watering Can', 'Plant Food', 'Potting Mix', 'Mister', 'Moisture Meter'),
+}
+SUB_CATEGORIES = ('Hanging Plants', 'Desktop Plants', 'Floor Plants')
+TYPES = ('Indoor Plant', 'Outdoor Plant', 'Ceramic Pot', 'Terracotta Pot', 'Fertilizer', 'Garden Tool')
+VARIANTS = ('', 'Variegated ', 'Mini ', 'Large ', 'Trailing ', 'Compact ', 'Purple ', 'Dwarf ')
+MAINTENANCE = ('Low', 'Low to moderate', 'Moderate', 'High')
+SUNLIGHT = ('Bright indirect light', 'Low light, indirect', 'Direct sun', 'Partial shade', 'Full sun, direct')
+WATERING = ('Weekly', 'Every 2-3 weeks', 'When the top inch is dry', 'Keep soil moist')
+GROWTH = ('Slow', 'Moderate', 'Fast')
+TOXICITY = ('Non-toxic to pets', 'Toxic to cats and dogs', 'Mildly toxic if ingested', 'Pet safe', 'Poisonous to pets')
+FEATURES = ('Air purifying', 'Low maintenance', 'Air purifying, low maintenance', 'Fragrant flowers', 'Trailing vines', '')
+USE_CASES = ('Office desk', 'Bathroom shelf', 'Living room corner', 'Bedroom', 'Balcony', 'Kitchen windowsill')
+DESCRIPTIONS = (
+    'A forgiving plant that tolerates missed waterings and low light.',
+    'Glossy leaves that brighten any room; thrives in humid spaces like a bathroom.',
+    'A striking statement piece with large sculptural leaves.',
+    'Compact and tidy, ideal for small desks and shelves.',
+    'Purple-tinged foliage with a trailing habit for hanging baskets.',
+    'Fast growing and easy to propagate; great for beginners.',
+)
+
+GUIDE_TOPICS = ('Care', 'Watering Guide', 'Light Requirements', 'Repotting', 'Pest Control', 'Winter Care')
+GUIDE_PROBLEMS = (
+    ('Yellow leaves', 'Usually overwatering: let the soil dry out between waterings.'),
+    ('Brown leaf tips', 'Low humidity or fluoride in tap water; mist or use filtered water.'),
+    ('Drooping', 'Thirsty or root bound; water thoroughly and check the roots.'),
+    ('Leggy growth', 'Not enough light; move closer to a bright window.'),
+    ('Spider mites', 'Wipe the leaves and treat with insecticidal soap.'),
+)
+DIFFICULTIES = ('Easy', 'Moderate', 'Advanced')
+
+
+def products(count: int, seed: int = 7) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """count (id, data) product documents; roughly 85% are in stock"""
+    rng = random.Random(seed)
+    categories = list(CATEGORIES)
+    for i in range(count):
+        category = rng.choice(categories)
+        name = rng.choice(VARIANTS) + rng.choice(CATEGORIES[category])
+        available = rng.random() < 0.85
+        yield f'prod-{i:07d}', {
+            'title': f'{name} #{i}',
+            'imageSrc': f'https://img.example/{i}.jpg',
+            'price': round(rng.uniform(4.0, 150.0), 2),
+            'description': rng.choice(DESCRIPTIONS),
+            'link': f'/products/prod-{i:07d}',
+            'category': category,
+            'subCategory': rng.choice(SUB_CATEGORIES),
+            'type': rng.choice(TYPES),
+            'details': {
+                'scientificName': '',
+                'sunlight': rng.choice(SUNLIGHT),
+                'watering': rng.choice(WATERING),
+                'growthRate': rng.choice(GROWTH),
+                'maintenance': rng.choice(MAINTENANCE),
+                'bloomSeason': '',
+                'specialFeatures': rng.choice(FEATURES),
+                'toxicity': rng.choice(TOXICITY),
+                'material': '',
+                'drainageHoles': False,
+                'size': '',
+                'color': '',
+                'useCase': rng.choice(USE_CASES),
+            },
+            'stock': {'availability': available, 'quantity': rng.randint(1, 40) if available else 0},
+        }
+
+
+def care_guides(count: int, seed: int = 11) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    rng = random.Random(seed)
+    plants = [(category, plant) for category, names in CATEGORIES.items() for plant in names]
+    for i in range(count):
+        category, plant = plants[i % len(plants)]
+        topic = GUIDE_TOPICS[(i // len(plants)) % len(GUIDE_TOPICS)]
+        problems = rng.sample(GUIDE_PROBLEMS, 2)
+        yield f'guide-{i:06d}', {
+            'title': f'{plant} {topic}',
+            'description': f'Everything you need to know about {plant.lower()} {topic.lower()}.',
+            'category': category,
+            'difficulty': rng.choice(DIFFICULTIES),
+            'imageURL': f'https://img.example/guides/{i}.jpg',
+            'publishDate': '2024-05-01',
+            'author': 'BotaniCart Team',
+            'quickTips': [f'Give {plant.lower()} {rng.choice(SUNLIGHT).lower()}', f'Water: {rng.choice(WATERING).lower()}'],
+            'wateringTips': rng.choice(WATERING),
+            'lightTips': rng.choice(SUNLIGHT),
+            'temperatureTips': 'Keep between 18 and 27 C, away from drafts.',
+            'fertilizerTips': 'Feed monthly in spring and summer.',
+            'content': [
+                {'title': 'Light', 'text': f'{plant} grows best in {rng.choice(SUNLIGHT).lower()}.', 'imageURL': '', 'imageCaption': ''},
+                {'title': 'Watering', 'text': f'{rng.choice(WATERING)}; never let it sit in water.', 'imageURL': '', 'imageCaption': ''},
+            ],
+            'expertTip': 'Rotate the pot a quarter turn every week for even growth.',
+            'expertName': 'Dr. Fern Green',
+            'expertTitle': 'Horticulturist',
+            'commonProblems': [{'problem': problem, 'solution': solution} for problem, solution in problems],
+        }
+
+
+def categories(product_docs: List[Tuple[str, Dict[str, Any]]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    counts: Dict[str, int] = {}
+    for _, data in product_docs or []:
+        counts[data['category']] = counts.get(data['category'], 0) + 1
+    return [(f'cat-{i:02d}', {'name': name, 'description': f'Browse our {name.lower()}.', 'product_count': counts.get(name, 0)})
+            for i, name in enumerate(CATEGORIES)]
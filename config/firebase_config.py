@@ -1,11 +1,12 @@
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 import os
 import json
 from typing import Optional
 
 class FirebaseConfig:
     _db: Optional[firestore.Client] = None
+    _async_db: Optional[firestore_async.firestore.AsyncClient] = None
     
     @classmethod
     def initialize_firebase(cls):
@@ -29,7 +30,25 @@ class FirebaseConfig:
         return cls._db
     
     @classmethod
-    def get_db(cls) -> firestore.Client:
+    def offline(cls) -> bool:
+        """CATALOG_SNAPSHOT_OFFLINE: serve only from the catalog snapshot, never connect to Firestore"""
+        return os.getenv("CATALOG_SNAPSHOT_OFFLINE", "false").lower() in ("1", "true", "yes")
+
+    @classmethod
+    def get_db(cls) -> Optional[firestore.Client]:
+        if cls.offline():
+            return None
         if cls._db is None:
             return cls.initialize_firebase()
-        return cls._db
\ No newline at end of file
+        return cls._db
+
+    @classmethod
+    def get_async_db(cls) -> Optional[firestore_async.firestore.AsyncClient]:
+        """Async Firestore client for the non-blocking /chat path (created on first use)"""
+        if cls.offline():
+            return None
+        if cls._async_db is None:
+            if not firebase_admin._apps:
+                cls.initialize_firebase()
+            cls._async_db = firestore_async.client()
+        return cls._async_db
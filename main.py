@@ -2,49 +2,59 @@
 
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse, PlainTextResponse
 # from pydantic import BaseModel # Not directly used in the snippet for debugging .env, but keep if used elsewhere
 import os
 from dotenv import load_dotenv
 import sys # For printing to stderr for visibility if stdout is captured
-
-# --- BEGIN DEBUGGING .env LOADING ---
-print("--- Debugging .env loading ---", file=sys.stderr)
+import json
+import time
+import asyncio
 
 # 1. Construct the path to the .env file
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
-print(f"Attempting to load .env file from: {dotenv_path}", file=sys.stderr)
 
-# 2. Check if the .env file physically exists at that path
-if os.path.exists(dotenv_path):
-    print(f".env file FOUND at: {dotenv_path}", file=sys.stderr)
-    
-    # 3. Try to load it and check the result
-    #    verbose=True might give more output from python-dotenv
-    #    override=True ensures variables from .env take precedence
-    load_success = load_dotenv(dotenv_path=dotenv_path, verbose=True, override=True)
-    if load_success:
-        print(".env file was loaded successfully by load_dotenv.", file=sys.stderr)
+# Set DEBUG_DOTENV=true to see where .env is looked for and whether it loaded
+if os.getenv("DEBUG_DOTENV", "").lower() in ("1", "true", "yes"):
+    # --- BEGIN DEBUGGING .env LOADING ---
+    print("--- Debugging .env loading ---", file=sys.stderr)
+    print(f"Attempting to load .env file from: {dotenv_path}", file=sys.stderr)
+
+    # 2. Check if the .env file physically exists at that path
+    if os.path.exists(dotenv_path):
+        print(f".env file FOUND at: {dotenv_path}", file=sys.stderr)
+        
+        # 3. Try to load it and check the result
+        #    verbose=True might give more output from python-dotenv
+        #    override=True ensures variables from .env take precedence
+        load_success = load_dotenv(dotenv_path=dotenv_path, verbose=True, override=True)
+        if load_success:
+            print(".env file was loaded successfully by load_dotenv.", file=sys.stderr)
+        else:
+            print(".env file was NOT loaded by load_dotenv (load_dotenv returned False).", file=sys.stderr)
+            print("This might happen if the file is empty or unreadable, even if it exists.", file=sys.stderr)
     else:
-        print(".env file was NOT loaded by load_dotenv (load_dotenv returned False).", file=sys.stderr)
-        print("This might happen if the file is empty or unreadable, even if it exists.", file=sys.stderr)
-else:
-    print(f".env file NOT FOUND at: {dotenv_path}", file=sys.stderr)
+        print(f".env file NOT FOUND at: {dotenv_path}", file=sys.stderr)
 
-# 4. Check for GEMINI_API_KEY immediately after attempting to load
-gemini_key_after_load = os.getenv("GEMINI_API_KEY")
-if gemini_key_after_load:
-    print(f"GEMINI_API_KEY found after load_dotenv: '{gemini_key_after_load[:5]}...'", file=sys.stderr) # Print first 5 chars for confirmation
-else:
-    print("GEMINI_API_KEY is STILL NOT FOUND in environment after load_dotenv.", file=sys.stderr)
+    # 4. Check for GEMINI_API_KEY immediately after attempting to load
+    gemini_key_after_load = os.getenv("GEMINI_API_KEY")
+    if gemini_key_after_load:
+        print(f"GEMINI_API_KEY found after load_dotenv: '{gemini_key_after_load[:5]}...'", file=sys.stderr) # Print first 5 chars for confirmation
+    else:
+        print("GEMINI_API_KEY is STILL NOT FOUND in environment after load_dotenv.", file=sys.stderr)
 
-print("--- End Debugging .env loading ---", file=sys.stderr)
-# --- END DEBUGGING .env LOADING ---
+    print("--- End Debugging .env loading ---", file=sys.stderr)
+    # --- END DEBUGGING .env LOADING ---
+elif os.path.exists(dotenv_path):
+    load_dotenv(dotenv_path=dotenv_path, override=True)
 
 
-# Your existing imports (ensure they are below the .env loading and debugging)
-from agent.plant_agent import PlantRecommendationAgent
+# Only light imports here: the agent stack (LangChain, Gemini, firebase_admin) is imported
+# when the agent is first needed, so a cold start does not pay for it before serving
 from models.schemas import ChatRequest, ChatResponse
-from config.firebase_config import FirebaseConfig # Ensure Firebase is initialized
+from models.records import chat_response_json, results_json
+from observability.metrics import REGISTRY, REQUEST_SECONDS, REQUEST_ERRORS
+from observability.tracing import TRACES, request_trace, span
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -71,30 +81,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-plant_agent_instance: PlantRecommendationAgent = None
+plant_agent_instance = None  # PlantRecommendationAgent, built by get_agent()
+_agent_lock: asyncio.Lock = None
 
-@app.on_event("startup")
-async def startup_event():
-    global plant_agent_instance
+def _build_agent():
+    """Initialize Firebase and construct the agent (blocking: get_agent runs it in a worker thread)"""
+    from agent.plant_agent import PlantRecommendationAgent
+    from config.firebase_config import FirebaseConfig
     
-    print("Initializing Firebase...")
-    try:
-        FirebaseConfig.initialize_firebase() # This will also use os.getenv for Firebase keys
-        print("Firebase initialized successfully.")
-    except Exception as e:
-        print(f"Critical Error: Failed to initialize Firebase: {e}", file=sys.stderr)
+    if FirebaseConfig.offline():
+        print("Offline mode: serving the catalog snapshot without Firestore.")
+    else:
+        print("Initializing Firebase...")
+        try:
+            FirebaseConfig.initialize_firebase() # This will also use os.getenv for Firebase keys
+            print("Firebase initialized successfully.")
+        except Exception as e:
+            print(f"Critical Error: Failed to initialize Firebase: {e}", file=sys.stderr)
 
-    # This is where your error originates
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     if not gemini_api_key:
-        print("Critical Error: GEMINI_API_KEY not found in environment variables AT STARTUP.", file=sys.stderr)
-        raise RuntimeError("GEMINI_API_KEY is not set. The application cannot start.")
-    else:
-        print(f"GEMINI_API_KEY successfully retrieved at startup: '{gemini_api_key[:5]}...'", file=sys.stderr)
+        print("Critical Error: GEMINI_API_KEY not found in environment variables.", file=sys.stderr)
+        raise RuntimeError("GEMINI_API_KEY is not set. The agent cannot be created.")
     
     print("Initializing Plant Recommendation Agent...")
-    plant_agent_instance = PlantRecommendationAgent(gemini_api_key=gemini_api_key)
+    max_concurrency = int(os.getenv("AGENT_MAX_CONCURRENCY", "4"))
+    agent = PlantRecommendationAgent(gemini_api_key=gemini_api_key, max_concurrency=max_concurrency)
     print("Plant Recommendation Agent initialized.")
+    return agent
+
+async def get_agent():
+    """
+    The shared agent, created on first use. The imports and the build (Firebase, catalogs,
+    indexes, snapshot loading) run in a worker thread so the event loop keeps serving;
+    concurrent first requests wait for the same build.
+    """
+    global plant_agent_instance, _agent_lock
+    if plant_agent_instance is not None:
+        return plant_agent_instance
+    if _agent_lock is None:
+        _agent_lock = asyncio.Lock()
+    async with _agent_lock:
+        if plant_agent_instance is None:
+            plant_agent_instance = await asyncio.get_running_loop().run_in_executor(None, _build_agent)
+    return plant_agent_instance
+
+async def _require_agent():
+    try:
+        return await get_agent()
+    except Exception as e:
+        print(f"Agent could not be initialized: {e}", file=sys.stderr)
+        raise HTTPException(status_code=503, detail="Agent not initialized. Please try again later.")
+
+async def _prewarm():
+    try:
+        await get_agent()
+    except Exception as e:
+        print(f"Pre-warm failed: {e}", file=sys.stderr)
+
+@app.on_event("startup")
+async def startup_event():
+    # PREWARM_AGENT=true builds the agent in the background right after startup instead of
+    # on the first request (a scheduled GET /warmup does the same on serverless hosts)
+    if os.getenv("PREWARM_AGENT", "false").lower() in ("1", "true", "yes"):
+        asyncio.create_task(_prewarm())
+
+@app.get("/warmup")
+async def warmup():
+    """Build the agent now if it is not built yet, and report how long that took."""
+    start = time.perf_counter()
+    already_warm = plant_agent_instance is not None
+    await _require_agent()
+    return {"status": "warm", "already_warm": already_warm, "seconds": round(time.perf_counter() - start, 3)}
     
 @app.post("/chat", response_model=ChatResponse)
 async def chat_with_plant_agent(request: ChatRequest = Body(...)):
@@ -103,37 +161,97 @@ async def chat_with_plant_agent(request: ChatRequest = Body(...)):
     Receives a user message and returns the agent's response,
     including recommendations, care guides, and other relevant information.
     """
-    if not plant_agent_instance:
-        raise HTTPException(status_code=503, detail="Agent not initialized. Please try again later.")
-        
     if not request.message or not request.message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty.")
 
-    try:
-        print(f"Received chat request: UserID='{request.user_id}', SessionID='{request.session_id}', Message='{request.message}'")
-        
-        # Get recommendation from the agent
-        agent_output = plant_agent_instance.get_recommendation(
-            user_message=request.message,
-            user_id=request.user_id 
-            # session_id could be used by the agent for conversation history if implemented
-        )
-        
-        # Ensure the output conforms to the ChatResponse Pydantic model
-        # The agent's get_recommendation method is designed to return a dict matching this structure.
-        return ChatResponse(**agent_output)
+    plant_agent = await _require_agent()
+    start = time.perf_counter()
+    with request_trace("POST /chat", session_id=request.session_id):
+        try:
+            print(f"Received chat request: UserID='{request.user_id}', SessionID='{request.session_id}', Message='{request.message}'")
+            
+            # Get recommendation from the agent (async path: other requests keep being served meanwhile)
+            agent_output = await plant_agent.aget_recommendation(
+                user_message=request.message,
+                user_id=request.user_id,
+                session_id=request.session_id,
+                deadline_ms=request.deadline_ms
+            )
+            
+            # Ensure the output conforms to the ChatResponse Pydantic model
+            # The agent's get_recommendation method is designed to return a dict matching this structure.
+            # Products and guides built from catalog records are not validated a second time: the body
+            # is spliced from their cached JSON fragments here, so FastAPI does not dump and re-validate
+            # it for response_model.
+            with span("chat_response"):
+                return Response(content=chat_response_json(agent_output), media_type="application/json")
 
-    except Exception as e:
-        print(f"Error during chat processing: {e}")
-        # Return a generic error response conforming to ChatResponse schema
-        return ChatResponse(
-            response=f"An unexpected error occurred: {str(e)}. Please try again.",
-            product_recommendations=[],
-            care_guides=[],
-            suggested_actions=["try_again", "contact_support"],
-            confidence_score=0.0,
-            query_understood={"error": str(e)}
-        )
+        except Exception as e:
+            print(f"Error during chat processing: {e}")
+            REQUEST_ERRORS.inc(endpoint="/chat")
+            # Return a generic error response conforming to ChatResponse schema
+            return ChatResponse(
+                response=f"An unexpected error occurred: {str(e)}. Please try again.",
+                product_recommendations=[],
+                care_guides=[],
+                suggested_actions=["try_again", "contact_support"],
+                confidence_score=0.0,
+                query_understood={"error": str(e)}
+            )
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="/chat")
+
+def _sse_event(event: str, data) -> bytes:
+    """One server-sent event; data is sent as JSON (bytes are taken as already encoded)"""
+    if not isinstance(data, bytes):
+        data = json.dumps(data, default=str).encode("utf-8")
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + data + b"\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest = Body(...)):
+    """
+    Streaming variant of /chat (text/event-stream). Sends "products" and "care_guides"
+    events as soon as the agent's tool calls return them, "token" events with pieces of
+    the answer text as Gemini generates it, and finally a "response" event carrying the
+    complete ChatResponse.
+    """
+    if not request.message or not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty.")
+
+    plant_agent = await _require_agent()
+    print(f"Received stream request: UserID='{request.user_id}', SessionID='{request.session_id}', Message='{request.message}'")
+
+    async def events():
+        start = time.perf_counter()
+        with request_trace("POST /chat/stream", session_id=request.session_id):
+            try:
+                async for event, data in plant_agent.astream_recommendation(
+                    user_message=request.message,
+                    user_id=request.user_id,
+                    session_id=request.session_id,
+                    deadline_ms=request.deadline_ms
+                ):
+                    if event == "response":
+                        with span("chat_response"):
+                            data = chat_response_json(data)
+                    elif event in ("products", "care_guides"):
+                        data = results_json(data)
+                    yield _sse_event(event, data)
+            except Exception as e:
+                print(f"Error during chat streaming: {e}")
+                REQUEST_ERRORS.inc(endpoint="/chat/stream")
+                yield _sse_event("response", ChatResponse(
+                    response=f"An unexpected error occurred: {str(e)}. Please try again.",
+                    suggested_actions=["try_again", "contact_support"],
+                    confidence_score=0.0,
+                    query_understood={"error": str(e)}
+                ).model_dump())
+            finally:
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="/chat/stream")
+
+    # X-Accel-Buffering stops reverse proxies from holding events back
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.get("/")
 async def root():
@@ -143,7 +261,27 @@ async def root():
 async def health_check():
     """Simple health check endpoint."""
     # Could add checks for DB connection, LLM accessibility etc.
-    return {"status": "healthy", "firebase_initialized": bool(FirebaseConfig._db)}
+    # Looked up without importing firebase_admin: not initialized yet if config was never loaded
+    firebase_config = sys.modules.get("config.firebase_config")
+    return {"status": "healthy", "firebase_initialized": bool(firebase_config and firebase_config.FirebaseConfig._db),
+            "agent_initialized": plant_agent_instance is not None}
+
+@app.get("/stats")
+async def stats():
+    """Cache hit/miss counters of the running agent."""
+    if not plant_agent_instance:
+        raise HTTPException(status_code=503, detail="Agent not initialized. Please try again later.")
+    return plant_agent_instance.get_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms and error counters in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/traces")
+async def traces(limit: int = 20):
+    """Span trees of the most recent requests, newest first (ENABLE_TRACING, TRACE_BUFFER_SIZE)."""
+    return {"enabled": TRACES.enabled, "traces": TRACES.recent(limit)}
 
 
 # To run this FastAPI application (from the plant-chatbot/backend directory):
@@ -0,0 +1,254 @@
+# models/records.py
+
+import json
+import sys
+from typing import Dict, List, Any, Optional
+
+import orjson
+from pydantic_core import to_json
+
+from models.schemas import ChatResponse
+
+# ProductDetails fields in declaration order; all are strings except drainageHoles
+DETAIL_FIELDS = (
+    'scientificName', 'sunlight', 'watering', 'growthRate', 'maintenance', 'bloomSeason',
+    'specialFeatures', 'toxicity', 'material', 'drainageHoles', 'size', 'color', 'useCase',
+)
+DETAIL_TEXT_FIELDS = tuple(field for field in DETAIL_FIELDS if field != 'drainageHoles')
+GUIDE_TEXT_FIELDS = (
+    'title', 'description', 'imageURL', 'publishDate', 'author', 'wateringTips', 'lightTips',
+    'temperatureTips', 'fertilizerTips', 'expertTip', 'expertName', 'expertTitle',
+)
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return '' if value is None else str(value)
+
+
+def _category(value: Any) -> str:
+    """Categorical values repeat across the catalog: one shared string object per distinct value"""
+    return sys.intern(_text(value))
+
+
+def _json(value: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson, or pydantic-core for what orjson rejects (non-string keys, huge ints)"""
+    try:
+        return orjson.dumps(value)
+    except TypeError:
+        return to_json(value)
+
+
+def _number(value: Any, kind=float, default=0):
+    try:
+        return kind(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+class ProductRecord:
+    """
+    One product document, normalized once to the types ProductRecommendation declares.
+
+    Built when a document version is ingested (catalog upsert, snapshot row, Firestore
+    fallback read) and kept instead of the raw nested dict; details and stock are stored
+    flat in slots, and category, subCategory, type, sunlight and maintenance are interned.
+    """
+    __slots__ = ('id', 'title', 'imageSrc', 'price', 'description', 'link', 'category', 'subCategory', 'type',
+                 'availability', 'quantity', '_fragment') + DETAIL_FIELDS
+
+    @classmethod
+    def from_document(cls, doc_id: str, data: Dict[str, Any]) -> 'ProductRecord':
+        record = cls.__new__(cls)
+        record.id = doc_id
+        record.title = _text(data.get('title'))
+        record.imageSrc = _text(data.get('imageSrc'))
+        record.price = _number(data.get('price'), float, 0.0)
+        record.description = _text(data.get('description'))
+        record.link = _text(data.get('link'))
+        record.category = _category(data.get('category'))
+        record.subCategory = _category(data.get('subCategory'))
+        record.type = _category(data.get('type'))
+
+        details = data.get('details') or {}
+        for field in DETAIL_TEXT_FIELDS:
+            setattr(record, field, _text(details.get(field)))
+        record.sunlight = sys.intern(record.sunlight)
+        record.maintenance = sys.intern(record.maintenance)
+        record.drainageHoles = bool(details.get('drainageHoles', False))
+
+        stock = data.get('stock') or {}
+        record.availability = bool(stock.get('availability', True))
+        record.quantity = _number(stock.get('quantity'), int, 0)
+        record._fragment = None
+        return record
+
+    def details(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in DETAIL_FIELDS}
+
+    def to_document(self) -> Dict[str, Any]:
+        """The record as a Firestore-shaped document (what snapshots store)"""
+        return {
+            'title': self.title, 'imageSrc': self.imageSrc, 'price': self.price, 'description': self.description,
+            'link': self.link, 'category': self.category, 'subCategory': self.subCategory, 'type': self.type,
+            'details': self.details(), 'stock': {'availability': self.availability, 'quantity': self.quantity},
+        }
+
+    def _fields(self) -> Dict[str, Any]:
+        return {
+            'id': self.id, 'title': self.title, 'imageSrc': self.imageSrc, 'price': self.price,
+            'description': self.description, 'link': self.link, 'category': self.category,
+            'subCategory': self.subCategory, 'type': self.type, 'details': self.details(),
+            'stock': {'availability': self.availability, 'quantity': self.quantity},
+        }
+
+    def to_result(self, match_score: Optional[float], similarity: Optional[float] = None) -> 'ProductResult':
+        """The structured search result the tools return: ProductRecommendation's fields, order and types"""
+        result = ProductResult(self._fields(), match_score=float(match_score) if match_score is not None else None)
+        result.record = self
+        result.similarity = similarity
+        return result
+
+    def json_fragment(self) -> bytes:
+        """to_result() as JSON up to the score value (serialized once per record, i.e. per document version)"""
+        fragment = self._fragment
+        if fragment is None:
+            fragment = self._fragment = _json(self._fields())[:-1] + b',"match_score":'
+        return fragment
+
+
+class CareGuideRecord:
+    """One care guide document, normalized once to the types CareGuide declares (category and difficulty interned)"""
+    __slots__ = ('id', 'category', 'difficulty', 'quickTips', 'content', 'commonProblems', '_fragment') + GUIDE_TEXT_FIELDS
+
+    @classmethod
+    def from_document(cls, doc_id: str, data: Dict[str, Any]) -> 'CareGuideRecord':
+        record = cls.__new__(cls)
+        record.id = doc_id
+        for field in GUIDE_TEXT_FIELDS:
+            setattr(record, field, _text(data.get(field)))
+        record.category = _category(data.get('category'))
+        record.difficulty = _category(data.get('difficulty'))
+        record.quickTips = tuple(_text(tip) for tip in data.get('quickTips') or ())
+        # (title, text, imageURL, imageCaption) and (problem, solution) tuples
+        record.content = tuple(
+            (_text(s.get('title')), _text(s.get('text')), _text(s.get('imageURL')), _text(s.get('imageCaption')))
+            for s in data.get('content') or () if isinstance(s, dict)
+        )
+        record.commonProblems = tuple(
+            (_text(p.get('problem')), _text(p.get('solution')))
+            for p in data.get('commonProblems') or () if isinstance(p, dict)
+        )
+        record._fragment = None
+        return record
+
+    def _sections(self) -> List[Dict[str, str]]:
+        return [{'title': title, 'text': text, 'imageURL': image, 'imageCaption': caption}
+                for title, text, image, caption in self.content]
+
+    def _problems(self) -> List[Dict[str, str]]:
+        return [{'problem': problem, 'solution': solution} for problem, solution in self.commonProblems]
+
+    def to_document(self) -> Dict[str, Any]:
+        """The record as a Firestore-shaped document, keys in CareGuide order"""
+        return {
+            'title': self.title, 'description': self.description, 'category': self.category,
+            'difficulty': self.difficulty, 'imageURL': self.imageURL, 'publishDate': self.publishDate,
+            'author': self.author, 'quickTips': list(self.quickTips), 'wateringTips': self.wateringTips,
+            'lightTips': self.lightTips, 'temperatureTips': self.temperatureTips, 'fertilizerTips': self.fertilizerTips,
+            'content': self._sections(), 'expertTip': self.expertTip, 'expertName': self.expertName,
+            'expertTitle': self.expertTitle, 'commonProblems': self._problems(),
+        }
+
+    def to_result(self, relevance: float) -> 'CareGuideResult':
+        """The structured lookup result the tools return: CareGuide's fields, order and types"""
+        result = CareGuideResult(self.to_document(), relevanceScore=float(relevance))
+        result.record = self
+        return result
+
+    def json_fragment(self) -> bytes:
+        """to_result() as JSON up to the score value; content sections and all are serialized once per record"""
+        fragment = self._fragment
+        if fragment is None:
+            fragment = self._fragment = _json(self.to_document())[:-1] + b',"relevanceScore":'
+        return fragment
+
+
+class ProductResult(dict):
+    """
+    A product search result built from a ProductRecord (treat as read-only). similarity is
+    the text similarity to a free-text query; filtered results have none, as every one of
+    them meets every filter and their match_score only differs by the feature bonuses.
+    """
+    __slots__ = ('record', 'similarity')
+    score_field = 'match_score'
+
+
+class CareGuideResult(dict):
+    """A care guide result built from a CareGuideRecord (treat as read-only)"""
+    __slots__ = ('record',)
+    score_field = 'relevanceScore'
+
+
+def _is_results(items: Any) -> bool:
+    return isinstance(items, list) and all(type(item) in (ProductResult, CareGuideResult) for item in items)
+
+
+def _trusted(output: Dict[str, Any]) -> bool:
+    """Whether output already has ChatResponse's exact shape and types"""
+    products = output.get('product_recommendations', [])
+    guides = output.get('care_guides', [])
+    actions = output.get('suggested_actions', [])
+    confidence = output.get('confidence_score', 0.0)
+    return (isinstance(output.get('response'), str)
+            and _is_results(products) and _is_results(guides)
+            and isinstance(actions, list) and all(isinstance(action, str) for action in actions)
+            and type(confidence) in (int, float)
+            and isinstance(output.get('query_understood', {}), dict))
+
+
+def _splice(results: List[Dict[str, Any]], parts: List[bytes]):
+    """Append the JSON array of record-built results to parts: cached fragments plus the encoded scores"""
+    separator = b'['
+    for result in results:
+        parts += (separator, result.record.json_fragment(), _json(result[result.score_field]), b'}')
+        separator = b','
+    parts.append(b']' if results else b'[]')
+
+
+def results_json(results: List[Dict[str, Any]]) -> bytes:
+    """
+    JSON for a list of product or care guide results. Results built from records are
+    spliced from the fragments their records keep, so only the scores are encoded per call.
+    """
+    if not _is_results(results):
+        return json.dumps(results, default=str).encode('utf-8')
+    parts: List[bytes] = []
+    _splice(results, parts)
+    return b''.join(parts)
+
+
+def chat_response_json(output: Dict[str, Any]) -> bytes:
+    """
+    The ChatResponse JSON body for an agent output dict (the same JSON model_dump_json() gives).
+
+    Products and care guides built from records were normalized when their document was
+    ingested, so when every one of them is a ProductResult / CareGuideResult and the other
+    fields are well typed, the body is assembled directly: the results are spliced from
+    their records' cached fragments and the rest is encoded with orjson, without validating
+    into models again. Anything else goes through ChatResponse validation.
+    """
+    if not _trusted(output):
+        return ChatResponse(**output).model_dump_json().encode('utf-8')
+    parts = [b'{"response":', _json(output['response']), b',"product_recommendations":']
+    _splice(output.get('product_recommendations', []), parts)
+    parts.append(b',"care_guides":')
+    _splice(output.get('care_guides', []), parts)
+    parts += (
+        b',"suggested_actions":', _json(output.get('suggested_actions', [])),
+        b',"confidence_score":', _json(float(output.get('confidence_score', 0.0))),
+        b',"query_understood":', _json(output.get('query_understood', {})),
+        b'}',
+    )
+    return b''.join(parts)
@@ -1,6 +1,6 @@
 # models/schemas.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 
@@ -8,6 +8,8 @@ class ChatRequest(BaseModel):
     message: str
     user_id: Optional[str] = None
     session_id: Optional[str] = None
+    # Latency budget for this request; AGENT_DEADLINE_MS when not given
+    deadline_ms: Optional[int] = Field(None, gt=0)
 
 class ProductDetails(BaseModel):
     scientificName: Optional[str] = ""
@@ -0,0 +1,193 @@
+# observability/callbacks.py
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Set
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from observability.metrics import Histogram, Counter, LLM_SECONDS, LLM_ERRORS, TOOL_SECONDS, TOOL_ERRORS
+from observability.tracing import Span, _current_span
+
+# Ids of the runs started inside the current TraceCallbackHandler.request_scope()
+_scope_runs: ContextVar[Optional[Set[Any]]] = ContextVar('trace_scope_runs', default=None)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callbacks into metrics and spans: every LLM call and tool invocation is
+    timed into LLM_SECONDS / TOOL_SECONDS, and inside a request trace the agent run becomes
+    an "agent" span with one "react_iteration" span per ReAct step holding that step's LLM
+    call and the tool call that followed. Pass it per call (config={"callbacks": [...]})
+    so it is inherited by the child runs, and run each request inside request_scope().
+    """
+
+    # Called directly on the event loop / calling thread, so spans see the request context
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # run id -> (span or None when the run is not shown, parent run id, start time, labels)
+        self._runs: Dict[Any, tuple] = {}
+        # agent run id -> its latest react_iteration span
+        self._iterations: Dict[Any, Span] = {}
+        # tool run id -> context token of the span made current for the tool's own spans
+        self._tokens: Dict[Any, Any] = {}
+
+    @contextmanager
+    def request_scope(self):
+        """
+        Bounds the runs of one request. A run cancelled mid-way (e.g. by the request deadline)
+        fires neither its end nor its error callback; whatever such runs left behind is
+        dropped, and their open spans are marked cancelled, when the block exits.
+        """
+        run_ids: Set[Any] = set()
+        token = _scope_runs.set(run_ids)
+        try:
+            yield
+        finally:
+            _scope_runs.reset(token)
+            self._discard(run_ids)
+
+    def _discard(self, run_ids: Set[Any]):
+        with self._lock:
+            spans = [run[0] for run in (self._runs.pop(run_id, None) for run_id in run_ids) if run is not None]
+            spans += [self._iterations.pop(run_id, None) for run_id in run_ids]
+            for run_id in run_ids:
+                # The context the token belongs to went away with the cancelled task
+                self._tokens.pop(run_id, None)
+        for current in spans:
+            if current is not None and current.end is None:
+                current.finish(asyncio.CancelledError())
+
+    def _parent_span(self, parent_run_id) -> Optional[Span]:
+        """Span of the nearest shown ancestor run, else the request's current span"""
+        while parent_run_id is not None:
+            run = self._runs.get(parent_run_id)
+            if run is None:
+                break
+            if run[0] is not None:
+                return run[0]
+            parent_run_id = run[1]
+        return _current_span.get()
+
+    def _start(self, run_id, parent_run_id, name: Optional[str], attributes: Dict[str, Any] = None, labels: Dict[str, Any] = None,
+               parent: Span = None) -> Optional[Span]:
+        with self._lock:
+            current = None
+            if name is not None:
+                parent = parent or self._parent_span(parent_run_id)
+                if parent is not None:
+                    current = Span(name, attributes)
+                    parent.children.append(current)
+            self._runs[run_id] = (current, parent_run_id, time.perf_counter(), labels)
+            scope = _scope_runs.get()
+            if scope is not None:
+                scope.add(run_id)
+            return current
+
+    def _end(self, run_id, histogram: Histogram = None, errors: Counter = None, error: BaseException = None):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        current, _, start, labels = run
+        if histogram is not None:
+            histogram.observe(time.perf_counter() - start, **labels)
+        if error is not None and errors is not None:
+            errors.inc(**labels)
+        if current is not None:
+            current.finish(error)
+
+    # ---- chains: the agent run and its ReAct iterations ----
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get('name') or (serialized or {}).get('name') or ''
+        if name == 'AgentExecutor':
+            self._start(run_id, parent_run_id, 'agent')
+            return
+        with self._lock:
+            agent_run = self._runs.get(parent_run_id)
+            previous = self._iterations.get(parent_run_id)
+        if agent_run is not None and agent_run[0] is not None and agent_run[0].name == 'agent':
+            # The agent runnable is called once per iteration, directly under the executor.
+            # An iteration lasts until the next one starts, so it also holds its tool call.
+            if previous is not None and previous.end is None:
+                previous.finish()
+            iteration = sum(1 for child in agent_run[0].children if child.name == 'react_iteration') + 1
+            current = self._start(run_id, parent_run_id, 'react_iteration', {'iteration': iteration})
+            with self._lock:
+                self._iterations[parent_run_id] = current
+            return
+        self._start(run_id, parent_run_id, None)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_chain(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_chain(run_id, error)
+
+    def _end_chain(self, run_id, error: BaseException = None):
+        with self._lock:
+            run = self._runs.get(run_id)
+            iteration = self._iterations.pop(run_id, None)
+        if run is not None and run[0] is not None and run[0].name == 'react_iteration' and error is None:
+            # Finished by the next iteration or by the end of the agent run
+            with self._lock:
+                self._runs.pop(run_id, None)
+            return
+        self._end(run_id, error=error)
+        if iteration is not None and iteration.end is None:
+            iteration.finish()
+
+    # ---- LLM calls ----
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._llm_start(serialized, run_id, parent_run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._llm_start(serialized, run_id, parent_run_id, kwargs)
+
+    def _llm_start(self, serialized, run_id, parent_run_id, kwargs):
+        params = kwargs.get('invocation_params') or {}
+        model = params.get('model') or params.get('model_name') or params.get('_type') or (serialized or {}).get('name') or 'unknown'
+        self._start(run_id, parent_run_id, 'llm', {'model': model}, {'model': model})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, LLM_SECONDS, LLM_ERRORS)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, LLM_SECONDS, LLM_ERRORS, error)
+
+    # ---- tools ----
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        tool = (serialized or {}).get('name') or kwargs.get('name') or 'unknown'
+        with self._lock:
+            iteration = self._iterations.get(parent_run_id)
+        current = self._start(run_id, parent_run_id, 'tool', {'tool': tool, 'input': str(input_str)[:200]}, {'tool': tool},
+                              parent=iteration)
+        if current is not None:
+            # Spans opened by the tool itself (e.g. Firestore queries) nest under it
+            with self._lock:
+                self._tokens[run_id] = _current_span.set(current)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, error)
+
+    def _end_tool(self, run_id, error: BaseException = None):
+        with self._lock:
+            token = self._tokens.pop(run_id, None)
+        if token is not None:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Ended from another context than it started in: nothing to restore there
+                pass
+        self._end(run_id, TOOL_SECONDS, TOOL_ERRORS, error)
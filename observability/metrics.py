@@ -0,0 +1,138 @@
+# observability/metrics.py
+
+import bisect
+import math
+import threading
+from typing import Dict, List, Tuple, Sequence
+
+# Latency buckets in seconds: from tens of microseconds (query parsing, extraction) up
+# to tens of seconds (a full agent run against Gemini)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f'{self.name}{_label_text(self.labelnames, key)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (not cumulative), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_label_text(self.labelnames, key)} {repr(total)}')
+            lines.append(f'{self.name}_count{_label_text(self.labelnames, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Counters and histograms rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'botanicart_request_seconds', 'Chat request handling time', ('endpoint',))
+REQUEST_ERRORS = REGISTRY.counter(
+    'botanicart_request_errors_total', 'Chat requests answered with the error response', ('endpoint',))
+STAGE_SECONDS = REGISTRY.histogram(
+    'botanicart_stage_seconds', 'Time spent in instrumented processing stages', ('stage',))
+LLM_SECONDS = REGISTRY.histogram(
+    'botanicart_llm_call_seconds', 'LLM call latency', ('model',))
+LLM_ERRORS = REGISTRY.counter(
+    'botanicart_llm_errors_total', 'Failed LLM calls', ('model',))
+LLM_CACHE_LOOKUPS = REGISTRY.counter(
+    'botanicart_llm_cache_lookups_total', 'LLM completion cache lookups by result (hit or miss)', ('result',))
+AGENT_EARLY_STOPS = REGISTRY.counter(
+    'botanicart_agent_early_stops_total', 'Agent runs ended before a final answer (strong_match or deadline)', ('reason',))
+TOOL_SECONDS = REGISTRY.histogram(
+    'botanicart_tool_seconds', 'Agent tool invocation latency', ('tool',))
+TOOL_ERRORS = REGISTRY.counter(
+    'botanicart_tool_errors_total', 'Agent tool invocations that raised', ('tool',))
+FIRESTORE_SECONDS = REGISTRY.histogram(
+    'botanicart_firestore_seconds', 'Firestore operation latency', ('collection', 'operation'))
+FIRESTORE_ERRORS = REGISTRY.counter(
+    'botanicart_firestore_errors_total', 'Failed Firestore operations', ('collection', 'operation'))
@@ -0,0 +1,158 @@
+# observability/tracing.py
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional
+
+from observability.metrics import Histogram, Counter, STAGE_SECONDS
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation of a request trace; children are the operations it contained"""
+    __slots__ = ('name', 'attributes', 'start', 'end', 'error', 'children')
+
+    def __init__(self, name: str, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.children: List['Span'] = []
+
+    def finish(self, error: BaseException = None):
+        self.end = time.perf_counter()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def seconds(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        data = {'name': self.name, 'start_ms': round((self.start - origin) * 1000, 3), 'duration_ms': round(self.seconds * 1000, 3)}
+        if self.attributes:
+            data['attributes'] = self.attributes
+        if self.error:
+            data['error'] = self.error
+        if self.children:
+            data['children'] = [child.to_dict(origin) for child in list(self.children)]
+        return data
+
+
+class TraceRecorder:
+    """
+    Keeps the span trees of the last `buffer_size` requests for the /traces endpoint and,
+    when dump_path is set, appends each finished trace to that file as one JSON line.
+    """
+
+    def __init__(self, buffer_size: int = 100, dump_path: Optional[str] = None):
+        self.enabled = buffer_size > 0 or bool(dump_path)
+        self.dump_path = dump_path
+        self._lock = threading.Lock()
+        self._traces = deque(maxlen=max(buffer_size, 0))
+
+    @classmethod
+    def from_env(cls) -> 'TraceRecorder':
+        if os.getenv("ENABLE_TRACING", "true").lower() in ("0", "false", "no"):
+            return cls(buffer_size=0)
+        return cls(buffer_size=int(os.getenv("TRACE_BUFFER_SIZE", "100")), dump_path=os.getenv("TRACE_DUMP_PATH") or None)
+
+    def record(self, root: Span):
+        trace = root.to_dict()
+        trace['timestamp'] = time.time()
+        with self._lock:
+            self._traces.append(trace)
+            if self.dump_path:
+                try:
+                    with open(self.dump_path, 'a') as f:
+                        f.write(json.dumps(trace, default=str) + '\n')
+                except OSError as e:
+                    print(f"Trace could not be written to {self.dump_path}: {e}")
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._traces)[-limit:][::-1]
+
+
+TRACES = TraceRecorder.from_env()
+
+
+@contextmanager
+def request_trace(name: str, **attributes):
+    """Root span of one request; it is recorded in TRACES when the block exits"""
+    if not TRACES.enabled:
+        yield None
+        return
+    root = Span(name, attributes)
+    token = _current_span.set(root)
+    error = None
+    try:
+        yield root
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # A streaming response closed from another context; nothing to restore there
+            pass
+        root.finish(error)
+        TRACES.record(root)
+
+
+@contextmanager
+def span(name: str, histogram: Histogram = None, errors: Counter = None, **labels):
+    """
+    Time the block into histogram (STAGE_SECONDS with stage=name by default) and, inside
+    a request trace, add it to the span tree as a child of the current span.
+    """
+    attributes = dict(labels)
+    if histogram is None:
+        histogram, labels = STAGE_SECONDS, {'stage': name}
+    parent = _current_span.get()
+    current = Span(name, attributes) if parent is not None else None
+    token = _current_span.set(current) if current is not None else None
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+        if current is not None:
+            _current_span.reset(token)
+            current.finish(error)
+            parent.children.append(current)
+
+
+def traced(name: str):
+    """Decorator form of span(name) for sync and async functions"""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,36 @@
+# tests/conftest.py
+
+import pytest
+
+import agent.plant_agent as plant_agent
+from benchmarks import fake_firestore, synthetic_data
+from benchmarks.bench_chat import reset_shared_state
+from benchmarks.fake_llm import ScriptedChatModel
+from config.firebase_config import FirebaseConfig
+
+
+@pytest.fixture(scope='module')
+def scripted_agent():
+    """A PlantRecommendationAgent on the Firestore stand-in and the scripted LLM; agent_inputs are recorded"""
+    products = list(synthetic_data.products(300))
+    store = fake_firestore.FakeStore()
+    store.load('products', products)
+    store.load('care_guides', synthetic_data.care_guides(20))
+    store.load('categories', synthetic_data.categories(products))
+    with pytest.MonkeyPatch.context() as patch:
+        for name in ('LLM_CACHE_PATH', 'CATALOG_SNAPSHOT_PATH', 'CATALOG_SNAPSHOT_OFFLINE', 'PRODUCT_VECTOR_INDEX_PATH',
+                     'AGENT_DEADLINE_MS'):
+            patch.delenv(name, raising=False)
+        patch.setenv('ENABLE_PRODUCT_VECTOR_INDEX', 'false')
+        patch.setattr(FirebaseConfig, '_db', fake_firestore.FakeFirestore(store))
+        patch.setattr(FirebaseConfig, '_async_db', fake_firestore.FakeAsyncFirestore(store))
+        patch.setattr(plant_agent, 'ChatGoogleGenerativeAI', lambda **kwargs: ScriptedChatModel(cache=kwargs.get('cache')))
+        reset_shared_state()
+        agent = plant_agent.PlantRecommendationAgent(gemini_api_key='test')
+        agent.executor.verbose = False
+        inputs = []
+        agent_inputs = agent._agent_inputs
+        patch.setattr(agent, '_agent_inputs', lambda message, session: inputs.append(agent_inputs(message, session)) or inputs[-1])
+        agent.recorded_inputs = inputs
+        yield agent
+        reset_shared_state()
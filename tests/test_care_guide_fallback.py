@@ -0,0 +1,51 @@
+# tests/test_care_guide_fallback.py
+
+import asyncio
+
+import pytest
+
+from benchmarks import fake_firestore, synthetic_data
+from config.firebase_config import FirebaseConfig
+from tools.firestore_access import FirestoreAccess
+from tools.firestore_tools import FirestoreCareGuideTool
+from tools.tool_memo import ToolMemo
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = fake_firestore.FakeStore()
+    store.load('care_guides', synthetic_data.care_guides(20))
+    store.load('care_guides', [('guide-monstera', {'title': 'Monstera Care', 'category': 'Tropical Plants'})])
+    monkeypatch.setattr(FirebaseConfig, '_async_db', fake_firestore.FakeAsyncFirestore(store))
+    return store
+
+
+def firestore_only_tool(store) -> FirestoreCareGuideTool:
+    """The tool as it runs while the care guide index is not loaded"""
+    tool = FirestoreCareGuideTool.__new__(FirestoreCareGuideTool)
+    tool.db = fake_firestore.FakeFirestore(store)
+    tool.index = None
+    tool.access = FirestoreAccess(tool.db)
+    tool.memo = ToolMemo(ttl_seconds=0)
+    return tool
+
+
+def test_title_match_does_not_send_the_general_query(store):
+    guides = firestore_only_tool(store).find_care_guides('Monstera')
+    assert guides[0]['title'] == 'Monstera Care'
+    # Title and category queries, nothing else
+    assert store.rpcs == 2
+
+
+def test_general_query_only_when_nothing_specific_matched(store):
+    guides = firestore_only_tool(store).find_care_guides('xyz')
+    assert len(guides) == 3
+    # Title query (no category keyword), then the general one
+    assert store.rpcs == 2
+
+
+def test_async_path_sends_the_same_queries(store):
+    tool = firestore_only_tool(store)
+    guides = asyncio.run(tool.afind_care_guides('Monstera'))
+    assert guides[0]['title'] == 'Monstera Care'
+    assert store.rpcs == 2
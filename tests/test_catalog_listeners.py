@@ -0,0 +1,43 @@
+# tests/test_catalog_listeners.py
+
+from benchmarks import fake_firestore, synthetic_data
+from tools.care_guide_index import CareGuideIndex
+from tools.product_catalog import ProductCatalog
+
+
+def listening(collection: str, docs, index):
+    store = fake_firestore.FakeStore()
+    store.load(collection, docs)
+    index.start(fake_firestore.FakeFirestore(store))
+    return store
+
+
+def test_malformed_care_guide_is_skipped_and_the_index_gets_ready():
+    guides = list(synthetic_data.care_guides(5))
+    guides[2] = (guides[2][0], dict(guides[2][1], content=['not a section', None], commonProblems='oops'))
+    guides.append(('guide-broken', {'title': 'Broken guide', 'quickTips': 7}))
+    index = CareGuideIndex()
+    listening('care_guides', guides, index)
+    assert index.ready
+    # Non-dict sections and problems are dropped; a guide that cannot be read at all is left out
+    assert len(index) == 5
+    assert index.search(guides[2][1]['title'])[0][0] == guides[2][0]
+
+
+def test_unreadable_guide_does_not_stop_later_changes():
+    index = CareGuideIndex()
+    store = listening('care_guides', list(synthetic_data.care_guides(3)), index)
+    store.set('care_guides', 'guide-bad', {'title': 'Bad', 'content': 'not a list'})
+    store.set('care_guides', 'guide-new', {'title': 'Repotting a snake plant'})
+    assert index.ready
+    assert index.search('repotting snake plant')[0][0] == 'guide-new'
+
+
+def test_malformed_product_is_skipped_and_the_catalog_gets_ready():
+    products = [(doc_id, data) for doc_id, data in synthetic_data.products(40) if data['stock']['availability']]
+    products[3] = (products[3][0], dict(products[3][1], details='not a dict'))
+    catalog = ProductCatalog()
+    listening('products', products, catalog)
+    assert catalog.ready
+    assert len(catalog) == len(products) - 1
+    assert catalog.get(products[3][0]) is None
@@ -0,0 +1,107 @@
+# tests/test_catalog_snapshot.py
+
+import json
+
+import pytest
+
+from benchmarks import fake_firestore, synthetic_data
+from tools.care_guide_index import CareGuideIndex
+from tools.catalog_snapshot import CatalogSnapshot, SnapshotDocuments, export_snapshot
+from tools.category_catalog import CategoryCatalog
+from tools.product_catalog import ProductCatalog
+
+
+@pytest.fixture
+def decoded():
+    return []
+
+
+@pytest.fixture
+def documents(decoded):
+    def factory(doc_id, data):
+        decoded.append(doc_id)
+        return data
+    rows = [json.dumps({'title': f'Guide {i}'}) for i in range(3)]
+    return SnapshotDocuments(['g0', 'g1', 'g2'], rows, factory)
+
+
+def test_rows_are_decoded_on_first_access_only(documents, decoded):
+    assert documents['g1'] == {'title': 'Guide 1'}
+    assert documents['g1'] == {'title': 'Guide 1'}
+    assert decoded == ['g1']
+
+
+def test_delete_and_replace_never_decode_the_row(documents, decoded):
+    del documents['g0']
+    documents['g1'] = {'title': 'Changed'}
+    assert 'g0' not in documents
+    assert documents['g1'] == {'title': 'Changed'}
+    assert sorted(documents) == ['g1', 'g2']
+    assert decoded == []
+    with pytest.raises(KeyError):
+        del documents['g0']
+
+
+def test_pop_returns_the_document(documents, decoded):
+    assert documents.pop('g2') == {'title': 'Guide 2'}
+    assert documents.pop('g2', None) is None
+    assert len(documents) == 2
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """A fake Firestore and a snapshot exported from it"""
+    products = list(synthetic_data.products(50))
+    store = fake_firestore.FakeStore()
+    store.load('products', products)
+    store.load('care_guides', synthetic_data.care_guides(10))
+    store.load('categories', synthetic_data.categories(products))
+    path = str(tmp_path / 'catalog.snap')
+    export_snapshot(fake_firestore.FakeFirestore(store), path)
+    return store, CatalogSnapshot(path)
+
+
+def test_listener_replaces_snapshot_rows_without_updated_stamps(exported):
+    store, snapshot = exported
+    catalog = ProductCatalog()
+    catalog.load_snapshot(snapshot)
+    in_stock = [doc_id for doc_id, _ in catalog.items()]
+    deleted, off_sale, repriced = in_stock[:3]
+    store.delete('products', deleted)
+    data = dict(store.collections['products'][off_sale])
+    store.set('products', off_sale, dict(data, stock=dict(data['stock'], availability=False)))
+    data = store.collections['products'][repriced]
+    store.set('products', repriced, dict(data, price=data['price'] + 1))
+    reported = []
+    catalog.add_listener(reported.extend)
+
+    catalog.start(fake_firestore.FakeFirestore(store))
+
+    assert catalog.get(deleted) is None
+    assert catalog.get(off_sale) is None
+    assert catalog.get(repriced).price == data['price'] + 1
+    assert len(catalog) == len(in_stock) - 2
+    assert sorted(reported) == sorted([deleted, off_sale, repriced])
+    assert deleted not in dict(catalog.search({}))
+
+
+def test_listener_replaces_snapshot_guides_and_categories(exported):
+    store, snapshot = exported
+    guides = CareGuideIndex()
+    guides.load_snapshot(snapshot)
+    categories = CategoryCatalog()
+    categories.load(list(snapshot.documents('categories').items()))
+    deleted_guide = next(doc_id for doc_id, _ in guides.all())
+    deleted_category = next(iter(store.collections['categories']))
+    store.delete('care_guides', deleted_guide)
+    store.delete('categories', deleted_category)
+    reported = []
+    guides.add_listener(reported.extend)
+
+    db = fake_firestore.FakeFirestore(store)
+    guides.start(db)
+    categories.start(db)
+
+    assert guides.get(deleted_guide) is None
+    assert reported == [deleted_guide]
+    assert deleted_category not in [category['id'] for category in categories.categories()]
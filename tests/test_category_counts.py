@@ -0,0 +1,65 @@
+# tests/test_category_counts.py
+
+from collections import Counter
+
+from benchmarks import fake_firestore, synthetic_data
+from tools.catalog_snapshot import CatalogSnapshot, export_snapshot
+from tools.category_catalog import CategoryCatalog
+from tools.product_catalog import ProductCatalog
+
+
+def expected_counts(store):
+    return Counter(data['category'] for data in store.collections['products'].values() if data['stock']['availability'])
+
+
+def served_counts(categories):
+    return {category['name']: category['product_count'] for category in categories.categories()}
+
+
+def started(store):
+    db = fake_firestore.FakeFirestore(store)
+    products = ProductCatalog()
+    products.start(db)
+    categories = CategoryCatalog(products)
+    categories.start(db)
+    return products, categories
+
+
+def test_counts_follow_added_modified_and_removed_products():
+    products = list(synthetic_data.products(200))
+    store = fake_firestore.FakeStore()
+    store.load('products', products)
+    store.load('categories', synthetic_data.categories(products))
+    catalog, categories = started(store)
+    names = list(served_counts(categories))
+    assert served_counts(categories) == {name: expected_counts(store)[name] for name in names}
+
+    in_stock = [(doc_id, data) for doc_id, data in products if data['stock']['availability']]
+    (moved_id, moved), (sold_out_id, sold_out), (deleted_id, _) = in_stock[:3]
+    other = next(name for name in names if name != moved['category'])
+    store.set('products', 'new-product', dict(in_stock[3][1], category=other))              # ADDED
+    store.set('products', moved_id, dict(moved, category=other))                             # MODIFIED, new category
+    store.set('products', sold_out_id, dict(sold_out, stock=dict(sold_out['stock'], availability=False)))
+    store.delete('products', deleted_id)                                                     # REMOVED
+    store.set('products', in_stock[4][0], dict(in_stock[4][1], price=1.0))                   # MODIFIED, same category
+
+    assert served_counts(categories) == {name: expected_counts(store)[name] for name in names}
+    assert catalog.count_by('category', 'No such category') == 0
+
+
+def test_counts_loaded_from_a_snapshot_are_maintained(tmp_path):
+    products = list(synthetic_data.products(200))
+    store = fake_firestore.FakeStore()
+    store.load('products', products)
+    store.load('categories', synthetic_data.categories(products))
+    path = str(tmp_path / 'catalog.snap')
+    export_snapshot(fake_firestore.FakeFirestore(store), path)
+    catalog = ProductCatalog()
+    catalog.load_snapshot(CatalogSnapshot(path))
+    for name, count in expected_counts(store).items():
+        assert catalog.count_by('category', name) == count
+
+    doc_id, _ = next(item for item in catalog.items())
+    category = catalog.get(doc_id).category
+    catalog.remove(doc_id)
+    assert catalog.count_by('category', category) == expected_counts(store)[category] - 1
@@ -0,0 +1,101 @@
+# tests/test_execution_budget.py
+
+import asyncio
+
+import pytest
+
+from agent.execution_budget import ExecutionBudget
+from benchmarks import synthetic_data
+from tools.firestore_tools import FirestoreProductTool
+from tools.observation_renderer import ObservationRenderer
+from tools.product_catalog import ProductCatalog
+from tools.product_vector_index import ProductVectorIndex
+from tools.result_store import ToolResultStore
+from tools.tool_memo import ToolMemo
+
+FILTERED_QUERIES = [
+    "low maintenance plants",
+    "plants for low light",
+    "succulents under $30",
+    "indoor plant",
+    "pet safe plants",
+    "low maintenance pet safe plant for low light under $30",
+]
+
+
+@pytest.fixture(scope='module')
+def product_tool():
+    catalog = ProductCatalog()
+    catalog.load(list(synthetic_data.products(2000)))
+    index = ProductVectorIndex()
+    index.sync(catalog.items())
+    index._ready.set()
+    tool = FirestoreProductTool.__new__(FirestoreProductTool)
+    tool.catalog = catalog
+    tool.vector_index = index
+    tool.memo = ToolMemo(ttl_seconds=0)
+    tool.renderer = ObservationRenderer()
+    return tool
+
+
+def product_name(tool) -> str:
+    """Title of a product that the query parser finds no filters in, so it is searched as free text"""
+    return next(record.title for _, record in tool.catalog.items() if not tool._parse_query(record.title))
+
+
+def searched(tool, query: str) -> ToolResultStore:
+    results = ToolResultStore()
+    results.record('search_products', query, tool.find_products(query))
+    return results
+
+
+@pytest.mark.parametrize('query', FILTERED_QUERIES)
+def test_filtered_search_is_not_a_strong_match(product_tool, query):
+    results = searched(product_tool, query)
+    assert results.latest('search_products')
+    budget = ExecutionBudget(early_exit_score=0.8)
+    with budget.watch(results):
+        assert budget.check(1, 0.0) is None
+
+
+def test_free_text_search_naming_a_product_is_a_strong_match(product_tool):
+    results = searched(product_tool, product_name(product_tool))
+    budget = ExecutionBudget(early_exit_score=0.8)
+    with budget.watch(results):
+        assert budget.check(1, 0.0) == 'strong_match'
+
+
+def test_no_early_exit_when_turned_off(product_tool):
+    results = searched(product_tool, product_name(product_tool))
+    budget = ExecutionBudget(early_exit_score=0.8)
+    with budget.watch(results, early_exit=False):
+        assert budget.check(1, 0.0) is None
+
+
+def test_deadline_stops_when_the_next_step_would_not_fit():
+    budget = ExecutionBudget(deadline_seconds=1.0)
+    budget.results = ToolResultStore()
+    assert budget.check(1, 0.1) is None
+    assert budget.check(1, 5.0) == 'deadline'
+
+
+def test_no_deadline_unless_one_is_set(scripted_agent):
+    assert scripted_agent._budget(None).remaining() is None
+    assert 0 < scripted_agent._budget(500).remaining() <= 0.5
+
+
+def test_coalesced_request_gets_the_leaders_answer_within_the_leaders_budget(scripted_agent):
+    message = "Something green for a bathroom shelf"
+
+    async def leader_and_follower():
+        return await asyncio.gather(scripted_agent.aget_recommendation(message),
+                                    scripted_agent.aget_recommendation(message, deadline_ms=20))
+
+    scripted_agent.llm.latency_ms = 50
+    try:
+        leader, follower = asyncio.run(leader_and_follower())
+    finally:
+        scripted_agent.llm.latency_ms = 0
+    assert scripted_agent.in_flight.coalesced == 1
+    assert follower['response'] == leader['response']
+    assert scripted_agent.response_cache.stats()['entries'] == 1
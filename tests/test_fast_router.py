@@ -0,0 +1,74 @@
+# tests/test_fast_router.py
+
+import pytest
+
+from agent.fast_router import FastPathRouter
+from agent.plant_agent import PlantRecommendationAgent
+from benchmarks import synthetic_data
+from tools.firestore_tools import FirestoreProductTool
+from tools.observation_renderer import ObservationRenderer
+from tools.product_catalog import ProductCatalog
+from tools.tool_memo import ToolMemo
+
+ROUTED = [
+    ("succulents under $20", 'budget_search'),
+    ("show me pet safe plants", 'pet_safe_search'),
+    ("low light indoor plants", 'category_search'),
+    ("pet safe succulents $10 to $20", 'pet_safe_search'),
+    ("do you sell succulents", 'category_search'),
+]
+
+FALL_THROUGH = [
+    "succulents under 30 dollars",
+    "pet safe succulents between $10 and $20",
+    "large plants for a 2 year old",
+    "low light plants for an office",
+    "succulents but not cactus",
+    "Something green for a bathroom shelf",
+]
+
+
+@pytest.fixture(scope='module')
+def agent():
+    catalog = ProductCatalog()
+    catalog.load(list(synthetic_data.products(2000)))
+    tool = FirestoreProductTool.__new__(FirestoreProductTool)
+    tool.catalog = catalog
+    tool.vector_index = None
+    tool.memo = ToolMemo(ttl_seconds=0)
+    tool.renderer = ObservationRenderer()
+    agent = PlantRecommendationAgent.__new__(PlantRecommendationAgent)
+    agent.product_tool = tool
+    agent.fast_router = FastPathRouter(tool, category_tool=None)
+    return agent
+
+
+def classify(agent, message):
+    return agent.fast_router._classify(message, agent._analyze_user_query(message))
+
+
+@pytest.mark.parametrize('message, route_name', ROUTED)
+def test_message_explained_by_its_filters_is_routed(agent, message, route_name):
+    assert classify(agent, message) == 'product_search'
+    route = agent.fast_router.route(message, agent._analyze_user_query(message))
+    assert route is not None and route.name == route_name
+    assert route.products
+
+
+@pytest.mark.parametrize('message', FALL_THROUGH)
+def test_constraint_the_filters_miss_goes_to_the_agent(agent, message):
+    assert classify(agent, message) is None
+    fallthroughs = agent.fast_router.agent_fallthroughs
+    assert agent.fast_router.route(message, agent._analyze_user_query(message)) is None
+    assert agent.fast_router.agent_fallthroughs == fallthroughs + 1
+
+
+def test_routed_products_honour_the_price_filter(agent):
+    route = agent.fast_router.route("succulents under $20", agent._analyze_user_query("succulents under $20"))
+    assert all(product['price'] <= 20 for product in route.products)
+    assert "under $20" in route.response
+
+
+def test_category_inquiry_is_routed_only_without_filters(agent):
+    assert classify(agent, "what categories do you have") == 'categories'
+    assert classify(agent, "what categories of succulents under $20") != 'categories'
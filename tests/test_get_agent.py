@@ -0,0 +1,35 @@
+# tests/test_get_agent.py
+
+import asyncio
+import time
+
+import agent.plant_agent  # imported up front, so only the build itself is timed
+import config.firebase_config
+import main
+
+
+def test_agent_is_built_once_off_the_event_loop(monkeypatch):
+    builds = []
+
+    def slow_build():
+        builds.append(1)
+        time.sleep(0.3)  # Firebase init, catalog and index construction
+        return 'agent'
+
+    monkeypatch.setattr(main, '_build_agent', slow_build)
+    monkeypatch.setattr(main, 'plant_agent_instance', None)
+    monkeypatch.setattr(main, '_agent_lock', None)
+
+    async def run():
+        ticks = 0
+        build = asyncio.ensure_future(asyncio.gather(main.get_agent(), main.get_agent()))
+        while not build.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return await build, ticks
+
+    agents, ticks = asyncio.run(run())
+    assert agents == ['agent', 'agent']
+    assert builds == [1]
+    # The loop kept running other work while the agent was built
+    assert ticks >= 10
@@ -0,0 +1,72 @@
+# tests/test_llm_cache.py
+
+import itertools
+
+import pytest
+from langchain_core.outputs import Generation
+
+from agent import llm_cache
+from agent.llm_cache import SQLiteCompletionCache
+
+LLM = 'model=gemini-1.5-flash temperature=0.2'
+
+
+class Clock:
+    """Strictly increasing time.time(), so least recently used is never a tie"""
+    def __init__(self):
+        self._ticks = itertools.count(1)
+
+    def time(self):
+        return float(next(self._ticks))
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, 'time', Clock())
+    return str(tmp_path / 'cache' / 'llm.sqlite')
+
+
+def completion(text):
+    return [Generation(text=text)]
+
+
+def test_round_trip_through_the_file(path):
+    cache = SQLiteCompletionCache(path)
+    assert cache.lookup('prompt', LLM) is None
+    cache.update('prompt', LLM, completion('Final Answer: a snake plant'))
+    assert cache.lookup('prompt', LLM) == completion('Final Answer: a snake plant')
+    assert cache.stats()['entries'] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_other_prompt_or_model_settings_miss(path):
+    cache = SQLiteCompletionCache(path)
+    cache.update('prompt', LLM, completion('answer'))
+    assert cache.lookup('prompt ', LLM) is None
+    assert cache.lookup('prompt', LLM.replace('0.2', '0.7')) is None
+
+
+def test_eviction_keeps_the_most_recently_read(path):
+    size = len(llm_cache.dumps(completion('x' * 100)))
+    cache = SQLiteCompletionCache(path, max_bytes=10 * size)
+    for i in range(10):
+        cache.update(f'prompt {i}', LLM, completion('x' * 100))
+    for i in (0, 1, 2):
+        assert cache.lookup(f'prompt {i}', LLM) is not None
+
+    cache.update('prompt 10', LLM, completion('x' * 100))  # over max_bytes: evict down to 90%
+
+    assert cache.stats()['bytes'] <= 0.9 * cache.max_bytes
+    assert cache.evictions == 2
+    kept = [i for i in range(11) if cache.lookup(f'prompt {i}', LLM) is not None]
+    assert kept == [0, 1, 2, 5, 6, 7, 8, 9, 10]
+
+
+def test_entries_survive_a_restart(path):
+    first = SQLiteCompletionCache(path)
+    first.update('prompt', LLM, completion('answer'))
+    first._db.close()
+
+    reopened = SQLiteCompletionCache(path)
+    assert reopened.lookup('prompt', LLM) == completion('answer')
+    assert reopened.stats()['bytes'] == len(llm_cache.dumps(completion('answer')))
@@ -0,0 +1,106 @@
+# tests/test_multi_search.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks import synthetic_data
+from tools.firestore_tools import FirestoreProductTool, fuse_rankings, RRF_K
+from tools.observation_renderer import ObservationRenderer
+from tools.product_catalog import ProductCatalog
+from tools.tool_memo import ToolMemo
+
+
+def ranking(*ids):
+    return [{'id': product_id, 'match_score': 0.5} for product_id in ids]
+
+
+@pytest.fixture
+def tool():
+    catalog = ProductCatalog()
+    catalog.load(list(synthetic_data.products(500)))
+    tool = FirestoreProductTool.__new__(FirestoreProductTool)
+    tool.catalog = catalog
+    tool.vector_index = None
+    tool.memo = ToolMemo(ttl_seconds=30)
+    tool.renderer = ObservationRenderer()
+    tool._pool = ThreadPoolExecutor(max_workers=5)
+    yield tool
+    tool._pool.shutdown()
+
+
+def test_reciprocal_rank_fusion_order():
+    fused = fuse_rankings([ranking('a', 'b', 'c'), ranking('c', 'b', 'd')])
+    # c: 1/61 + 1/63 > b: 2/62 > a: 1/61 > d: 1/63
+    assert [product['id'] for product in fused] == ['c', 'b', 'a', 'd']
+
+
+@pytest.mark.parametrize('rank, shared_first', [(RRF_K + 1, True), (RRF_K + 3, False)])
+def test_fusion_constant_is_60(rank, shared_first):
+    """Ranked `rank` in both lists beats a single first place exactly while rank < RRF_K + 2"""
+    padding = [f'pad{i}' for i in range(rank - 2)]
+    first = ranking('top', *padding, 'shared')
+    second = ranking(*[f'other{i}' for i in range(rank - 1)], 'shared')
+    order = [product['id'] for product in fuse_rankings([first, second], limit=2 * rank)]
+    assert RRF_K == 60
+    assert (order.index('shared') < order.index('top')) == shared_first
+
+
+def test_ties_go_to_the_better_match_score():
+    first = [{'id': 'a', 'match_score': 0.4}]
+    second = [{'id': 'b', 'match_score': 0.9}]
+    assert [product['id'] for product in fuse_rankings([first, second])] == ['b', 'a']
+
+
+def test_products_are_deduplicated_by_id_keeping_the_best_score():
+    fused = fuse_rankings([[{'id': 'a', 'match_score': 0.3}], [{'id': 'a', 'match_score': 0.8}, {'id': 'b'}]])
+    assert [product['id'] for product in fused] == ['a', 'b']
+    assert fused[0]['match_score'] == 0.8
+    assert len(fuse_rankings([ranking(*'abcdefgh'), ranking(*'ijklmnop')])) == 8
+
+
+def test_variants_with_the_same_filters_are_searched_once(tool):
+    assert tool._split_variants("succulents under $20; cheap succulents below $20 | ; pet safe plants") == [
+        "succulents under $20", "pet safe plants"]
+    calls = []
+    find_products = tool._find_products
+    tool._find_products = lambda filters: calls.append(filters) or find_products(filters)
+
+    with tool.memo.request_scope():
+        tool.find_products_multi(["pet safe plants", "pet safe plants", "low light plants"])
+        tool.multi_search("pet safe plants; low light plants")
+
+    assert sorted(calls, key=str) == [{'pet_safe': True}, {'sunlight': 'indirect'}]
+
+
+def test_a_failing_variant_keeps_the_others(tool, capsys):
+    find_products = tool.find_products
+
+    def flaky(query):
+        if 'cactus' in query:
+            raise RuntimeError('backend unavailable')
+        return find_products(query)
+
+    tool.find_products = flaky
+    expected = [p['id'] for p in find_products("pet safe plants")]
+    products = tool.find_products_multi(["pet safe plants", "cactus"])
+    assert [p['id'] for p in products] == expected
+    assert "variant 'cactus' failed" in capsys.readouterr().out
+
+    with pytest.raises(RuntimeError):
+        tool.find_products_multi(["cactus", "cactus plants"])
+
+
+def test_a_failing_variant_keeps_the_others_async(tool):
+    afind_products = tool.afind_products
+
+    async def flaky(query):
+        if 'cactus' in query:
+            raise RuntimeError('backend unavailable')
+        return await afind_products(query)
+
+    tool.afind_products = flaky
+    observation = asyncio.run(tool.amulti_search("pet safe plants; cactus"))
+    assert not observation.startswith('Error') and observation != 'No matching products found. Try broader search terms.'
+    assert asyncio.run(tool.amulti_search("cactus; cactus plants")).startswith('Error searching products')
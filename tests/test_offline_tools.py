@@ -0,0 +1,44 @@
+# tests/test_offline_tools.py
+
+import asyncio
+
+import pytest
+
+from tools.firestore_tools import FirestoreProductTool, FirestoreCareGuideTool, FirestoreCategoryTool
+from tools.observation_renderer import ObservationRenderer
+from tools.product_catalog import ProductCatalog
+from tools.tool_memo import ToolMemo
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Tools as CATALOG_SNAPSHOT_OFFLINE builds them when the snapshot lacks their collection"""
+    monkeypatch.setenv('CATALOG_SNAPSHOT_OFFLINE', 'true')
+    products = FirestoreProductTool.__new__(FirestoreProductTool)
+    products.db, products.catalog, products.vector_index = None, ProductCatalog(), None
+    guides = FirestoreCareGuideTool.__new__(FirestoreCareGuideTool)
+    guides.db, guides.index = None, None
+    categories = FirestoreCategoryTool.__new__(FirestoreCategoryTool)
+    categories.db, categories.catalog = None, None
+    for tool in (products, guides, categories):
+        tool.memo = ToolMemo(ttl_seconds=0)
+        tool.renderer = ObservationRenderer()
+    return products, guides, categories
+
+
+def test_unloaded_collections_give_empty_results(offline):
+    products, guides, categories = offline
+    assert products.find_products("succulents under $20") == []
+    assert guides.find_care_guides("monstera yellow leaves") == []
+    assert categories.find_categories() == []
+
+
+def test_async_paths_never_touch_a_client(offline):
+    products, guides, categories = offline
+
+    async def run():
+        return (await products.afind_products("pet safe plants"), await guides.afind_care_guides("cactus"),
+                await categories.afind_categories())
+
+    assert asyncio.run(run()) == ([], [], [])
+    assert asyncio.run(guides.aget_care_guides("cactus")) == 'No matching care guides found.'
@@ -0,0 +1,67 @@
+# tests/test_query_matcher.py
+
+import pytest
+
+from agent.plant_agent import PlantRecommendationAgent
+from benchmarks.bench_query_matcher import MESSAGES, legacy_analyze_user_query, legacy_parse_query, \
+    make_compiled_runner, run_legacy
+from tools.firestore_tools import FirestoreProductTool
+from tools.query_matcher import match_query
+
+# Messages from the benchmark plus the cases where a phrase scan and a token lookup could differ:
+# multi-word phrases across punctuation, spacing and case, vocabulary inside longer words, and
+# price patterns that overlap each other (all of them are found through one lookahead regex)
+CORPUS = MESSAGES + [
+    "LOW LIGHT house plant for the bathroom",
+    "low  light plants",
+    "low-light, pet-safe plants",
+    "a houseplant for an outdoor garden",
+    "plant food and a ceramic pot",
+    "air purifying plants for full sun or direct sunlight",
+    "need a plant that is non toxic and dog safe",
+    "high maintenance tropical trees",
+    "types of plants for medium light",
+    "how to care for my dying herb, help with the problem with pests",
+    "want a plant: something simple, new and easy",
+    "pottery, planters and a treehouse with darkness",
+    "herbal flowering succulents & cactus",
+    "suggestions for small tabletop or large statement floor plants",
+    "trailing plants under $15",
+    "under $50 but my budget $30",
+    "budget $25 or under $40",
+    "$10 or less than $5",
+    "less than $60 or less",
+    "plants $20 or less",
+    "$10 to $20 indoor plants",
+    "$10-to-$20",
+    "$10 to$20 and under $15",
+    "below $5 or $40 to $90",
+    "under $ 30",
+    "cheap or expensive?",
+    "",
+]
+
+
+@pytest.fixture(scope='module')
+def agent():
+    agent = PlantRecommendationAgent.__new__(PlantRecommendationAgent)
+    agent.product_tool = FirestoreProductTool.__new__(FirestoreProductTool)
+    return agent
+
+
+@pytest.fixture(scope='module')
+def run_compiled():
+    return make_compiled_runner()
+
+
+@pytest.mark.parametrize('message', CORPUS)
+def test_parse_query_and_analysis_match_the_substring_scans(agent, message):
+    match_query.cache_clear()
+    assert agent.product_tool._parse_query(message) == legacy_parse_query(message)
+    assert agent._analyze_user_query(message) == legacy_analyze_user_query(message)
+
+
+@pytest.mark.parametrize('message', CORPUS)
+def test_message_helpers_match_the_substring_scans(run_compiled, message):
+    match_query.cache_clear()
+    assert run_compiled(message) == run_legacy(message)
@@ -0,0 +1,60 @@
+# tests/test_records.py
+
+import pytest
+
+from benchmarks import synthetic_data
+from models.records import ProductRecord, CareGuideRecord, chat_response_json, results_json
+from models.schemas import ChatResponse
+
+
+def agent_output(product_scores, guide_scores, **fields):
+    products = [ProductRecord.from_document(doc_id, data) for doc_id, data in synthetic_data.products(len(product_scores))]
+    guides = [CareGuideRecord.from_document(doc_id, data) for doc_id, data in synthetic_data.care_guides(len(guide_scores))]
+    output = {
+        'response': 'Here are some plants that should do well for you.',
+        'product_recommendations': [record.to_result(score) for record, score in zip(products, product_scores)],
+        'care_guides': [record.to_result(score) for record, score in zip(guides, guide_scores)],
+        'suggested_actions': ['Show similar plants', 'View care guide'],
+        'confidence_score': 0.85,
+        'query_understood': {'original_query': 'easy plants under $30', 'intent': 'product_recommendation',
+                             'keywords': ['easy', 'plants'], 'entities': {'maintenance_level': 'low', 'price_max': 30.0},
+                             'urgency': 'normal'},
+    }
+    output.update(fields)
+    return output
+
+
+@pytest.mark.parametrize('output', [
+    agent_output([1.25, 0.5, 0.333], [4.2, 1.0]),
+    agent_output([None, 0.0], []),
+    agent_output([], [], response='Nothing in stock – try again “soon” 🌱', confidence_score=1, query_understood={}),
+    agent_output([0.9], [2.5], suggested_actions=[]),
+], ids=['full', 'null-score', 'unicode-empty', 'no-actions'])
+def test_chat_response_json_is_byte_identical_to_model_dump_json(output):
+    assert chat_response_json(output) == ChatResponse(**output).model_dump_json().encode('utf-8')
+
+
+def test_fragments_are_reused_across_calls():
+    output = agent_output([0.7], [3.0])
+    first = chat_response_json(output)
+    record = output['product_recommendations'][0].record
+    fragment = record.json_fragment()
+    rescored = dict(output, product_recommendations=[record.to_result(0.2)])
+    assert record.json_fragment() is fragment
+    assert chat_response_json(rescored) == ChatResponse(**rescored).model_dump_json().encode('utf-8')
+    assert chat_response_json(rescored) != first
+
+
+def test_untrusted_output_goes_through_validation():
+    output = agent_output([0.7], [])
+    output['product_recommendations'] = [dict(output['product_recommendations'][0])]
+    assert chat_response_json(output) == ChatResponse(**output).model_dump_json().encode('utf-8')
+
+
+def test_results_json_matches_the_models():
+    output = agent_output([1.5, 0.25], [2.0])
+    model = ChatResponse(**output)
+    products = b'[' + b','.join(p.model_dump_json().encode('utf-8') for p in model.product_recommendations) + b']'
+    guides = b'[' + b','.join(g.model_dump_json().encode('utf-8') for g in model.care_guides) + b']'
+    assert results_json(output['product_recommendations']) == products
+    assert results_json(output['care_guides']) == guides
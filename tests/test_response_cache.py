@@ -0,0 +1,96 @@
+# tests/test_response_cache.py
+
+import pytest
+
+from agent.plant_agent import PlantRecommendationAgent
+from agent.response_cache import ResponseCache
+from benchmarks import fake_firestore, synthetic_data
+from tools.firestore_tools import FirestoreProductTool
+from tools.product_catalog import ProductCatalog
+
+
+@pytest.fixture(scope='module')
+def agent():
+    """Just enough of an agent to compute cache keys with the real query parser"""
+    agent = PlantRecommendationAgent.__new__(PlantRecommendationAgent)
+    agent.product_tool = FirestoreProductTool.__new__(FirestoreProductTool)
+    return agent
+
+
+def answer(*product_ids):
+    return {'response': 'ok', 'product_recommendations': [{'id': product_id} for product_id in product_ids]}
+
+
+def test_invalidation_drops_only_answers_recommending_the_product():
+    cache = ResponseCache()
+    cache.put('a', answer('p1', 'p2'))
+    cache.put('b', answer('p2'))
+    cache.put('c', answer('p3'))
+    cache.invalidate_products(['p2'])
+    assert cache.get('a') is None
+    assert cache.get('b') is None
+    assert cache.get('c') == answer('p3')
+    assert cache.stats()['invalidations'] == 2
+
+
+def test_replaced_answer_is_indexed_by_its_new_products():
+    cache = ResponseCache()
+    cache.put('a', answer('p1'))
+    cache.put('a', answer('p2'))
+    cache.invalidate_products(['p1'])
+    assert cache.get('a') == answer('p2')
+    cache.invalidate_products(['p2'])
+    assert cache.get('a') is None
+
+
+def test_evicted_and_expired_entries_leave_no_product_index():
+    cache = ResponseCache(max_entries=1)
+    cache.put('a', answer('p1'))
+    cache.put('b', answer('p2'))
+    assert cache.get('a') is None
+    assert 'p1' not in cache._keys_by_product
+    expired = ResponseCache(ttl_seconds=-1)
+    expired.put('a', answer('p1'))
+    assert expired.get('a') is None
+    assert expired._keys_by_product == {}
+
+
+def test_catalog_change_invalidates_through_the_listener():
+    products = [(doc_id, data) for doc_id, data in synthetic_data.products(10) if data['stock']['availability']]
+    store = fake_firestore.FakeStore()
+    store.load('products', products)
+    catalog = ProductCatalog()
+    catalog.start(fake_firestore.FakeFirestore(store))
+    cache = ResponseCache()
+    catalog.add_listener(cache.invalidate_products)
+    changed_id, data = products[0]
+    cache.put('changed', answer(changed_id))
+    cache.put('other', answer(products[1][0]))
+
+    store.set('products', changed_id, dict(data, price=data['price'] + 1))
+
+    assert cache.get('changed') is None
+    assert cache.get('other') is not None
+
+
+@pytest.mark.parametrize('first, second', [
+    ("succulents under 30 dollars", "succulents under 50 dollars"),
+    ("pet safe succulents between $10 and $20", "pet safe succulents between $40 and $90"),
+    ("large plants for a 2 year old", "large plants for a 5 year old"),
+])
+def test_numbers_no_filter_explains_keep_their_own_key(agent, first, second):
+    assert agent._cache_key(first) != agent._cache_key(second)
+
+
+@pytest.mark.parametrize('first, second', [
+    ("beginner plants under $30", "easy plants below $30"),
+    ("succulents under $20", "succulent below $20"),
+    ("pet safe succulents $10 to $20", "show me pet safe succulents $10 to $20"),
+])
+def test_paraphrases_share_a_key(agent, first, second):
+    assert agent._cache_key(first) == agent._cache_key(second)
+
+
+def test_only_the_parsed_price_is_dropped(agent):
+    assert agent._cache_key("succulents under $20") != agent._cache_key("succulents under $20 for 2 cats")
+    assert agent._cache_key("succulents under $20") != agent._cache_key("succulents under $30")
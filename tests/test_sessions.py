@@ -0,0 +1,72 @@
+# tests/test_sessions.py
+
+import asyncio
+
+from agent.session_store import SessionStore
+
+STANDALONE = "low light plants for an office"
+
+
+def answer(response, *product_ids):
+    return {'response': response,
+            'product_recommendations': [{'id': product_id, 'title': f'Plant {product_id}', 'price': 10} for product_id in product_ids]}
+
+
+def test_turns_and_products_are_trimmed():
+    store = SessionStore()
+    for turn in range(5):
+        store.record_turn('s', f'message {turn}', answer(f'reply {turn}', *(f'p{turn}-{i}' for i in range(10))))
+    session = store.get('s')
+    assert [message for message, _, _ in session.turns] == ['message 2', 'message 3', 'message 4']
+    assert len(session.summary_lines) == 2 and 'message 1' in session.summary_lines[-1]
+    assert len(session.products) == 24
+    assert list(session.products)[-1] == 'p4-9'
+    assert 'p0-0' not in session.products
+
+
+def test_least_recently_used_and_expired_sessions_are_evicted():
+    store = SessionStore(max_sessions=2)
+    store.record_turn('a', 'hi', answer('hello'))
+    store.record_turn('b', 'hi', answer('hello'))
+    assert store.get('a') is not None  # 'a' is now the most recently used
+    store.record_turn('c', 'hi', answer('hello'))
+    assert store.get('b') is None
+    assert store.get('a') is not None and store.get('c') is not None
+    assert store.stats() == {'sessions': 2, 'evictions': 1}
+
+    expired = SessionStore(ttl_seconds=-1)
+    expired.record_turn('a', 'hi', answer('hello'))
+    assert expired.get('a') is None
+    assert expired.stats()['sessions'] == 0
+
+
+def run(agent, message, session_id=None):
+    return asyncio.run(agent.aget_recommendation(message, session_id=session_id))
+
+
+def test_follow_up_skips_the_response_cache_and_sees_the_session(scripted_agent):
+    run(scripted_agent, "succulents under $20", session_id='follow-up')
+    assert scripted_agent._request_cache_key("cheaper ones?", scripted_agent.sessions.get('follow-up')) is None
+    hits = scripted_agent.response_cache.hits
+    scripted_agent.recorded_inputs.clear()
+
+    run(scripted_agent, "cheaper ones?", session_id='follow-up')
+
+    assert scripted_agent.response_cache.hits == hits
+    context = scripted_agent.recorded_inputs[-1]['conversation_context']
+    assert 'Customer: succulents under $20' in context
+    assert scripted_agent.sessions.get('follow-up').turns[-1][0] == "cheaper ones?"
+
+
+def test_standalone_message_never_carries_another_sessions_turns(scripted_agent):
+    run(scripted_agent, "show me pet safe plants", session_id='private')
+    scripted_agent.recorded_inputs.clear()
+
+    output = run(scripted_agent, STANDALONE, session_id='private')
+    assert scripted_agent.recorded_inputs[-1]['conversation_context'] == "(this is the first message of the conversation)"
+
+    hits = scripted_agent.response_cache.hits
+    shared = run(scripted_agent, STANDALONE, session_id='someone-else')
+    assert scripted_agent.response_cache.hits == hits + 1
+    assert shared['response'] == output['response']
+    assert [message for message, _, _ in scripted_agent.sessions.get('someone-else').turns] == [STANDALONE]
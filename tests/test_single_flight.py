@@ -0,0 +1,138 @@
+# tests/test_single_flight.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tools.single_flight import SingleFlight
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    outcomes = []
+    leader = threading.Thread(target=lambda: outcomes.append(flight.do('k', compute)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: outcomes.append(flight.do('k', compute)))
+    follower.start()
+    wait_until(lambda: flight.coalesced == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == [1]
+    assert sorted(outcomes, key=lambda outcome: outcome[1]) == [('value', False), ('value', True)]
+    assert flight.stats() == {'in_flight': 0, 'executions': 1, 'coalesced': 1}
+
+
+def test_error_is_raised_for_every_waiter():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('k', compute)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    wait_until(lambda: flight.coalesced == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_same_thread_reentry_runs_instead_of_waiting_on_itself():
+    flight = SingleFlight()
+
+    def outer():
+        value, shared = flight.do('k', lambda: 'inner')
+        assert not shared
+        return value + '+outer'
+
+    assert flight.do('k', outer) == ('inner+outer', False)
+    assert flight.stats() == {'in_flight': 0, 'executions': 2, 'coalesced': 0}
+
+
+def test_async_callers_share_one_task_and_it_is_forgotten_afterwards():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def main():
+        return await asyncio.gather(*(flight.ado('k', compute) for _ in range(3)))
+
+    assert asyncio.run(main()) == [('value', False), ('value', True), ('value', True)]
+    assert calls == [1]
+    assert flight.stats() == {'in_flight': 0, 'executions': 1, 'coalesced': 2}
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return 'value'
+
+    async def main():
+        first = asyncio.ensure_future(flight.ado('k', compute))
+        second = asyncio.ensure_future(flight.ado('k', compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ('value', True)
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_async_error_reaches_every_caller_and_clears_the_key():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def main():
+        return await asyncio.gather(flight.ado('k', compute), flight.ado('k', compute), return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert isinstance(first, ValueError) and first is second
+    assert flight.stats()['in_flight'] == 0
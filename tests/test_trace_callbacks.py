@@ -0,0 +1,54 @@
+# tests/test_trace_callbacks.py
+
+import asyncio
+import uuid
+
+from observability.callbacks import TraceCallbackHandler
+from observability.tracing import request_trace, _current_span
+
+
+def leftovers(handler):
+    return len(handler._runs) + len(handler._iterations) + len(handler._tokens)
+
+
+def test_runs_that_never_end_are_dropped_with_the_scope():
+    handler = TraceCallbackHandler()
+    agent, step, llm, tool = (uuid.uuid4() for _ in range(4))
+    with request_trace('test') as root:
+        with handler.request_scope():
+            handler.on_chain_start({}, {}, run_id=agent, name='AgentExecutor')
+            handler.on_chain_start({}, {}, run_id=step, parent_run_id=agent, name='RunnableSequence')
+            handler.on_llm_start({}, ['prompt'], run_id=llm, parent_run_id=step)
+            handler.on_llm_end(None, run_id=llm)
+            handler.on_tool_start({'name': 'search_products'}, 'succulents', run_id=tool, parent_run_id=agent)
+            # Cancelled here: no on_tool_end, on_chain_end or on_chain_error
+            assert (len(handler._runs), len(handler._iterations), len(handler._tokens)) == (3, 1, 1)
+        assert leftovers(handler) == 0
+
+    agent_span = root.children[0] if root is not None else None
+    if agent_span is not None:
+        assert agent_span.error.startswith('CancelledError')
+        iteration = agent_span.children[0]
+        assert iteration.end is not None and iteration.children[-1].error.startswith('CancelledError')
+
+
+def test_finished_runs_outside_the_scope_are_left_alone():
+    handler = TraceCallbackHandler()
+    outside = uuid.uuid4()
+    handler.on_llm_start({}, ['prompt'], run_id=outside)
+    with handler.request_scope():
+        inside = uuid.uuid4()
+        handler.on_llm_start({}, ['prompt'], run_id=inside)
+    assert list(handler._runs) == [outside]
+    assert _current_span.get() is None
+
+
+def test_deadline_cancelled_run_leaves_nothing_behind(scripted_agent):
+    handler = scripted_agent.trace_handler
+    scripted_agent.llm.latency_ms = 300
+    try:
+        output = asyncio.run(scripted_agent.aget_recommendation("Something green for a bathroom shelf", deadline_ms=50))
+    finally:
+        scripted_agent.llm.latency_ms = 0
+    assert output['response']
+    assert leftovers(handler) == 0
@@ -0,0 +1,284 @@
+# tools/care_guide_index.py
+
+import heapq
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable
+
+import numpy as np
+
+from models.records import CareGuideRecord
+from tools.catalog_snapshot import CatalogSnapshot, SnapshotWriter
+
+# Field weights: a term in the title counts as much as three in the body text
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'category': 1.5,
+    'description': 1.0,
+    'quickTips': 1.0,
+    'content': 1.0,
+    'commonProblems': 2.0,
+}
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'do', 'does', 'for', 'from',
+    'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'so', 'that',
+    'the', 'their', 'them', 'there', 'these', 'they', 'this', 'to', 'was', 'what', 'when', 'where',
+    'which', 'why', 'will', 'with', 'you', 'your'
+])
+
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def index_terms(text: str) -> List[str]:
+    """Lowercased, stop-word free terms with a light plural strip ('leaves' -> 'leave')"""
+    terms = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _field_texts(data: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """(field, text) pairs of everything indexed in a care guide document"""
+    for field in ('title', 'category', 'description'):
+        yield field, str(data.get(field) or '')
+    for tip in data.get('quickTips') or []:
+        yield 'quickTips', str(tip)
+    # Malformed entries are skipped, as CareGuideRecord skips them
+    for section in data.get('content') or []:
+        if isinstance(section, dict):
+            yield 'content', f"{section.get('title', '')} {section.get('text', '')}"
+    for problem in data.get('commonProblems') or []:
+        if isinstance(problem, dict):
+            yield 'commonProblems', f"{problem.get('problem', '')} {problem.get('solution', '')}"
+
+
+class CareGuideIndex:
+    """
+    Process-local inverted index over the care_guides collection, ranked with BM25.
+
+    Each guide is held as a CareGuideRecord and tokenized once into field-weighted term
+    frequencies; postings map a term
+    to {guide id: weighted tf}, and document frequencies and lengths are kept current as
+    guides change, so a query costs one postings walk per query term. Like ProductCatalog
+    it is fed by a Firestore snapshot listener and is not `ready` until the first snapshot.
+    A CatalogSnapshot also stores the term frequencies, so loading one skips tokenizing;
+    the listener's first snapshot then replaces the loaded guides, as in ProductCatalog.
+    """
+
+    _shared: Optional['CareGuideIndex'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._watch = None
+        self._listeners: List[Callable[[Iterable[str]], None]] = []
+        self._from_snapshot = False
+
+        self._docs: Dict[str, CareGuideRecord] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._total_length = 0.0
+
+    @classmethod
+    def get_shared(cls, db) -> Optional['CareGuideIndex']:
+        """Return the process-wide index, starting its listener on first use"""
+        if os.getenv("ENABLE_CARE_GUIDE_INDEX", "true").lower() in ("0", "false", "no"):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                index = cls()
+                snapshot = CatalogSnapshot.get_shared()
+                if snapshot is not None and snapshot.has('care_guides'):
+                    index.load_snapshot(snapshot)
+                if db is not None:
+                    try:
+                        index.start(db)
+                    except Exception as e:
+                        print(f"Care guide index listener could not be started: {e}")
+                cls._shared = index
+            return cls._shared
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add_listener(self, callback: Callable[[Iterable[str]], None]):
+        """Register callback(changed_ids), called after each applied batch of changes"""
+        self._listeners.append(callback)
+
+    def start(self, db):
+        self._watch = db.collection('care_guides').on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        was_ready = self.ready
+        changed_ids = []
+        with self._lock:
+            replacing, self._from_snapshot = self._from_snapshot, False
+            delivered = set()
+            for change in changes:
+                doc = change.document
+                delivered.add(doc.id)
+                previous = self._docs.get(doc.id) if replacing else None
+                try:
+                    if change.type.name == 'REMOVED':
+                        self.remove(doc.id)
+                    else:
+                        self.upsert(doc.id, doc.to_dict() or {})
+                except Exception as e:
+                    # One unreadable guide must not hold back the rest of the batch, or readiness
+                    print(f"Care guide index skipped {doc.id}: {e}")
+                    self.remove(doc.id)
+                current = self._docs.get(doc.id)
+                if previous is not None and current is not None and previous.to_document() == current.to_document():
+                    continue
+                changed_ids.append(doc.id)
+            if replacing:
+                # Guides the first snapshot no longer has were deleted after the CatalogSnapshot was written
+                stale = [doc_id for doc_id in self._docs if doc_id not in delivered]
+                for doc_id in stale:
+                    self.remove(doc_id)
+                changed_ids.extend(stale)
+        self._ready.set()
+        if was_ready and changed_ids:
+            for callback in self._listeners:
+                try:
+                    callback(changed_ids)
+                except Exception as e:
+                    print(f"Care guide index listener error: {e}")
+
+    def load(self, docs: List[Tuple[str, Dict[str, Any]]]):
+        """Bulk-load (id, data) pairs and mark the index ready, e.g. for offline use"""
+        with self._lock:
+            for doc_id, data in docs:
+                self.upsert(doc_id, data)
+        self._ready.set()
+
+    # ---- snapshots ----
+
+    def write_snapshot(self, writer: SnapshotWriter):
+        """Add the guides and their weighted term frequencies (terms coded into one table)"""
+        with self._lock:
+            ids = list(self._docs)
+            writer.add_documents('care_guides', ids, (self._docs[doc_id].to_document() for doc_id in ids))
+            term_codes: Dict[str, int] = {}
+            codes, weights, counts = [], [], []
+            for doc_id in ids:
+                doc_terms = self._doc_terms[doc_id]
+                counts.append(len(doc_terms))
+                for term, tf in doc_terms.items():
+                    codes.append(term_codes.setdefault(term, len(term_codes)))
+                    weights.append(tf)
+            writer.add_strings('care_guides', 'terms', list(term_codes))
+            writer.add_array('care_guides', 'term_counts', np.array(counts, dtype=np.int64))
+            writer.add_array('care_guides', 'term_codes', np.array(codes, dtype=np.int32))
+            writer.add_array('care_guides', 'term_weights', np.array(weights, dtype=np.float64))
+
+    def load_snapshot(self, snapshot: CatalogSnapshot):
+        """Replace the contents with a snapshot's guides and mark the index ready"""
+        self._from_snapshot = True
+        ids = snapshot.ids('care_guides')
+        terms = snapshot.strings('care_guides', 'terms').tolist()
+        counts = snapshot.array('care_guides', 'term_counts').tolist()
+        codes = snapshot.array('care_guides', 'term_codes').tolist()
+        weights = snapshot.array('care_guides', 'term_weights').tolist()
+        with self._lock:
+            self._docs = snapshot.documents('care_guides', ids, CareGuideRecord.from_document)
+            self._doc_terms, self._doc_lengths, self._postings = {}, {}, {}
+            self._total_length = 0.0
+            start = 0
+            for doc_id, count in zip(ids, counts):
+                doc_terms = {terms[code]: tf for code, tf in zip(codes[start:start + count], weights[start:start + count])}
+                start += count
+                self._doc_terms[doc_id] = doc_terms
+                length = sum(doc_terms.values())
+                self._doc_lengths[doc_id] = length
+                self._total_length += length
+                for term, tf in doc_terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+        self._ready.set()
+
+    # ---- maintenance of the index ----
+
+    def upsert(self, doc_id: str, data: Dict[str, Any]):
+        weighted = Counter()
+        for field, text in _field_texts(data):
+            weight = FIELD_WEIGHTS[field]
+            for term in index_terms(text):
+                weighted[term] += weight
+
+        with self._lock:
+            if doc_id in self._docs:
+                self.remove(doc_id)
+            self._docs[doc_id] = CareGuideRecord.from_document(doc_id, data)
+            self._doc_terms[doc_id] = dict(weighted)
+            length = sum(weighted.values())
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+            for term, tf in weighted.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            if doc_id not in self._docs:
+                return
+            del self._docs[doc_id]
+            for term in self._doc_terms.pop(doc_id):
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._doc_lengths.pop(doc_id)
+
+    # ---- lookups ----
+
+    def get(self, doc_id: str) -> Optional[CareGuideRecord]:
+        return self._docs.get(doc_id)
+
+    def all(self) -> List[Tuple[str, CareGuideRecord]]:
+        with self._lock:
+            return list(self._docs.items())
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, CareGuideRecord, float]]:
+        """Top k (id, record, BM25 score) for a free-text query; empty if no query term is indexed"""
+        terms = set(index_terms(query))
+        with self._lock:
+            doc_count = len(self._docs)
+            if not terms or not doc_count:
+                return []
+            avg_length = self._total_length / doc_count or 1.0
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(doc_id, self._docs[doc_id], score) for doc_id, score in best]
@@ -0,0 +1,305 @@
+# tools/catalog_snapshot.py
+
+import datetime
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Callable
+
+import numpy as np
+
+MAGIC = b'BOTSNAP\x01'
+FORMAT_VERSION = 1
+# Every column starts on this boundary so it can be viewed in place from the mapping
+ALIGNMENT = 64
+
+_MISSING = object()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_document(data: Dict[str, Any]) -> str:
+    """Documents are stored as compact JSON; timestamps become ISO strings"""
+    return json.dumps(data, default=_json_default, separators=(',', ':'), ensure_ascii=False)
+
+
+class StringColumn:
+    """Variable-length UTF-8 strings: an offsets array (n + 1) into one byte array"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return self._data[start:end].tobytes().decode('utf-8')
+
+    def tolist(self) -> List[str]:
+        offsets = self._offsets.tolist()
+        data = self._data.tobytes()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+class SnapshotDocuments(MutableMapping):
+    """
+    id -> document mapping over a snapshot's JSON column. Documents are decoded on first
+    access (and turned into factory(id, document), e.g. a record) and cached; values set
+    or removed afterwards (live changes) shadow the snapshot rows. Used by the catalogs in
+    place of their plain dict of documents.
+    """
+
+    def __init__(self, ids: List[str], documents: StringColumn, factory: Callable[[str, Dict[str, Any]], Any] = None):
+        self._documents = documents
+        self._factory = factory
+        self._rows: Dict[str, int] = {doc_id: row for row, doc_id in enumerate(ids)}
+        self._decoded: Dict[str, Dict[str, Any]] = {}
+        self._values: Dict[str, Dict[str, Any]] = {}
+
+    def _decode(self, doc_id: str, row: int):
+        data = json.loads(self._documents[row])
+        return self._factory(doc_id, data) if self._factory is not None else data
+
+    def __getitem__(self, doc_id: str):
+        data = self._values.get(doc_id)
+        if data is not None:
+            return data
+        data = self._decoded.get(doc_id)
+        if data is None:
+            row = self._rows.get(doc_id)
+            if row is None:
+                raise KeyError(doc_id)
+            data = self._decoded.setdefault(doc_id, self._decode(doc_id, row))
+        return data
+
+    def __setitem__(self, doc_id: str, data):
+        self._values[doc_id] = data
+        self._rows.pop(doc_id, None)
+        self._decoded.pop(doc_id, None)
+
+    def __delitem__(self, doc_id: str):
+        # A removed snapshot row is never decoded (the catalogs remove with `in` and del)
+        if self._values.pop(doc_id, None) is None and self._rows.pop(doc_id, None) is None:
+            raise KeyError(doc_id)
+        self._decoded.pop(doc_id, None)
+
+    def pop(self, doc_id: str, default=_MISSING):
+        """The removed document, which is decoded if it was not yet; del drops it without decoding"""
+        data = self._values.pop(doc_id, None)
+        if data is None and doc_id in self._rows:
+            data = self._decoded.pop(doc_id, None)
+            row = self._rows.pop(doc_id)
+            if data is None:
+                data = self._decode(doc_id, row)
+        if data is None:
+            if default is _MISSING:
+                raise KeyError(doc_id)
+            return default
+        return data
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._values or doc_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._rows) + list(self._values))
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._values)
+
+
+class SnapshotWriter:
+    """Collects named columns per collection and writes them as one snapshot file"""
+
+    def __init__(self, taken_at: float):
+        self.taken_at = taken_at
+        self._collections: Dict[str, Dict[str, Any]] = {}
+
+    def _collection(self, collection: str) -> Dict[str, Any]:
+        return self._collections.setdefault(collection, {'count': 0, 'meta': {}, 'arrays': {}})
+
+    def add_array(self, collection: str, name: str, array: np.ndarray):
+        self._collection(collection)['arrays'][name] = np.ascontiguousarray(array)
+
+    def add_strings(self, collection: str, name: str, values: Iterable[str]):
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        self.add_array(collection, name + '.offsets', offsets)
+        self.add_array(collection, name + '.data', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    def add_documents(self, collection: str, ids: List[str], documents: Iterable[Dict[str, Any]]):
+        """The ids and JSON documents every collection has; sets the collection's row count"""
+        self._collection(collection)['count'] = len(ids)
+        self.add_strings(collection, 'ids', ids)
+        self.add_strings(collection, 'documents', (encode_document(data) for data in documents))
+
+    def set_meta(self, collection: str, key: str, value: Any):
+        self._collection(collection)['meta'][key] = value
+
+    def write(self, path: str):
+        """Write atomically: the file is only replaced once it is complete"""
+        layout = {}
+        blobs = []
+        offset = 0
+        for collection, entry in self._collections.items():
+            columns = {}
+            for name, array in entry['arrays'].items():
+                offset = -(-offset // ALIGNMENT) * ALIGNMENT
+                columns[name] = {'dtype': array.dtype.str, 'offset': offset, 'length': len(array)}
+                blobs.append((offset, array))
+                offset += array.nbytes
+            layout[collection] = {'count': entry['count'], 'meta': entry['meta'], 'columns': columns}
+
+        header = json.dumps({
+            'format': FORMAT_VERSION, 'taken_at': self.taken_at, 'written_at': time.time(), 'collections': layout,
+        }).encode('utf-8')
+        data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            for blob_offset, array in blobs:
+                f.seek(data_start + blob_offset)
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+
+
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped catalog snapshot written by SnapshotWriter.
+
+    Layout: MAGIC, the header length, a JSON header (taken_at and, per collection, the row
+    count, metadata and each column's dtype/offset/length), then the column data, each
+    column aligned so NumPy views it in place. Strings are offsets into one UTF-8 byte
+    column, categorical fields are integer codes plus a string table, and every collection
+    has `ids` and `documents` (one JSON document per row, decoded lazily). Opening a
+    snapshot reads only the header; the catalogs copy the columns they index and keep
+    the documents mapped.
+    """
+
+    _shared: Optional['CatalogSnapshot'] = None
+    _shared_loaded = False
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        (header_length,) = struct.unpack_from('<Q', self._map, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._map[header_start:header_start + header_length])
+        if header.get('format') != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {header.get('format')}, expected {FORMAT_VERSION}")
+        self._data_start = -(-(header_start + header_length) // ALIGNMENT) * ALIGNMENT
+        self.taken_at: float = header['taken_at']
+        self.written_at: float = header.get('written_at', self.taken_at)
+        self._collections: Dict[str, Dict[str, Any]] = header['collections']
+
+    @classmethod
+    def get_shared(cls) -> Optional['CatalogSnapshot']:
+        """The snapshot named by CATALOG_SNAPSHOT_PATH, opened once per process (None if unset or unreadable)"""
+        with cls._shared_lock:
+            if not cls._shared_loaded:
+                cls._shared_loaded = True
+                path = os.getenv("CATALOG_SNAPSHOT_PATH")
+                if path:
+                    try:
+                        cls._shared = cls(path)
+                    except (OSError, ValueError) as e:
+                        print(f"Catalog snapshot {path} could not be opened: {e}")
+            return cls._shared
+
+    def has(self, collection: str) -> bool:
+        return collection in self._collections
+
+    def count(self, collection: str) -> int:
+        return self._collections[collection]['count']
+
+    def meta(self, collection: str, key: str, default: Any = None) -> Any:
+        return self._collections[collection]['meta'].get(key, default)
+
+    def array(self, collection: str, name: str) -> np.ndarray:
+        """A read-only view of the column inside the mapping (no copy)"""
+        column = self._collections[collection]['columns'][name]
+        if not column['length']:
+            return np.empty(0, dtype=np.dtype(column['dtype']))
+        return np.frombuffer(self._map, dtype=np.dtype(column['dtype']), count=column['length'],
+                             offset=self._data_start + column['offset'])
+
+    def strings(self, collection: str, name: str) -> StringColumn:
+        return StringColumn(self.array(collection, name + '.offsets'), self.array(collection, name + '.data'))
+
+    def ids(self, collection: str) -> List[str]:
+        return self.strings(collection, 'ids').tolist()
+
+    def documents(self, collection: str, ids: List[str] = None, factory: Callable[[str, Dict[str, Any]], Any] = None) -> SnapshotDocuments:
+        return SnapshotDocuments(ids if ids is not None else self.ids(collection), self.strings(collection, 'documents'), factory)
+
+
+def export_snapshot(db, path: str) -> CatalogSnapshot:
+    """
+    Read the in-stock products, care guides and categories from db and write them as a
+    snapshot to path. taken_at is the time before the first read; anything changed while
+    exporting is corrected when the catalogs' listeners replace the loaded rows.
+    """
+    # Imported here: the catalogs themselves import this module
+    from tools.product_catalog import ProductCatalog
+    from tools.care_guide_index import CareGuideIndex
+    from tools.category_catalog import CategoryCatalog
+
+    taken_at = time.time()
+    products = ProductCatalog()
+    products.load([(doc.id, doc.to_dict() or {})
+                   for doc in db.collection('products').where('stock.availability', '==', True).stream()])
+    guides = CareGuideIndex()
+    guides.load([(doc.id, doc.to_dict() or {}) for doc in db.collection('care_guides').stream()])
+    categories = CategoryCatalog()
+    categories.load([(doc.id, doc.to_dict() or {}) for doc in db.collection('categories').stream()])
+
+    writer = SnapshotWriter(taken_at)
+    products.write_snapshot(writer)
+    guides.write_snapshot(writer)
+    categories.write_snapshot(writer)
+    writer.write(path)
+    return CatalogSnapshot(path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Write or inspect a catalog snapshot')
+    parser.add_argument('command', choices=('export', 'info'))
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        from dotenv import load_dotenv
+        from config.firebase_config import FirebaseConfig
+        load_dotenv()
+        start = time.perf_counter()
+        snapshot = export_snapshot(FirebaseConfig.get_db(), args.path)
+        print(f"Wrote {args.path} in {time.perf_counter() - start:.1f}s")
+    else:
+        snapshot = CatalogSnapshot(args.path)
+
+    taken = datetime.datetime.fromtimestamp(snapshot.taken_at, tz=datetime.timezone.utc)
+    print(f"{snapshot.path}: {os.path.getsize(snapshot.path):,} bytes, taken at {taken.isoformat()}")
+    for collection in snapshot._collections:
+        print(f"  {collection}: {snapshot.count(collection):,} documents")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# tools/category_catalog.py
+
+import os
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+
+from tools.catalog_snapshot import CatalogSnapshot, SnapshotWriter
+from tools.product_catalog import ProductCatalog
+
+
+class CategoryCatalog:
+    """
+    Process-local copy of the categories collection, kept current by a snapshot listener.
+
+    The structured category list is built once per change, not per call: when a category
+    document changes, or when the ProductCatalog applies a batch of product changes, since
+    product_count is the number of in-stock products in the category, which the catalog
+    adjusts from each added, changed or removed product instead of counting its columns
+    (the stored product_count is only used while no catalog is available).
+    `version` increases on every rebuild so callers can cache anything derived from it.
+    """
+
+    _shared: Optional['CategoryCatalog'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, product_catalog: Optional[ProductCatalog] = None):
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._watch = None
+        # False until the listener's first snapshot, which replaces what load() put in
+        self._synced = False
+        self.product_catalog = product_catalog
+
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._categories: List[Dict[str, Any]] = []
+        self._live_counts = False
+        self.version = 0
+
+        if product_catalog is not None:
+            product_catalog.add_listener(self._on_products_changed)
+
+    @classmethod
+    def get_shared(cls, db) -> Optional['CategoryCatalog']:
+        """Return the process-wide category catalog, starting its listener on first use"""
+        if os.getenv("ENABLE_CATEGORY_CATALOG", "true").lower() in ("0", "false", "no"):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                catalog = cls(ProductCatalog.get_shared(db))
+                snapshot = CatalogSnapshot.get_shared()
+                if snapshot is not None and snapshot.has('categories'):
+                    catalog.load(list(snapshot.documents('categories').items()))
+                if db is not None:
+                    try:
+                        catalog.start(db)
+                    except Exception as e:
+                        print(f"Category catalog listener could not be started: {e}")
+                cls._shared = catalog
+            return cls._shared
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, db):
+        self._watch = db.collection('categories').on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        with self._lock:
+            if not self._synced:
+                self._synced = True
+                self._docs = {}
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    self._docs.pop(doc.id, None)
+                else:
+                    self._docs[doc.id] = doc.to_dict() or {}
+            self._rebuild()
+        self._ready.set()
+
+    def _on_products_changed(self, changed_ids: Iterable[str]):
+        with self._lock:
+            self._rebuild()
+
+    def load(self, docs: List[Tuple[str, Dict[str, Any]]]):
+        """Bulk-load (id, data) pairs and mark the catalog ready, e.g. for offline use"""
+        with self._lock:
+            for doc_id, data in docs:
+                self._docs[doc_id] = data
+            self._rebuild()
+        self._ready.set()
+
+    def write_snapshot(self, writer: SnapshotWriter):
+        with self._lock:
+            ids = list(self._docs)
+            writer.add_documents('categories', ids, (self._docs[doc_id] for doc_id in ids))
+
+    def categories(self) -> List[Dict[str, Any]]:
+        """The current category list (shared; treat as read-only)"""
+        if not self._live_counts and self.product_catalog is not None and self.product_catalog.ready:
+            # The product catalog finished loading after the categories did
+            with self._lock:
+                self._rebuild()
+        return self._categories
+
+    def _rebuild(self):
+        products = self.product_catalog
+        self._live_counts = products is not None and products.ready
+        categories = []
+        for doc_id, data in self._docs.items():
+            name = data.get('name', '')
+            count = products.count_by('category', name) if self._live_counts else data.get('product_count', 0)
+            categories.append({'id': doc_id, 'name': name, 'description': data.get('description', ''), 'product_count': count})
+        self._categories = categories
+        self.version += 1
@@ -0,0 +1,115 @@
+# tools/firestore_access.py
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterable
+
+from config.firebase_config import FirebaseConfig
+from observability.metrics import FIRESTORE_SECONDS, FIRESTORE_ERRORS
+from observability.tracing import span
+
+# Field projections (select()) per consumer: only these fields are read and transferred.
+# Ranking a product needs the filter/score fields; building its result card needs the rest.
+PRODUCT_RANKING_FIELDS = [
+    'price', 'category', 'type', 'stock',
+    'details.maintenance', 'details.sunlight', 'details.toxicity', 'details.specialFeatures',
+]
+PRODUCT_FIELDS = [
+    'title', 'imageSrc', 'price', 'description', 'link', 'category', 'subCategory', 'type', 'details', 'stock',
+]
+CARE_GUIDE_FIELDS = [
+    'title', 'description', 'category', 'difficulty', 'imageURL', 'publishDate', 'author', 'quickTips',
+    'wateringTips', 'lightTips', 'temperatureTips', 'fertilizerTips', 'content', 'expertTip',
+    'expertName', 'expertTitle', 'commonProblems',
+]
+CATEGORY_FIELDS = ['name', 'description', 'product_count']
+
+# Independent queries issued at once by one call
+MAX_CONCURRENT_QUERIES = 8
+
+
+class FirestoreAccess:
+    """
+    Shared data access over FirebaseConfig's clients for the paths that still read Firestore.
+
+    Independent queries are issued concurrently (worker threads for the sync client,
+    asyncio.gather for the async one), documents known by id are fetched in one batched
+    get_all round trip, and counts use aggregation queries so no document is transferred.
+    Callers apply the select() projection that fits what they read (see *_FIELDS above).
+    """
+
+    _shared: Optional['FirestoreAccess'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else FirebaseConfig.get_db()
+        self._pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_QUERIES, thread_name_prefix='firestore_access')
+
+    @classmethod
+    def get_shared(cls) -> 'FirestoreAccess':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    # ---- concurrent queries ----
+
+    def run_queries(self, collection: str, queries: List[Any]) -> List[List[Any]]:
+        """Document snapshots of every query, fetched concurrently (None queries give [])"""
+        def fetch(query):
+            with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection=collection, operation='query'):
+                return list(query.stream())
+        # Workers run in a copy of this context so their spans join the request trace
+        futures = [self._pool.submit(contextvars.copy_context().run, fetch, query) if query is not None else None
+                   for query in queries]
+        return [future.result() if future is not None else [] for future in futures]
+
+    async def arun_queries(self, collection: str, queries: List[Any]) -> List[List[Any]]:
+        """Async variant for queries built on FirebaseConfig.get_async_db()"""
+        async def fetch(query):
+            if query is None:
+                return []
+            with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection=collection, operation='query'):
+                return [doc async for doc in query.stream()]
+        return list(await asyncio.gather(*(fetch(query) for query in queries)))
+
+    # ---- batched reads by id ----
+
+    def get_many(self, collection: str, doc_ids: Iterable[str], fields: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Documents by id in one get_all round trip; ids that do not exist are left out"""
+        refs = [self.db.collection(collection).document(doc_id) for doc_id in dict.fromkeys(doc_ids)]
+        if not refs:
+            return {}
+        with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection=collection, operation='get_all'):
+            return {doc.id: doc.to_dict() or {} for doc in self.db.get_all(refs, field_paths=fields) if doc.exists}
+
+    async def aget_many(self, collection: str, doc_ids: Iterable[str], fields: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        db = FirebaseConfig.get_async_db()
+        refs = [db.collection(collection).document(doc_id) for doc_id in dict.fromkeys(doc_ids)]
+        if not refs:
+            return {}
+        with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection=collection, operation='get_all'):
+            return {doc.id: doc.to_dict() or {} async for doc in db.get_all(refs, field_paths=fields) if doc.exists}
+
+    # ---- aggregations ----
+
+    def count_many(self, collection: str, queries: List[Any]) -> List[int]:
+        """Matching document counts of every query, as concurrent count() aggregations"""
+        def count(query):
+            with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection=collection, operation='count'):
+                return _count_value(query.count().get())
+        futures = [self._pool.submit(contextvars.copy_context().run, count, query) for query in queries]
+        return [future.result() for future in futures]
+
+    async def acount_many(self, collection: str, queries: List[Any]) -> List[int]:
+        async def count(query):
+            with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection=collection, operation='count'):
+                return _count_value(await query.count().get())
+        return list(await asyncio.gather(*(count(query) for query in queries)))
+
+
+def _count_value(results) -> int:
+    """The value of a single count() aggregation result ([[AggregationResult]])"""
+    return int(results[0][0].value) if results and results[0] else 0
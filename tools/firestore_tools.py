@@ -2,13 +2,47 @@
 
 from langchain.tools import Tool
 from config.firebase_config import FirebaseConfig
-import json
-from typing import List, Dict, Any
+from models.records import ProductRecord, CareGuideRecord
+from tools.product_catalog import ProductCatalog
+from tools.product_vector_index import ProductVectorIndex
+from tools.care_guide_index import CareGuideIndex
+from tools.category_catalog import CategoryCatalog
+from tools.firestore_access import (
+    FirestoreAccess, PRODUCT_RANKING_FIELDS, PRODUCT_FIELDS, CARE_GUIDE_FIELDS, CATEGORY_FIELDS
+)
+from tools.tool_memo import ToolMemo, memo_key
+from tools.result_store import record_result
+from tools.observation_renderer import ObservationRenderer
+from observability.metrics import FIRESTORE_SECONDS, FIRESTORE_ERRORS
+from observability.tracing import span
+from tools.query_matcher import (
+    match_query, LOW_MAINTENANCE_TERMS, HIGH_MAINTENANCE_TERMS, SUNLIGHT_TERMS,
+    CATEGORY_KEYWORDS, SUB_CATEGORY_KEYWORDS, TYPE_KEYWORDS, PET_SAFE_TERMS
+)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
 import re
+from typing import List, Dict, Any, Tuple
+
+# multi_search: separators between query variants, how many variants run, and the
+# reciprocal rank fusion constant (the usual 60; larger values flatten rank differences)
+MULTI_SEARCH_SEPARATORS = re.compile(r'[;|\n]')
+MULTI_SEARCH_MAX_VARIANTS = 5
+RRF_K = 60
 
 class FirestoreProductTool:
-    def __init__(self):
+    def __init__(self, memo: ToolMemo = None, renderer: ObservationRenderer = None):
         self.db = FirebaseConfig.get_db()
+        self.catalog = ProductCatalog.get_shared(self.db)
+        # Retrieval stage for free text that _parse_query finds no filters in
+        self.vector_index = ProductVectorIndex.get_shared(self.catalog)
+        self.access = FirestoreAccess.get_shared()
+        # Without a shared memo, identical searches are still deduplicated within one agent run
+        self.memo = memo if memo is not None else ToolMemo(ttl_seconds=0)
+        self.renderer = renderer or ObservationRenderer()
+        # Worker threads for multi_search (started on first use)
+        self._pool = ThreadPoolExecutor(max_workers=MULTI_SEARCH_MAX_VARIANTS, thread_name_prefix='multi_search')
     
     def search_products(self, query: str) -> str:
         """
@@ -16,192 +50,253 @@ class FirestoreProductTool:
         Query format: "beginner plants under $50 for low light"
         """
         try:
-            products_ref = self.db.collection('products')
-            filters = self._parse_query(query)
-            
-            query_ref = products_ref.where('stock.availability', '==', True)
-            
-            if filters.get('category'):
-                query_ref = query_ref.where('category', '==', filters['category'])
-            
-            if filters.get('sub_category'):
-                query_ref = query_ref.where('subCategory', '==', filters['sub_category'])
+            products = self.find_products(query)
+            record_result('search_products', query, products)
+            return self.renderer.render('search_products', products)
             
-            if filters.get('type'):
-                query_ref = query_ref.where('type', '==', filters['type'])
-            
-            docs = query_ref.limit(50).stream()
-            
-            products = []
-            for doc in docs:
-                data = doc.to_dict()
-                
-                if filters.get('price_max') and data.get('price', 0) > filters['price_max']:
-                    continue
-                
-                if filters.get('price_min') and data.get('price', 0) < filters['price_min']:
-                    continue
-                
-                maintenance = data.get('details', {}).get('maintenance', '').lower()
-                if filters.get('maintenance_level'):
-                    if filters['maintenance_level'] == 'low' and 'low' not in maintenance:
-                        continue
-                    elif filters['maintenance_level'] == 'high' and 'high' not in maintenance:
-                        continue
-                
-                sunlight = data.get('details', {}).get('sunlight', '').lower()
-                if filters.get('sunlight') and filters['sunlight'] not in sunlight:
-                    continue
-                
-                if filters.get('pet_safe'):
-                    toxicity = data.get('details', {}).get('toxicity', '').lower()
-                    if 'toxic' in toxicity or 'poisonous' in toxicity:
-                        continue
-                
-                product = {
-                    'id': doc.id,  # <--- ADDED PRODUCT ID (FIRESTORE DOCUMENT ID)
-                    'title': data.get('title', ''),
-                    'imageSrc': data.get('imageSrc', ''),
-                    'price': data.get('price', 0),
-                    'description': data.get('description', ''),
-                    'link': data.get('link', ''),
-                    'category': data.get('category', ''),
-                    'subCategory': data.get('subCategory', ''),
-                    'type': data.get('type', ''),
-                    'details': {
-                        'scientificName': data.get('details', {}).get('scientificName', ''),
-                        'sunlight': data.get('details', {}).get('sunlight', ''),
-                        'watering': data.get('details', {}).get('watering', ''),
-                        'growthRate': data.get('details', {}).get('growthRate', ''),
-                        'maintenance': data.get('details', {}).get('maintenance', ''),
-                        'bloomSeason': data.get('details', {}).get('bloomSeason', ''),
-                        'specialFeatures': data.get('details', {}).get('specialFeatures', ''),
-                        'toxicity': data.get('details', {}).get('toxicity', ''),
-                        'material': data.get('details', {}).get('material', ''),
-                        'drainageHoles': data.get('details', {}).get('drainageHoles', False),
-                        'size': data.get('details', {}).get('size', ''),
-                        'color': data.get('details', {}).get('color', ''),
-                        'useCase': data.get('details', {}).get('useCase', '')
-                    },
-                    'stock': {
-                        'availability': data.get('stock', {}).get('availability', True),
-                        'quantity': data.get('stock', {}).get('quantity', 0)
-                    },
-                    'match_score': self._calculate_match_score(data, filters)
-                }
-                
-                products.append(product)
+        except Exception as e:
+            return f"Error searching products: {str(e)}"
+
+    async def asearch_products(self, query: str) -> str:
+        """Async variant of search_products used by the non-blocking /chat path"""
+        try:
+            products = await self.afind_products(query)
+            record_result('search_products', query, products)
+            return self.renderer.render('search_products', products)
             
-            products.sort(key=lambda x: x['match_score'], reverse=True)
-            products = products[:8]
+        except Exception as e:
+            return f"Error searching products: {str(e)}"
+
+    def multi_search(self, queries: str) -> str:
+        """
+        Run several query variants at once, e.g. "low light plants; pet safe plants; under $30",
+        and return one merged ranking
+        """
+        try:
+            products = self.find_products_multi(self._split_variants(queries))
+            record_result('search_products', queries, products)
+            return self.renderer.render('search_products', products)
             
-            return json.dumps(products, indent=2)
+        except Exception as e:
+            return f"Error searching products: {str(e)}"
+
+    async def amulti_search(self, queries: str) -> str:
+        try:
+            variants = self._split_variants(queries)
+            results = await asyncio.gather(*(self.afind_products(variant) for variant in variants), return_exceptions=True)
+            products = fuse_rankings(self._successful_rankings(variants, results))
+            record_result('search_products', queries, products)
+            return self.renderer.render('search_products', products)
             
         except Exception as e:
             return f"Error searching products: {str(e)}"
 
+    def find_products_multi(self, variants: List[str]) -> List[Dict[str, Any]]:
+        """Search every variant concurrently and fuse the rankings"""
+        if len(variants) == 1:
+            return self.find_products(variants[0])
+        # Each worker runs in a copy of this context so the per-request memo is still used
+        futures = [self._pool.submit(contextvars.copy_context().run, self.find_products, variant) for variant in variants]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return fuse_rankings(self._successful_rankings(variants, results))
+
+    def _successful_rankings(self, variants: List[str], results: List[Any]) -> List[List[Dict[str, Any]]]:
+        """Rankings of the variants that succeeded; raises only when every variant failed"""
+        rankings = []
+        for variant, result in zip(variants, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                print(f"multi_search variant '{variant}' failed: {result}")
+            else:
+                rankings.append(result)
+        if not rankings:
+            raise results[0]
+        return rankings
+
+    def _split_variants(self, queries: str) -> List[str]:
+        """Distinct query variants (by parsed filters), at most MULTI_SEARCH_MAX_VARIANTS"""
+        variants = {}
+        for variant in MULTI_SEARCH_SEPARATORS.split(queries):
+            variant = variant.strip()
+            if variant:
+                variants.setdefault(self._memo_key(variant, self._parse_query(variant)), variant)
+        return list(variants.values())[:MULTI_SEARCH_MAX_VARIANTS] or [queries]
+
+    def find_products(self, query: str) -> List[Dict[str, Any]]:
+        """Structured search results (best 8 matches) for a natural language query"""
+        filters = self._parse_query(query)
+        if not filters and self._free_text_search_available():
+            text = ' '.join(query.lower().split())
+            return self.memo.get_or_compute(self._memo_key(query, filters), lambda: self._find_similar_products(text))
+        return self.memo.get_or_compute(self._memo_key(query, filters), lambda: self._find_products(filters))
+
+    async def afind_products(self, query: str) -> List[Dict[str, Any]]:
+        filters = self._parse_query(query)
+        if not filters and self._free_text_search_available():
+            # In memory but CPU-bound: scored on a worker thread so the event loop keeps serving
+            text = ' '.join(query.lower().split())
+            loop = asyncio.get_running_loop()
+            return await self.memo.aget_or_compute(self._memo_key(query, filters), lambda: loop.run_in_executor(
+                None, contextvars.copy_context().run, self._find_similar_products, text))
+        return await self.memo.aget_or_compute(self._memo_key(query, filters), lambda: self._afind_products(filters))
+
+    def _memo_key(self, query: str, filters: Dict[str, Any]) -> str:
+        if not filters and self._free_text_search_available():
+            # Free-text results depend on the words themselves, not on the (empty) filters
+            return memo_key('search_products', {'text': ' '.join(query.lower().split())})
+        return memo_key('search_products', filters)
+
+    def _free_text_search_available(self) -> bool:
+        return self.vector_index is not None and self.vector_index.ready
+
+    def _find_similar_products(self, text: str) -> List[Dict[str, Any]]:
+        """Free text matched against product descriptions in the local vector index"""
+        products = []
+        for doc_id, similarity in self.vector_index.search(text, k=8):
+            record = self.catalog.get(doc_id)
+            if record is not None:
+                products.append(record.to_result(round(similarity, 3), similarity))
+        # Nothing similar enough: same unfiltered results as before
+        return products or self._find_products({})
+
+    def _find_products(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self.catalog is not None and self.catalog.ready:
+            return self._catalog_top_matches(filters)
+        if self.db is None:
+            # Offline (CATALOG_SNAPSHOT_OFFLINE) without the products in the snapshot: nothing to search
+            return []
+        ranked = self._rank_candidates(self._query_firestore(filters), filters)
+        docs = self.access.get_many('products', [doc_id for doc_id, _ in ranked], PRODUCT_FIELDS)
+        return self._build_ranked(ranked, docs, filters)
+
+    async def _afind_products(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self.catalog is not None and self.catalog.ready:
+            return self._catalog_top_matches(filters)
+        if self.db is None:
+            return []
+        ranked = self._rank_candidates(await self._aquery_firestore(filters), filters)
+        docs = await self.access.aget_many('products', [doc_id for doc_id, _ in ranked], PRODUCT_FIELDS)
+        return self._build_ranked(ranked, docs, filters)
+
+    def _catalog_top_matches(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Every in-stock match is filtered and scored in the catalog's columns; only the best 8 are built"""
+        return [record.to_result(score) for _, record, score in self.catalog.top_matches(filters, 8)]
+
+    def _rank_candidates(self, candidates: List[Tuple[str, Dict[str, Any]]], filters: Dict[str, Any]) -> List[Tuple[str, float]]:
+        """Best 8 (id, match_score) among candidates that carry only the ranking fields"""
+        scored = [(doc_id, self._calculate_match_score(data, filters)) for doc_id, data in candidates]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[:8]
+
+    def _build_ranked(self, ranked: List[Tuple[str, float]], docs: Dict[str, Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # A product deleted between the ranking query and the batched fetch is skipped
+        return [ProductRecord.from_document(doc_id, docs[doc_id]).to_result(score) for doc_id, score in ranked if doc_id in docs]
+
+    def _build_firestore_query(self, db, filters: Dict[str, Any]):
+        query_ref = db.collection('products').where('stock.availability', '==', True)
+        
+        if filters.get('category'):
+            query_ref = query_ref.where('category', '==', filters['category'])
+        
+        if filters.get('sub_category'):
+            query_ref = query_ref.where('subCategory', '==', filters['sub_category'])
+        
+        if filters.get('type'):
+            query_ref = query_ref.where('type', '==', filters['type'])
+        
+        # Only what _passes_filters and _calculate_match_score read; the 8 best are fetched in full afterwards
+        return query_ref.select(PRODUCT_RANKING_FIELDS).limit(50)
+
+    def _query_firestore(self, filters: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Fallback used while the product catalog is not loaded"""
+        candidates = []
+        with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection='products', operation='query'):
+            for doc in self._build_firestore_query(self.db, filters).stream():
+                data = doc.to_dict()
+                if self._passes_filters(data, filters):
+                    candidates.append((doc.id, data))
+        return candidates
+
+    async def _aquery_firestore(self, filters: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        candidates = []
+        with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection='products', operation='query'):
+            async for doc in self._build_firestore_query(FirebaseConfig.get_async_db(), filters).stream():
+                data = doc.to_dict()
+                if self._passes_filters(data, filters):
+                    candidates.append((doc.id, data))
+        return candidates
+
+    def _passes_filters(self, data: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        if filters.get('price_max') and data.get('price', 0) > filters['price_max']:
+            return False
+        
+        if filters.get('price_min') and data.get('price', 0) < filters['price_min']:
+            return False
+        
+        maintenance = data.get('details', {}).get('maintenance', '').lower()
+        if filters.get('maintenance_level'):
+            if filters['maintenance_level'] == 'low' and 'low' not in maintenance:
+                return False
+            elif filters['maintenance_level'] == 'high' and 'high' not in maintenance:
+                return False
+        
+        sunlight = data.get('details', {}).get('sunlight', '').lower()
+        if filters.get('sunlight') and filters['sunlight'] not in sunlight:
+            return False
+        
+        if filters.get('pet_safe'):
+            toxicity = data.get('details', {}).get('toxicity', '').lower()
+            if 'toxic' in toxicity or 'poisonous' in toxicity:
+                return False
+        
+        return True
+
     # ... (rest of FirestoreProductTool: _parse_query, _calculate_match_score) ...
     def _parse_query(self, query: str) -> Dict[str, Any]:
         """Parse natural language query into filters based on product structure"""
         filters = {}
-        query_lower = query.lower()
+        match = match_query(query)
         
         # Maintenance level detection (maps to details.maintenance)
-        if any(word in query_lower for word in ['beginner', 'new', 'easy', 'simple', 'low maintenance']):
+        if match.has_any(LOW_MAINTENANCE_TERMS):
             filters['maintenance_level'] = 'low'
-        elif any(word in query_lower for word in ['advanced', 'expert', 'difficult', 'high maintenance']):
+        elif match.has_any(HIGH_MAINTENANCE_TERMS):
             filters['maintenance_level'] = 'high'
         
         # Sunlight requirements (maps to details.sunlight)
-        if any(word in query_lower for word in ['low light', 'shade', 'dark', 'indirect']):
-            filters['sunlight'] = 'indirect'
-        elif any(word in query_lower for word in ['bright', 'direct sun', 'sunny', 'full sun']):
-            filters['sunlight'] = 'direct'
-        elif any(word in query_lower for word in ['medium light', 'partial']):
-            filters['sunlight'] = 'partial'
-        
-        # Category detection
-        categories = {
-            'succulent': 'Succulents & Cacti',
-            'cactus': 'Succulents & Cacti',
-            'flower': 'Flowering Plants',
-            'flowering': 'Flowering Plants',
-            'herb': 'Herbs & Edibles',
-            'edible': 'Herbs & Edibles',
-            'tree': 'Trees & Large Plants',
-            'tropical': 'Tropical Plants',
-            'air purifying': 'Air Purifying',
-            'pot': 'Pots & Planters',
-            'planter': 'Pots & Planters',
-            'tool': 'Tools & Supplies',
-            'fertilizer': 'Tools & Supplies'
-        }
-        
-        for keyword, category in categories.items():
-            if keyword in query_lower:
-                filters['category'] = category
+        for sunlight, terms in SUNLIGHT_TERMS.items():
+            if match.has_any(terms):
+                filters['sunlight'] = sunlight
                 break
         
-        # Sub-category detection
-        sub_categories = {
-            'hanging': 'Hanging Plants',
-            'trailing': 'Hanging Plants',
-            'desk': 'Desktop Plants',
-            'small': 'Desktop Plants',
-            'tabletop': 'Desktop Plants',
-            'floor': 'Floor Plants',
-            'large': 'Floor Plants',
-            'statement': 'Floor Plants'
-        }
-        
-        for keyword, sub_category in sub_categories.items():
-            if keyword in query_lower:
-                filters['sub_category'] = sub_category
-                break
+        # Category, sub-category and type detection: first keyword in table order wins
+        keyword = match.first_of(CATEGORY_KEYWORDS)
+        if keyword:
+            filters['category'] = CATEGORY_KEYWORDS[keyword]
         
-        # Type detection
-        types = {
-            'indoor': 'Indoor Plant',
-            'houseplant': 'Indoor Plant',
-            'house plant': 'Indoor Plant',
-            'outdoor': 'Outdoor Plant',
-            'garden': 'Outdoor Plant',
-            'ceramic': 'Ceramic Pot',
-            'terracotta': 'Terracotta Pot',
-            'fertilizer': 'Fertilizer',
-            'plant food': 'Fertilizer',
-            'tool': 'Garden Tool'
-        }
+        keyword = match.first_of(SUB_CATEGORY_KEYWORDS)
+        if keyword:
+            filters['sub_category'] = SUB_CATEGORY_KEYWORDS[keyword]
         
-        for keyword, plant_type in types.items():
-            if keyword in query_lower:
-                filters['type'] = plant_type
-                break
+        keyword = match.first_of(TYPE_KEYWORDS)
+        if keyword:
+            filters['type'] = TYPE_KEYWORDS[keyword]
         
         # Pet safety
-        if any(word in query_lower for word in ['pet safe', 'cat safe', 'dog safe', 'non toxic']):
+        if match.has_any(PET_SAFE_TERMS):
             filters['pet_safe'] = True
         
-        # Price extraction
-        price_patterns = [
-            r'under \$(\d+)',
-            r'below \$(\d+)',
-            r'less than \$(\d+)',
-            r'\$(\d+) or less',
-            r'budget \$(\d+)'
-        ]
-        
-        for pattern in price_patterns:
-            price_match = re.search(pattern, query_lower)
-            if price_match:
-                filters['price_max'] = float(price_match.group(1))
-                break
-        
-        # Price range extraction
-        range_match = re.search(r'\$(\d+)[-\s]?to[-\s]?\$(\d+)', query_lower)
-        if range_match:
-            filters['price_min'] = float(range_match.group(1))
-            filters['price_max'] = float(range_match.group(2))
+        # Price extraction (a "$x to $y" range overrides a single bound)
+        if match.price_min is not None:
+            filters['price_min'] = match.price_min
+        if match.price_max is not None:
+            filters['price_max'] = match.price_max
         
         return filters
     
@@ -261,100 +356,234 @@ class FirestoreProductTool:
         return score / max(max_score, 1.0) if max_score > 0 else 0.5
 
 # ... (FirestoreCareGuideTool and FirestoreCategoryTool remain the same) ...
+def fuse_rankings(rankings: List[List[Dict[str, Any]]], limit: int = 8) -> List[Dict[str, Any]]:
+    """
+    Merge product rankings with reciprocal rank fusion: each product scores the sum of
+    1 / (RRF_K + rank) over the rankings it appears in, ties broken by its best match_score.
+    """
+    fused: Dict[str, float] = {}
+    best: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, product in enumerate(ranking, start=1):
+            key = product.get('id') or product.get('title', '')
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank)
+            if key not in best or product.get('match_score', 0) > best[key].get('match_score', 0):
+                best[key] = product
+    order = sorted(fused, key=lambda key: (fused[key], best[key].get('match_score', 0)), reverse=True)
+    return [best[key] for key in order[:limit]]
+
 class FirestoreCareGuideTool:
-    def __init__(self):
+    def __init__(self, memo: ToolMemo = None, renderer: ObservationRenderer = None):
         self.db = FirebaseConfig.get_db()
+        self.index = CareGuideIndex.get_shared(self.db)
+        self.access = FirestoreAccess.get_shared()
+        self.memo = memo if memo is not None else ToolMemo(ttl_seconds=0)
+        self.renderer = renderer or ObservationRenderer()
     
     def get_care_guides(self, plant_query: str) -> str:
         """
         Get plant care guidance based on plant type, category, or care issue
         """
         try:
-            guides_ref = self.db.collection('care_guides')
-            query_lower = plant_query.lower()
-            
-            matching_guides = []
-            
-            title_docs = guides_ref.where('title', '>=', plant_query).where('title', '<=', plant_query + '\uf8ff').limit(3).stream()
-            for doc in title_docs: # Iterate to unpack generator
-                matching_guides.append(doc)
-            
-            if not matching_guides:
-                category_keywords = {
-                    'tropical': 'Tropical Plants', 'succulent': 'Succulents & Cacti', 'cactus': 'Succulents & Cacti',
-                    'flower': 'Flowering Plants', 'herb': 'Herbs & Edibles', 'monstera': 'Tropical Plants',
-                    'snake plant': 'Air Purifying', 'pothos': 'Tropical Plants', 'spider plant': 'Air Purifying'
-                }
-                for keyword, category in category_keywords.items():
-                    if keyword in query_lower:
-                        category_docs = guides_ref.where('category', '==', category).limit(2).stream()
-                        for doc in category_docs: # Iterate
-                            matching_guides.append(doc)
-                        break # Found category, no need to check others
-            
-            if not matching_guides:
-                if any(word in query_lower for word in ['beginner', 'easy', 'simple']):
-                    difficulty_docs = guides_ref.where('difficulty', '==', 'Easy').limit(3).stream()
-                    for doc in difficulty_docs: # Iterate
-                        matching_guides.append(doc)
-                else:
-                    general_docs = guides_ref.limit(3).stream()
-                    for doc in general_docs: # Iterate
-                        matching_guides.append(doc)
-            
-            guides = []
-            # Deduplicate matching_guides by doc.id before processing
-            unique_doc_ids = set()
-            unique_matching_docs = []
-            for doc in matching_guides:
-                if doc.id not in unique_doc_ids:
-                    unique_matching_docs.append(doc)
-                    unique_doc_ids.add(doc.id)
-
-            for doc in unique_matching_docs:
-                if len(guides) >= 3:
-                    break
-                data = doc.to_dict()
-                content_sections = [{'title': s.get('title', ''), 'text': s.get('text', ''), 'imageURL': s.get('imageURL', ''), 'imageCaption': s.get('imageCaption', '')} for s in data.get('content', [])]
-                problems = [{'problem': p.get('problem', ''), 'solution': p.get('solution', '')} for p in data.get('commonProblems', [])]
-                
-                guide_data = {
-                    'title': data.get('title', ''), 'description': data.get('description', ''),
-                    'category': data.get('category', ''), 'difficulty': data.get('difficulty', ''),
-                    'imageURL': data.get('imageURL', ''), 'publishDate': data.get('publishDate', ''),
-                    'author': data.get('author', ''), 'quickTips': data.get('quickTips', []),
-                    'wateringTips': data.get('wateringTips', ''), 'lightTips': data.get('lightTips', ''),
-                    'temperatureTips': data.get('temperatureTips', ''), 'fertilizerTips': data.get('fertilizerTips', ''),
-                    'content': content_sections, 'expertTip': data.get('expertTip', ''),
-                    'expertName': data.get('expertName', ''), 'expertTitle': data.get('expertTitle', ''),
-                    'commonProblems': problems, 'relevanceScore': self._calculate_relevance(data, plant_query)
-                }
-                guides.append(guide_data)
-            
-            guides.sort(key=lambda x: x['relevanceScore'], reverse=True)
-            return json.dumps(guides, indent=2)
+            guides = self.find_care_guides(plant_query)
+            record_result('get_care_guides', plant_query, guides)
+            return self.renderer.render('get_care_guides', guides)
         except Exception as e:
             return f"Error getting care guides: {str(e)}"
-    
-    def _calculate_relevance(self, guide_data: Dict, query: str) -> float:
+
+    async def aget_care_guides(self, plant_query: str) -> str:
+        """Async variant of get_care_guides used by the non-blocking /chat path"""
+        try:
+            guides = await self.afind_care_guides(plant_query)
+            record_result('get_care_guides', plant_query, guides)
+            return self.renderer.render('get_care_guides', guides)
+        except Exception as e:
+            return f"Error getting care guides: {str(e)}"
+
+    def find_care_guides(self, plant_query: str) -> List[Dict[str, Any]]:
+        """Structured care guides (up to 3, most relevant first) for a plant or care topic"""
+        # Firestore title matching is case-sensitive, so only whitespace is normalized
+        plant_query = ' '.join(plant_query.split())
+        return self.memo.get_or_compute(memo_key('get_care_guides', plant_query), lambda: self._find_guides(plant_query))
+
+    async def afind_care_guides(self, plant_query: str) -> List[Dict[str, Any]]:
+        plant_query = ' '.join(plant_query.split())
+        return await self.memo.aget_or_compute(memo_key('get_care_guides', plant_query), lambda: self._afind_guides(plant_query))
+
+    def _find_guides(self, plant_query: str) -> List[Dict[str, Any]]:
+        if self.index is not None and self.index.ready:
+            return self._find_indexed_guides(plant_query)
+        if self.db is None:
+            # Offline (CATALOG_SNAPSHOT_OFFLINE) without the guides in the snapshot
+            return []
+        
+        guides_ref = self.db.collection('care_guides').select(CARE_GUIDE_FIELDS)
+        matching = self._first_matching(self.access.run_queries('care_guides', self._specific_queries(guides_ref, plant_query)))
+        if not matching:
+            matching, = self.access.run_queries('care_guides', [self._general_query(guides_ref, plant_query)])
+        return self._build_guides(matching, plant_query)
+
+    async def _afind_guides(self, plant_query: str) -> List[Dict[str, Any]]:
+        if self.index is not None and self.index.ready:
+            return self._find_indexed_guides(plant_query)
+        if self.db is None:
+            return []
+        
+        guides_ref = FirebaseConfig.get_async_db().collection('care_guides').select(CARE_GUIDE_FIELDS)
+        matching = self._first_matching(await self.access.arun_queries('care_guides', self._specific_queries(guides_ref, plant_query)))
+        if not matching:
+            matching, = await self.access.arun_queries('care_guides', [self._general_query(guides_ref, plant_query)])
+        return self._build_guides(matching, plant_query)
+
+    def _specific_queries(self, guides_ref, plant_query: str) -> List[Any]:
+        """
+        Title and category queries, most specific first, issued together rather than one after
+        another. The general query is only sent when neither matches: it always returns guides,
+        and they are only used then.
+        """
+        return [self._title_query(guides_ref, plant_query), self._category_query(guides_ref, plant_query)]
+
+    def _first_matching(self, results: List[List[Any]]) -> List[Any]:
+        """Results of the most specific query that matched anything"""
+        return next((docs for docs in results if docs), [])
+
+    def _find_indexed_guides(self, plant_query: str) -> List[Dict[str, Any]]:
+        """One in-process BM25 lookup over titles, descriptions, tips, sections and problems"""
+        hits = self.index.search(plant_query, k=3)
+        if hits:
+            return [record.to_result(round(score, 3)) for _, record, score in hits]
+        
+        # Nothing matched any term: same general suggestions as the Firestore path
+        guides = self.index.all()
+        if any(word in plant_query.lower() for word in ['beginner', 'easy', 'simple']):
+            guides = [(doc_id, record) for doc_id, record in guides if record.difficulty == 'Easy']
+        return [record.to_result(self._calculate_relevance(record, plant_query)) for _, record in guides[:3]]
+
+    def _title_query(self, guides_ref, plant_query: str):
+        return guides_ref.where('title', '>=', plant_query).where('title', '<=', plant_query + '\uf8ff').limit(3)
+
+    def _category_query(self, guides_ref, plant_query: str):
+        query_lower = plant_query.lower()
+        category_keywords = {
+            'tropical': 'Tropical Plants', 'succulent': 'Succulents & Cacti', 'cactus': 'Succulents & Cacti',
+            'flower': 'Flowering Plants', 'herb': 'Herbs & Edibles', 'monstera': 'Tropical Plants',
+            'snake plant': 'Air Purifying', 'pothos': 'Tropical Plants', 'spider plant': 'Air Purifying'
+        }
+        for keyword, category in category_keywords.items():
+            if keyword in query_lower:
+                return guides_ref.where('category', '==', category).limit(2)
+        return None
+
+    def _general_query(self, guides_ref, plant_query: str):
+        query_lower = plant_query.lower()
+        if any(word in query_lower for word in ['beginner', 'easy', 'simple']):
+            return guides_ref.where('difficulty', '==', 'Easy').limit(3)
+        return guides_ref.limit(3)
+
+    def _build_guides(self, matching_guides: List[Any], plant_query: str) -> List[Dict[str, Any]]:
+        guides = []
+        # Deduplicate matching_guides by doc.id before processing
+        unique_doc_ids = set()
+        unique_matching_docs = []
+        for doc in matching_guides:
+            if doc.id not in unique_doc_ids:
+                unique_matching_docs.append(doc)
+                unique_doc_ids.add(doc.id)
+
+        for doc in unique_matching_docs[:3]:
+            record = CareGuideRecord.from_document(doc.id, doc.to_dict() or {})
+            guides.append(record.to_result(self._calculate_relevance(record, plant_query)))
+        
+        guides.sort(key=lambda x: x['relevanceScore'], reverse=True)
+        return guides
+
+    def _calculate_relevance(self, guide: CareGuideRecord, query: str) -> float:
         score = 0.0
         query_lower = query.lower()
-        if any(word in guide_data.get('title', '').lower() for word in query_lower.split()): score += 3.0
-        if any(word in guide_data.get('category', '').lower() for word in query_lower.split()): score += 2.0
-        if any(word in guide_data.get('description', '').lower() for word in query_lower.split()): score += 1.0
-        if 'beginner' in query_lower and guide_data.get('difficulty') == 'Easy': score += 1.5
-        elif 'advanced' in query_lower and guide_data.get('difficulty') == 'Advanced': score += 1.5
+        if any(word in guide.title.lower() for word in query_lower.split()): score += 3.0
+        if any(word in guide.category.lower() for word in query_lower.split()): score += 2.0
+        if any(word in guide.description.lower() for word in query_lower.split()): score += 1.0
+        if 'beginner' in query_lower and guide.difficulty == 'Easy': score += 1.5
+        elif 'advanced' in query_lower and guide.difficulty == 'Advanced': score += 1.5
         return score
 
 class FirestoreCategoryTool:
-    def __init__(self):
+    def __init__(self, renderer: ObservationRenderer = None):
         self.db = FirebaseConfig.get_db()
+        self.catalog = CategoryCatalog.get_shared(self.db)
+        self.access = FirestoreAccess.get_shared()
+        self.renderer = renderer or ObservationRenderer()
+        # (catalog version, rendered observation): re-rendered only when the categories change
+        self._rendered = (None, '')
     
     def get_categories(self, query: str = "") -> str:
         try:
-            categories_ref = self.db.collection('categories')
-            docs = categories_ref.stream()
-            categories = [{'id': doc.id, 'name': d.get('name', ''), 'description': d.get('description', ''), 'product_count': d.get('product_count', 0)} for doc in docs for d in [doc.to_dict()]]
-            return json.dumps(categories, indent=2)
+            categories = self.find_categories()
+            record_result('get_categories', query, categories)
+            return self._render(categories)
+        except Exception as e:
+            return f"Error getting categories: {str(e)}"
+
+    async def aget_categories(self, query: str = "") -> str:
+        """Async variant of get_categories used by the non-blocking /chat path"""
+        try:
+            categories = await self.afind_categories()
+            record_result('get_categories', query, categories)
+            return self._render(categories)
+        except Exception as e:
+            return f"Error getting categories: {str(e)}"
+
+    def find_categories(self) -> List[Dict[str, Any]]:
+        """Structured list of every product category"""
+        if self.catalog is not None and self.catalog.ready:
+            return self.catalog.categories()
+        if self.db is None:
+            # Offline (CATALOG_SNAPSHOT_OFFLINE) without the categories in the snapshot
+            return []
+        with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection='categories', operation='query'):
+            docs = list(self.db.collection('categories').select(CATEGORY_FIELDS).stream())
+        try:
+            counts = self.access.count_many('products', self._count_queries(self.db, docs))
+        except Exception as e:
+            print(f"Category product counts could not be aggregated: {e}")
+            counts = None
+        return self._build_categories(docs, counts)
+
+    async def afind_categories(self) -> List[Dict[str, Any]]:
+        if self.catalog is not None and self.catalog.ready:
+            return self.catalog.categories()
+        if self.db is None:
+            return []
+        db = FirebaseConfig.get_async_db()
+        with span('firestore', FIRESTORE_SECONDS, FIRESTORE_ERRORS, collection='categories', operation='query'):
+            docs = [doc async for doc in db.collection('categories').select(CATEGORY_FIELDS).stream()]
+        try:
+            counts = await self.access.acount_many('products', self._count_queries(db, docs))
         except Exception as e:
-            return f"Error getting categories: {str(e)}"
\ No newline at end of file
+            print(f"Category product counts could not be aggregated: {e}")
+            counts = None
+        return self._build_categories(docs, counts)
+
+    def _count_queries(self, db, docs) -> List[Any]:
+        """In-stock products per category, the same count the CategoryCatalog serves"""
+        products_ref = db.collection('products').where('stock.availability', '==', True)
+        return [products_ref.where('category', '==', doc.to_dict().get('name', '')) for doc in docs]
+
+    def _render(self, categories: List[Dict[str, Any]]) -> str:
+        if self.catalog is None or not self.catalog.ready:
+            return self.renderer.render('get_categories', categories)
+        version, text = self._rendered
+        if version != self.catalog.version:
+            version = self.catalog.version
+            text = self.renderer.render('get_categories', self.catalog.categories())
+            self._rendered = (version, text)
+        return text
+
+    def _build_categories(self, docs, counts: List[int] = None) -> List[Dict[str, Any]]:
+        """Without aggregated counts, the product_count stored on each category is used"""
+        categories = []
+        for i, doc in enumerate(docs):
+            d = doc.to_dict()
+            count = counts[i] if counts is not None else d.get('product_count', 0)
+            categories.append({'id': doc.id, 'name': d.get('name', ''), 'description': d.get('description', ''), 'product_count': count})
+        return categories
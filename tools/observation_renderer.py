@@ -0,0 +1,112 @@
+# tools/observation_renderer.py
+
+import os
+from typing import Dict, List, Any, Optional
+
+# Decision-relevant fields per tool, as dotted paths into the structured result.
+# Full records still go to the API response through the ToolResultStore.
+DEFAULT_FIELDS = {
+    'search_products': ['id', 'title', 'price', 'category', 'details.maintenance', 'details.sunlight',
+                        'details.toxicity', 'match_score'],
+    'get_care_guides': ['title', 'difficulty', 'category', 'description', 'quickTips', 'commonProblems'],
+    'get_categories': ['name', 'product_count'],
+}
+
+DEFAULT_TOKEN_BUDGETS = {
+    'search_products': 400,
+    'get_care_guides': 350,
+    'get_categories': 200,
+}
+
+EMPTY_MESSAGES = {
+    'search_products': 'No matching products found. Try broader search terms.',
+    'get_care_guides': 'No matching care guides found.',
+    'get_categories': 'No categories found.',
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+
+class ObservationRenderer:
+    """
+    Renders tool results as compact text for the ReAct scratchpad.
+
+    Each item becomes one line holding only the configured fields; long text is
+    clipped, and lines stop once the tool's token budget is spent (the rest are
+    summarized as a count), so later LLM iterations don't carry whole records.
+    """
+
+    def __init__(self, fields: Dict[str, List[str]] = None, token_budgets: Dict[str, int] = None,
+                 max_text_chars: int = 120, max_list_items: int = 3):
+        self.fields = {**DEFAULT_FIELDS, **(fields or {})}
+        self.token_budgets = {**DEFAULT_TOKEN_BUDGETS, **(token_budgets or {})}
+        self.max_text_chars = max_text_chars
+        self.max_list_items = max_list_items
+
+    @classmethod
+    def from_env(cls) -> 'ObservationRenderer':
+        """
+        OBSERVATION_TOKEN_BUDGET sets one budget for every tool;
+        OBSERVATION_TOKEN_BUDGET_<TOOL> (e.g. _SEARCH_PRODUCTS) overrides it per tool.
+        """
+        budgets = {}
+        default_budget = os.getenv("OBSERVATION_TOKEN_BUDGET")
+        for tool in DEFAULT_TOKEN_BUDGETS:
+            value = os.getenv(f"OBSERVATION_TOKEN_BUDGET_{tool.upper()}", default_budget)
+            if value:
+                budgets[tool] = int(value)
+        return cls(token_budgets=budgets)
+
+    def render(self, tool: str, items: List[Dict[str, Any]]) -> str:
+        if not items:
+            return EMPTY_MESSAGES.get(tool, 'No results.')
+
+        budget = self.token_budgets.get(tool, 400)
+        fields = self.fields.get(tool)
+        lines = []
+        used = 0
+        for index, item in enumerate(items):
+            line = f"{index + 1}. " + self._render_item(item, fields)
+            cost = estimate_tokens(line)
+            if lines and used + cost > budget:
+                lines.append(f"(+{len(items) - index} more results not shown)")
+                break
+            lines.append(line)
+            used += cost
+        return '\n'.join(lines)
+
+    def _render_item(self, item: Dict[str, Any], fields: Optional[List[str]]) -> str:
+        parts = []
+        for path in fields or item.keys():
+            value = _lookup(item, path)
+            if value in (None, '', []):
+                continue
+            parts.append(f"{path.rsplit('.', 1)[-1]}: {self._format_value(value)}")
+        return ' | '.join(parts)
+
+    def _format_value(self, value: Any) -> str:
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        if isinstance(value, list):
+            shown = [self._format_value(v) for v in value[:self.max_list_items]]
+            more = f" (+{len(value) - self.max_list_items})" if len(value) > self.max_list_items else ''
+            return '; '.join(shown) + more
+        if isinstance(value, dict):
+            # e.g. a commonProblems entry: the problem names the issue well enough
+            value = value.get('problem') or value.get('title') or ', '.join(str(v) for v in value.values())
+        text = str(value)
+        if len(text) > self.max_text_chars:
+            text = text[:self.max_text_chars - 3].rstrip() + '...'
+        return text
+
+
+def _lookup(item: Dict[str, Any], path: str) -> Any:
+    value: Any = item
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
@@ -0,0 +1,387 @@
+# tools/product_catalog.py
+
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable
+
+import numpy as np
+
+from models.records import ProductRecord
+from tools.catalog_snapshot import CatalogSnapshot, SnapshotWriter
+
+# Values the maintenance/sunlight filters of FirestoreProductTool._parse_query can take.
+# Each one gets a boolean column built with the same substring rules the tool uses.
+MAINTENANCE_LEVELS = ('low', 'high')
+SUNLIGHT_CLASSES = ('indirect', 'direct', 'partial')
+UNSAFE_TOXICITY_MARKERS = ('toxic', 'poisonous')
+SAFE_TOXICITY_MARKERS = ('non-toxic', 'safe')
+
+# Hash-indexed text fields, stored as integer codes into a per-field string table
+CODED_FIELDS = ('category', 'subCategory', 'type')
+
+BOOL_COLUMNS = (
+    ['valid', 'pet_unsafe', 'pet_safe_label', 'air_purifying', 'low_maintenance_feature', 'in_stock']
+    + [f'maintenance_{level}' for level in MAINTENANCE_LEVELS]
+    + [f'sunlight_{cls}' for cls in SUNLIGHT_CLASSES]
+)
+
+INITIAL_CAPACITY = 1024
+
+
+class ProductCatalog:
+    """
+    Process-local copy of the in-stock products collection, stored as NumPy columns.
+
+    Every product gets a slot (a row) and is held as a ProductRecord, built once per
+    document version. Category, subCategory and type are integer codes
+    into per-field string tables; price is a float column; maintenance, sunlight, toxicity
+    and the special features that affect the match score are boolean columns. Filters and
+    FirestoreProductTool's match score are evaluated as vectorized expressions over every
+    row, and top-k selection uses argpartition. The catalog is kept current by a Firestore
+    snapshot listener; until the first snapshot arrives `ready` is False and callers should
+    fall back to querying Firestore directly. With a CatalogSnapshot the columns are adopted
+    from the file and the catalog is ready at once; the listener's first snapshot then
+    replaces those rows, dropping any product deleted or taken off sale since the file was
+    written, and only the products that differ are reported as changed.
+    """
+
+    _shared: Optional['ProductCatalog'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._watch = None
+        self._listeners: List[Callable[[Iterable[str]], None]] = []
+        # Set while the rows come from a CatalogSnapshot the listener has not yet replaced
+        self._from_snapshot = False
+
+        self._docs: Dict[str, ProductRecord] = {}
+        self._slot_of: Dict[str, int] = {}
+        self._id_at: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+
+        self._codes: Dict[str, Dict[str, int]] = {field: {} for field in CODED_FIELDS}
+        # Live rows per code of each coded field, adjusted as rows are added and removed
+        self._code_counts: Dict[str, Counter] = {field: Counter() for field in CODED_FIELDS}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._allocate(INITIAL_CAPACITY)
+
+    @classmethod
+    def get_shared(cls, db) -> Optional['ProductCatalog']:
+        """Return the process-wide catalog, starting its listener on first use"""
+        if os.getenv("ENABLE_PRODUCT_CATALOG", "true").lower() in ("0", "false", "no"):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                catalog = cls()
+                snapshot = CatalogSnapshot.get_shared()
+                if snapshot is not None and snapshot.has('products'):
+                    catalog.load_snapshot(snapshot)
+                if db is not None:
+                    try:
+                        catalog.start(db)
+                    except Exception as e:
+                        print(f"Product catalog listener could not be started: {e}")
+                cls._shared = catalog
+            return cls._shared
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def add_listener(self, callback: Callable[[Iterable[str]], None]):
+        """Register callback(changed_ids), called after each applied batch of changes"""
+        self._listeners.append(callback)
+
+    def start(self, db):
+        """Subscribe to in-stock products; the first snapshot fills the catalog (or replaces a CatalogSnapshot's rows)"""
+        query = db.collection('products').where('stock.availability', '==', True)
+        self._watch = query.on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        was_ready = self.ready
+        changed_ids = []
+        with self._lock:
+            replacing, self._from_snapshot = self._from_snapshot, False
+            delivered = set()
+            for change in changes:
+                doc = change.document
+                delivered.add(doc.id)
+                previous = self._docs.get(doc.id) if replacing else None
+                try:
+                    data = doc.to_dict() or {}
+                    if change.type.name == 'REMOVED' or (data.get('stock') or {}).get('availability') is not True:
+                        self.remove(doc.id)
+                    else:
+                        self.upsert(doc.id, data)
+                except Exception as e:
+                    # One unreadable product must not hold back the rest of the batch, or readiness
+                    print(f"Product catalog skipped {doc.id}: {e}")
+                    self.remove(doc.id)
+                current = self._docs.get(doc.id)
+                if previous is not None and current is not None and previous.to_document() == current.to_document():
+                    continue  # the snapshot row was up to date
+                changed_ids.append(doc.id)
+            if replacing:
+                # The first snapshot holds every in-stock product: the rest were deleted or went off sale
+                stale = [doc_id for doc_id in self._docs if doc_id not in delivered]
+                for doc_id in stale:
+                    self.remove(doc_id)
+                changed_ids.extend(stale)
+        self._ready.set()
+        if was_ready and changed_ids:
+            self._notify(changed_ids)
+
+    def _notify(self, changed_ids: List[str]):
+        for callback in self._listeners:
+            try:
+                callback(changed_ids)
+            except Exception as e:
+                print(f"Product catalog listener error: {e}")
+
+    def load(self, docs: List[Tuple[str, Dict[str, Any]]]):
+        """Bulk-load (id, data) pairs and mark the catalog ready, e.g. for offline use"""
+        with self._lock:
+            for doc_id, data in docs:
+                self.upsert(doc_id, data)
+        self._ready.set()
+
+    # ---- snapshots ----
+
+    def write_snapshot(self, writer: SnapshotWriter):
+        """Add the live rows, their columns and the string tables to writer"""
+        with self._lock:
+            slots = np.flatnonzero(self._columns['valid'])
+            ids = [self._id_at[slot] for slot in slots.tolist()]
+            writer.add_documents('products', ids, (self._docs[doc_id].to_document() for doc_id in ids))
+            for name, column in self._columns.items():
+                writer.add_array('products', name, column[slots])
+            for field in CODED_FIELDS:
+                writer.add_strings('products', 'codes.' + field, list(self._codes[field]))
+            writer.set_meta('products', 'columns', sorted(self._columns))
+
+    def load_snapshot(self, snapshot: CatalogSnapshot):
+        """Replace the contents with a snapshot's products and mark the catalog ready"""
+        self._from_snapshot = True
+        if snapshot.meta('products', 'columns') != sorted(self._columns):
+            # Written with other derived columns: derive them again from the documents
+            print("Product catalog snapshot has different columns; re-indexing its documents")
+            self.load(list(snapshot.documents('products').items()))
+            return
+        ids = snapshot.ids('products')
+        with self._lock:
+            self._docs = snapshot.documents('products', ids, ProductRecord.from_document)
+            self._id_at = ids
+            self._slot_of = {doc_id: slot for slot, doc_id in enumerate(ids)}
+            self._free_slots = []
+            self._codes = {field: {value: code for code, value in enumerate(snapshot.strings('products', 'codes.' + field).tolist())}
+                           for field in CODED_FIELDS}
+            self._columns = {}
+            self._allocate(max(INITIAL_CAPACITY, 2 * len(ids)))
+            for name, column in self._columns.items():
+                column[:len(ids)] = snapshot.array('products', name)
+            self._code_counts = {}
+            for field in CODED_FIELDS:
+                codes = self._columns[field][:len(ids)]
+                counts = np.bincount(codes[codes >= 0])
+                self._code_counts[field] = Counter({code: count for code, count in enumerate(counts.tolist()) if count})
+        self._ready.set()
+
+    # ---- maintenance of the columns ----
+
+    def _allocate(self, capacity: int):
+        """Create or grow every column to capacity rows (new rows are invalid)"""
+        old = self._columns
+        columns = {'price': np.zeros(capacity, dtype=np.float64)}
+        for field in CODED_FIELDS:
+            columns[field] = np.full(capacity, -1, dtype=np.int32)
+        for name in BOOL_COLUMNS:
+            columns[name] = np.zeros(capacity, dtype=bool)
+        for name, column in old.items():
+            columns[name][:len(column)] = column
+        self._columns = columns
+
+    def _code(self, field: str, value: str) -> int:
+        table = self._codes[field]
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(table)
+        return code
+
+    def upsert(self, doc_id: str, data: Dict[str, Any]):
+        record = ProductRecord.from_document(doc_id, data)
+        with self._lock:
+            if doc_id in self._docs:
+                self.remove(doc_id)
+
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._id_at[slot] = doc_id
+            else:
+                slot = len(self._id_at)
+                self._id_at.append(doc_id)
+                if slot >= len(self._columns['price']):
+                    self._allocate(2 * len(self._columns['price']))
+
+            self._docs[doc_id] = record
+            self._slot_of[doc_id] = slot
+
+            columns = self._columns
+            columns['valid'][slot] = True
+            columns['price'][slot] = record.price
+            for field in CODED_FIELDS:
+                code = self._code(field, getattr(record, field))
+                columns[field][slot] = code
+                self._code_counts[field][code] += 1
+
+            maintenance = record.maintenance.lower()
+            for level in MAINTENANCE_LEVELS:
+                columns[f'maintenance_{level}'][slot] = level in maintenance
+
+            sunlight = record.sunlight.lower()
+            for cls in SUNLIGHT_CLASSES:
+                columns[f'sunlight_{cls}'][slot] = cls in sunlight
+
+            toxicity = record.toxicity.lower()
+            columns['pet_unsafe'][slot] = any(marker in toxicity for marker in UNSAFE_TOXICITY_MARKERS)
+            columns['pet_safe_label'][slot] = any(marker in toxicity for marker in SAFE_TOXICITY_MARKERS)
+
+            special_features = record.specialFeatures.lower()
+            columns['air_purifying'][slot] = 'air purifying' in special_features
+            columns['low_maintenance_feature'][slot] = 'low maintenance' in special_features
+
+            stock = data.get('stock') or {}
+            columns['in_stock'][slot] = bool(stock.get('availability') and record.quantity > 0)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            if doc_id not in self._docs:
+                return
+            del self._docs[doc_id]
+            slot = self._slot_of.pop(doc_id)
+            self._columns['valid'][slot] = False
+            for field in CODED_FIELDS:
+                self._code_counts[field][int(self._columns[field][slot])] -= 1
+            self._id_at[slot] = None
+            self._free_slots.append(slot)
+
+    # ---- lookups ----
+
+    def get(self, doc_id: str) -> Optional[ProductRecord]:
+        return self._docs.get(doc_id)
+
+    def items(self) -> List[Tuple[str, ProductRecord]]:
+        """Snapshot of every (id, record) pair"""
+        with self._lock:
+            return list(self._docs.items())
+
+    def count_by(self, field: str, value: str) -> int:
+        """Number of in-stock products whose coded field equals value (kept current per change, not counted)"""
+        with self._lock:
+            code = self._codes[field].get(value)
+            if code is None:
+                return 0
+            return self._code_counts[field][code]
+
+    def search(self, filters: Dict[str, Any]) -> List[Tuple[str, ProductRecord]]:
+        """
+        Return every (id, record) pair matching filters produced by
+        FirestoreProductTool._parse_query, without touching Firestore.
+        """
+        with self._lock:
+            slots = np.flatnonzero(self._filter_mask(filters))
+            return [(self._id_at[slot], self._docs[self._id_at[slot]]) for slot in slots.tolist()]
+
+    def top_matches(self, filters: Dict[str, Any], k: int = 8) -> List[Tuple[str, ProductRecord, float]]:
+        """
+        The k best (id, record, match_score) among every product matching filters, scored
+        exactly like FirestoreProductTool._calculate_match_score. Ties keep slot order.
+        """
+        with self._lock:
+            candidates = np.flatnonzero(self._filter_mask(filters))
+            if not len(candidates):
+                return []
+            scores = self._match_scores(filters, candidates)
+            if len(candidates) > k:
+                # Everything scoring at least the k-th best, then an exact ordering of those
+                kth_best = np.partition(scores, len(scores) - k)[len(scores) - k]
+                keep = scores >= kth_best
+                candidates, scores = candidates[keep], scores[keep]
+            order = np.lexsort((candidates, -scores))[:k]
+            results = []
+            for slot, score in zip(candidates[order].tolist(), scores[order].tolist()):
+                doc_id = self._id_at[slot]
+                results.append((doc_id, self._docs[doc_id], score))
+            return results
+
+    def _filter_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Rows passing FirestoreProductTool._passes_filters plus the equality filters"""
+        columns = self._columns
+        mask = columns['valid'].copy()
+
+        for filter_name, field in (('category', 'category'), ('sub_category', 'subCategory'), ('type', 'type')):
+            if filters.get(filter_name):
+                code = self._codes[field].get(filters[filter_name])
+                if code is None:
+                    return np.zeros_like(mask)
+                mask &= columns[field] == code
+
+        if filters.get('maintenance_level') in MAINTENANCE_LEVELS:
+            mask &= columns[f"maintenance_{filters['maintenance_level']}"]
+        if filters.get('sunlight'):
+            if filters['sunlight'] not in SUNLIGHT_CLASSES:
+                return np.zeros_like(mask)
+            mask &= columns[f"sunlight_{filters['sunlight']}"]
+        if filters.get('pet_safe'):
+            mask &= ~columns['pet_unsafe']
+
+        if filters.get('price_max'):
+            mask &= columns['price'] <= filters['price_max']
+        if filters.get('price_min'):
+            mask &= columns['price'] >= filters['price_min']
+        return mask
+
+    def _match_scores(self, filters: Dict[str, Any], slots: np.ndarray) -> np.ndarray:
+        """Vectorized FirestoreProductTool._calculate_match_score for the given rows"""
+        columns = self._columns
+        score = np.zeros(len(slots), dtype=np.float64)
+        max_score = 0.0
+
+        if filters.get('maintenance_level'):
+            max_score += 3.0
+            if filters['maintenance_level'] in MAINTENANCE_LEVELS:
+                score += 3.0 * columns[f"maintenance_{filters['maintenance_level']}"][slots]
+        if filters.get('sunlight'):
+            max_score += 3.0
+            if filters['sunlight'] in SUNLIGHT_CLASSES:
+                score += 3.0 * columns[f"sunlight_{filters['sunlight']}"][slots]
+        for filter_name in ('category', 'type'):
+            if filters.get(filter_name):
+                max_score += 2.0
+                wanted = filters[filter_name].lower()
+                codes = [code for value, code in self._codes[filter_name].items() if value.lower() == wanted]
+                score += 2.0 * np.isin(columns[filter_name][slots], codes)
+        if filters.get('pet_safe'):
+            max_score += 1.0
+            score += columns['pet_safe_label'][slots]
+
+        if max_score == 0:
+            return np.full(len(slots), 0.5)
+
+        score += 0.5 * columns['air_purifying'][slots]
+        score += 0.5 * columns['low_maintenance_feature'][slots]
+        score += 0.5 * columns['in_stock'][slots]
+        return score / max(max_score, 1.0)
@@ -0,0 +1,360 @@
+# tools/product_vector_index.py
+
+import atexit
+import itertools
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Iterable
+
+import numpy as np
+
+from models.records import ProductRecord
+from tools.product_catalog import ProductCatalog
+
+# ProductRecord text that describes a product, with its weight in the vector
+TEXT_FIELDS = (
+    ('title', 2.0),
+    ('description', 1.0),
+    ('specialFeatures', 1.0),
+    ('useCase', 1.0),
+    ('scientificName', 1.0),
+)
+
+CHAR_NGRAM = 3
+# Character n-grams catch partial words ("purpl", "trail") at a lower weight than whole words
+NGRAM_WEIGHT = 0.5
+# Vectors are re-weighted from scratch once the catalog size drifts this far from the
+# size their IDF weights were computed at
+REWEIGHT_DRIFT = 0.25
+# A query is scored on its strongest features only (highest TF-IDF weight); with short
+# queries this is all of them, for long ones it bounds the work per lookup
+MAX_QUERY_FEATURES = 48
+# Catalog changes reach the persisted index this long after the first of them, all at once
+SAVE_DELAY_SECONDS = 30.0
+
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def product_text(record: ProductRecord) -> List[Tuple[float, str]]:
+    return [(weight, getattr(record, field).lower()) for field, weight in TEXT_FIELDS]
+
+
+def text_features(weighted_texts: Iterable[Tuple[float, str]]) -> Counter:
+    """Weighted counts of word and character n-gram features"""
+    features = Counter()
+    for weight, text in weighted_texts:
+        for word in _WORD_PATTERN.findall(text):
+            features['w:' + word] += weight
+            padded = f' {word} '
+            for i in range(len(padded) - CHAR_NGRAM + 1):
+                features['c:' + padded[i:i + CHAR_NGRAM]] += weight * NGRAM_WEIGHT
+    return features
+
+
+def _hashed_features(features: Counter) -> Dict[int, float]:
+    """Features keyed by a hash that is stable across processes (unlike hash()), so saved indexes stay valid"""
+    hashed: Dict[int, float] = {}
+    for feature, count in features.items():
+        key = zlib.crc32(feature.encode('utf-8'))
+        hashed[key] = hashed.get(key, 0.0) + count
+    return hashed
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> Tuple[Tuple[int, float], ...]:
+    """Hashed features of one occurrence of word at weight 1 (words repeat heavily across products)"""
+    return tuple(_hashed_features(text_features([(1.0, word)])).items())
+
+
+def hashed_text_features(weighted_texts: Iterable[Tuple[float, str]]) -> Dict[int, float]:
+    """_hashed_features(text_features(weighted_texts)), built from the features of each word"""
+    words = Counter()
+    for weight, text in weighted_texts:
+        for word in _WORD_PATTERN.findall(text):
+            words[word] += weight
+    hashed: Dict[int, float] = {}
+    for word, weight in words.items():
+        for key, count in _word_features(word):
+            hashed[key] = hashed.get(key, 0.0) + weight * count
+    return hashed
+
+
+class ProductVectorIndex:
+    """
+    Local TF-IDF vector index for free-text product retrieval, no network involved.
+
+    Product text (title, description and the descriptive details) is turned into word and
+    character n-gram features keyed by a stable hash, weighted by sublinear TF x IDF and
+    L2-normalized into a sparse vector. Vectors are stored as postings, a pair of NumPy
+    arrays (slots, weights) per feature, so a query accumulates cosine similarities into
+    one score array over the postings of its strongest MAX_QUERY_FEATURES features, then
+    picks top-k with argpartition. Building and re-weighting compute every vector at once
+    over flat feature arrays; a single changed product only updates its own features'
+    postings. The index follows the ProductCatalog through its change listener and can be
+    persisted with save()/load_file() so a restart only re-reads changed products.
+    """
+
+    _shared: Optional['ProductVectorIndex'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._save_timer: Optional[threading.Timer] = None
+        self._reset()
+
+    def _reset(self):
+        self._slot_of: Dict[str, int] = {}
+        self._id_at: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        self._signatures: Dict[str, int] = {}
+        # Per product: feature hash -> weighted count, kept so vectors can be re-weighted
+        self._doc_features: Dict[str, Dict[int, float]] = {}
+        # Per feature: how many products have it, and its postings (slots, weights)
+        self._doc_freq: Counter = Counter()
+        self._postings: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._weighted_at = 0
+
+    @classmethod
+    def get_shared(cls, catalog: Optional[ProductCatalog]) -> Optional['ProductVectorIndex']:
+        """Process-wide index following catalog; built in the background once the catalog is loaded"""
+        if catalog is None or os.getenv("ENABLE_PRODUCT_VECTOR_INDEX", "true").lower() in ("0", "false", "no"):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                index = cls(path=os.getenv("PRODUCT_VECTOR_INDEX_PATH") or None)
+                index.follow(catalog)
+                cls._shared = index
+            return cls._shared
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def follow(self, catalog: ProductCatalog):
+        """Build from catalog when it is loaded (reusing a persisted index) and track its changes"""
+        def build():
+            catalog.wait_until_ready()
+            try:
+                if self.path and os.path.exists(self.path):
+                    self.load_file(self.path)
+                self.sync(catalog.items())
+                if self.path:
+                    self.save(self.path)
+            except Exception as e:
+                print(f"Product vector index could not be built: {e}")
+                return
+            self._ready.set()
+
+        catalog.add_listener(lambda changed_ids: self._on_catalog_change(catalog, changed_ids))
+        if self.path:
+            atexit.register(self.flush)
+        threading.Thread(target=build, name='product_vector_index', daemon=True).start()
+
+    def _on_catalog_change(self, catalog: ProductCatalog, changed_ids: Iterable[str]):
+        with self._lock:
+            for doc_id in changed_ids:
+                record = catalog.get(doc_id)
+                if record is None:
+                    self.remove(doc_id)
+                else:
+                    self.upsert(doc_id, record)
+            self._reweight_if_drifted()
+            # Saving writes the whole index: not on the listener thread, and not once per change
+            if self.path and self.ready and self._save_timer is None:
+                self._save_timer = threading.Timer(SAVE_DELAY_SECONDS, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self):
+        """Save changes not persisted yet now (run at exit too)"""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is None:
+            return
+        timer.cancel()
+        try:
+            self.save(self.path)
+        except Exception as e:
+            print(f"Product vector index could not be saved: {e}")
+
+    # ---- maintenance ----
+
+    def sync(self, docs: Iterable[Tuple[str, ProductRecord]]):
+        """Make the index hold exactly docs, re-reading only products whose text changed"""
+        with self._lock:
+            seen = set()
+            changed = False
+            for doc_id, record in docs:
+                seen.add(doc_id)
+                changed |= self._put(doc_id, record) is not None
+            for doc_id in [doc_id for doc_id in self._slot_of if doc_id not in seen]:
+                self.remove(doc_id)
+                changed = True
+            if changed or self._weighted_at != len(self._slot_of):
+                self._reweight()
+
+    def upsert(self, doc_id: str, record: ProductRecord):
+        with self._lock:
+            slot = self._put(doc_id, record)
+            if slot is not None:
+                self._store_vector(slot, self._doc_features[doc_id])
+
+    def _put(self, doc_id: str, record: ProductRecord) -> Optional[int]:
+        """Record the features of a new or changed product and return its slot (None if unchanged); no vector yet"""
+        texts = product_text(record)
+        signature = zlib.crc32(repr(texts).encode('utf-8'))
+        if self._signatures.get(doc_id) == signature:
+            return None
+        self.remove(doc_id)
+        hashed = hashed_text_features(texts)
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._id_at[slot] = doc_id
+        else:
+            slot = len(self._id_at)
+            self._id_at.append(doc_id)
+        self._slot_of[doc_id] = slot
+        self._signatures[doc_id] = signature
+        self._doc_features[doc_id] = hashed
+        self._doc_freq.update(hashed.keys())
+        return slot
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            slot = self._slot_of.pop(doc_id, None)
+            if slot is None:
+                return
+            for feature_hash in self._doc_features.pop(doc_id):
+                remaining = self._doc_freq.pop(feature_hash) - 1
+                if not remaining:
+                    self._postings.pop(feature_hash, None)
+                    continue
+                self._doc_freq[feature_hash] = remaining
+                postings = self._postings.get(feature_hash)
+                if postings is not None:
+                    keep = postings[0] != slot
+                    self._postings[feature_hash] = (postings[0][keep], postings[1][keep])
+            self._signatures.pop(doc_id, None)
+            self._id_at[slot] = None
+            self._free_slots.append(slot)
+
+    def _reweight_if_drifted(self):
+        count = len(self._slot_of)
+        if self._weighted_at and abs(count - self._weighted_at) <= REWEIGHT_DRIFT * self._weighted_at:
+            return
+        # The IDF weights of the stored vectors are stale
+        self._reweight()
+
+    def _reweight(self):
+        """Re-embed every product with the current IDF weights and rebuild all postings, as array operations"""
+        ids = list(self._slot_of)
+        self._weighted_at = len(ids)
+        features_of = [self._doc_features[doc_id] for doc_id in ids]
+        sizes = np.fromiter(map(len, features_of), dtype=np.int64, count=len(ids))
+        total = int(sizes.sum())
+        slots = np.repeat(np.fromiter(map(self._slot_of.__getitem__, ids), dtype=np.int64, count=len(ids)), sizes)
+        features = np.fromiter(itertools.chain.from_iterable(features_of), dtype=np.int64, count=total)
+        counts = np.fromiter(itertools.chain.from_iterable(f.values() for f in features_of), dtype=np.float64, count=total)
+
+        # Same weights as _vector: sublinear TF x IDF, L2-normalized per product
+        unique, inverse, doc_freq = np.unique(features, return_inverse=True, return_counts=True)
+        idf = np.log((1 + (len(ids) or 1)) / (1 + doc_freq)) + 1.0
+        tf = np.where(counts >= 1, 1.0 + np.log(np.maximum(counts, 1.0)), counts)
+        weights = tf * idf[inverse]
+        norms = np.sqrt(np.bincount(slots, weights * weights, minlength=len(self._id_at)))
+        weights /= np.where(norms > 0, norms, 1.0)[slots]
+
+        order = np.argsort(inverse, kind='stable')
+        slots, weights = slots[order], weights[order]
+        bounds = np.concatenate([[0], np.cumsum(doc_freq)]).tolist()
+        self._postings = {feature_hash: (slots[bounds[i]:bounds[i + 1]], weights[bounds[i]:bounds[i + 1]])
+                          for i, feature_hash in enumerate(unique.tolist())}
+
+    def _store_vector(self, slot: int, hashed: Dict[int, float]):
+        for feature_hash, weight in self._vector(hashed).items():
+            postings = self._postings.get(feature_hash)
+            if postings is None:
+                self._postings[feature_hash] = (np.array([slot], dtype=np.int64), np.array([weight]))
+            else:
+                self._postings[feature_hash] = (np.append(postings[0], slot), np.append(postings[1], weight))
+
+    def _vector(self, hashed: Dict[int, float]) -> Dict[int, float]:
+        """Sublinear TF x IDF weights, L2-normalized"""
+        doc_count = len(self._slot_of) or 1
+        vector = {}
+        for feature_hash, count in hashed.items():
+            doc_freq = self._doc_freq.get(feature_hash, 0)
+            idf = math.log((1 + doc_count) / (1 + doc_freq)) + 1.0
+            tf = 1.0 + math.log(count) if count >= 1 else count
+            vector[feature_hash] = tf * idf
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {feature_hash: weight / norm for feature_hash, weight in vector.items()}
+
+    # ---- lookups ----
+
+    def search(self, query: str, k: int = 8, min_similarity: float = 0.1) -> List[Tuple[str, float]]:
+        """Up to k (product id, cosine similarity) pairs, most similar first"""
+        hashed = hashed_text_features([(1.0, query.lower())])
+        with self._lock:
+            # Features no product has cannot add to any score
+            query_vector = self._vector({h: c for h, c in hashed.items() if h in self._postings})
+            if not query_vector:
+                return []
+            strongest = sorted(query_vector.items(), key=lambda item: item[1], reverse=True)[:MAX_QUERY_FEATURES]
+            scores = np.zeros(len(self._id_at), dtype=np.float64)
+            for feature_hash, query_weight in strongest:
+                slots, weights = self._postings[feature_hash]
+                scores[slots] += query_weight * weights
+
+            candidates = np.flatnonzero(scores >= min_similarity)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(scores[candidates], len(candidates) - k)[len(candidates) - k:]]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+            return [(self._id_at[slot], float(scores[slot])) for slot in candidates.tolist()]
+
+    # ---- persistence ----
+
+    def save(self, path: str):
+        """Write product ids, text signatures and feature counts (weights are recomputed on load)"""
+        with self._lock:
+            ids = list(self._slot_of)
+            arrays = {
+                'ids': np.array(ids, dtype=str),
+                'signatures': np.array([self._signatures[doc_id] for doc_id in ids], dtype=np.int64),
+                'feature_counts': np.array([len(self._doc_features[doc_id]) for doc_id in ids], dtype=np.int64),
+                'features': np.array([h for doc_id in ids for h in self._doc_features[doc_id]], dtype=np.int64),
+                'counts': np.array([c for doc_id in ids for c in self._doc_features[doc_id].values()], dtype=np.float32),
+            }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def load_file(self, path: str):
+        """Replace the index with one written by save()"""
+        with np.load(path, allow_pickle=False) as saved:
+            ids = saved['ids'].tolist()
+            signatures = saved['signatures'].tolist()
+            offsets = np.concatenate([[0], np.cumsum(saved['feature_counts'])]).tolist()
+            features = saved['features'].tolist()
+            counts = saved['counts'].tolist()
+        with self._lock:
+            self._reset()
+            self._id_at = list(ids)
+            for slot, doc_id in enumerate(ids):
+                start, end = offsets[slot], offsets[slot + 1]
+                self._slot_of[doc_id] = slot
+                self._signatures[doc_id] = signatures[slot]
+                self._doc_features[doc_id] = dict(zip(features[start:end], counts[start:end]))
+            self._doc_freq = Counter(features)
+            self._reweight()
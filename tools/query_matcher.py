@@ -0,0 +1,214 @@
+# tools/query_matcher.py
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, FrozenSet, Iterable
+
+# ---- Vocabulary of FirestoreProductTool._parse_query ----
+LOW_MAINTENANCE_TERMS = ['beginner', 'new', 'easy', 'simple', 'low maintenance']
+HIGH_MAINTENANCE_TERMS = ['advanced', 'expert', 'difficult', 'high maintenance']
+
+SUNLIGHT_TERMS = {
+    'indirect': ['low light', 'shade', 'dark', 'indirect'],
+    'direct': ['bright', 'direct sun', 'sunny', 'full sun'],
+    'partial': ['medium light', 'partial']
+}
+
+CATEGORY_KEYWORDS = {
+    'succulent': 'Succulents & Cacti',
+    'cactus': 'Succulents & Cacti',
+    'flower': 'Flowering Plants',
+    'flowering': 'Flowering Plants',
+    'herb': 'Herbs & Edibles',
+    'edible': 'Herbs & Edibles',
+    'tree': 'Trees & Large Plants',
+    'tropical': 'Tropical Plants',
+    'air purifying': 'Air Purifying',
+    'pot': 'Pots & Planters',
+    'planter': 'Pots & Planters',
+    'tool': 'Tools & Supplies',
+    'fertilizer': 'Tools & Supplies'
+}
+
+SUB_CATEGORY_KEYWORDS = {
+    'hanging': 'Hanging Plants',
+    'trailing': 'Hanging Plants',
+    'desk': 'Desktop Plants',
+    'small': 'Desktop Plants',
+    'tabletop': 'Desktop Plants',
+    'floor': 'Floor Plants',
+    'large': 'Floor Plants',
+    'statement': 'Floor Plants'
+}
+
+TYPE_KEYWORDS = {
+    'indoor': 'Indoor Plant',
+    'houseplant': 'Indoor Plant',
+    'house plant': 'Indoor Plant',
+    'outdoor': 'Outdoor Plant',
+    'garden': 'Outdoor Plant',
+    'ceramic': 'Ceramic Pot',
+    'terracotta': 'Terracotta Pot',
+    'fertilizer': 'Fertilizer',
+    'plant food': 'Fertilizer',
+    'tool': 'Garden Tool'
+}
+
+PET_SAFE_TERMS = ['pet safe', 'cat safe', 'dog safe', 'non toxic']
+
+# Checked in this order; the first pattern that matches anywhere sets price_max
+PRICE_PATTERNS = [
+    r'under \$(\d+)',
+    r'below \$(\d+)',
+    r'less than \$(\d+)',
+    r'\$(\d+) or less',
+    r'budget \$(\d+)'
+]
+PRICE_RANGE_PATTERN = r'\$(\d+)[-\s]?to[-\s]?\$(\d+)'
+
+# Every phrase that _parse_query can turn into a filter, and the words that frame a price
+FILTER_PHRASES = (
+    LOW_MAINTENANCE_TERMS + HIGH_MAINTENANCE_TERMS + PET_SAFE_TERMS
+    + [term for terms in SUNLIGHT_TERMS.values() for term in terms]
+    + list(CATEGORY_KEYWORDS) + list(SUB_CATEGORY_KEYWORDS) + list(TYPE_KEYWORDS)
+)
+PRICE_TERMS = frozenset(['under', 'below', 'less', 'than', 'or', 'budget', 'to'])
+
+# ---- Vocabulary of the PlantRecommendationAgent message helpers ----
+CARE_INTENT_PHRASES = ["how to care", "care guide", "problem with", "help with", "dying", "yellow leaves"]
+URGENT_TERMS = ["dying", "help", "problem"]
+PRODUCT_INTENT_PHRASES = ["looking for", "recommend", "buy", "find plant", "suggest", "need a plant", "want a plant"]
+CATEGORY_INTENT_PHRASES = ["category", "categories", "types of plants", "what plants"]
+PRODUCT_CONTEXT_TERMS = ["plant", "succulent", "flower", "tree"]
+
+FALLBACK_BEGINNER_TERMS = ['beginner', 'easy', 'simple']
+FALLBACK_LOW_LIGHT_TERMS = ['low light', 'dark', 'shade']
+FALLBACK_SUCCULENT_TERMS = ['succulent', 'cactus']
+FALLBACK_PET_TERMS = ['pet', 'cat', 'dog', 'safe']
+
+PRICE_MENTION_TERMS = ['$', 'budget', 'cheap', 'expensive']
+SPECIFIC_TERMS = ['beginner', 'low light', 'pet safe', 'succulent', 'indoor', 'office', 'bedroom']
+FALLBACK_ACTION_TERMS = ['care', 'beginner', 'pet', 'low light']
+
+# A product question that also asks how to keep the plant going needs the care guides too
+CARE_MENTION_TERMS = ['care', 'look after', 'looking after', 'water', 'repot', 'prune', 'keep it alive']
+
+# Whole words marking a message as conversational rather than a plain lookup
+CONVERSATIONAL_WORDS = frozenset([
+    'why', 'how', 'compare', 'difference', 'vs', 'versus', 'better', 'should', 'my', 'mine',
+    'help', 'problem', 'dying', 'care', 'thanks', 'thank', 'hello', 'hi', 'hey', 'it', 'them',
+    'those', 'these', 'cheaper', 'else', 'another', 'instead', 'but', 'not', 'without'
+])
+
+ALL_PHRASES = sorted(set(
+    FILTER_PHRASES + CARE_INTENT_PHRASES + URGENT_TERMS + PRODUCT_INTENT_PHRASES
+    + CATEGORY_INTENT_PHRASES + PRODUCT_CONTEXT_TERMS + FALLBACK_BEGINNER_TERMS
+    + FALLBACK_LOW_LIGHT_TERMS + FALLBACK_SUCCULENT_TERMS + FALLBACK_PET_TERMS
+    + PRICE_MENTION_TERMS + SPECIFIC_TERMS + FALLBACK_ACTION_TERMS + CARE_MENTION_TERMS
+))
+
+
+# A maximal run of word characters; same tokens as r'\b\w+\b'
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class PhraseMatcher:
+    """
+    Finds every phrase of a fixed vocabulary that occurs as a substring of a text.
+
+    The vocabulary is split once at import. A phrase made only of word characters can
+    only occur inside a single token, so those are resolved per token from the single
+    tokenization pass, with the phrases contained in each distinct token memoized
+    (tokens repeat heavily across messages). The few remaining phrases (several words,
+    or symbols such as "$") are checked as plain substrings. The result is the same set
+    that `phrase in text` gives for every phrase of the vocabulary.
+
+    A single lookahead regex over a trie of the whole vocabulary gives the same answer
+    but costs ~80ns per character position in CPython, several times more than this.
+    """
+
+    max_cached_tokens = 50000
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = sorted(set(phrases))
+        self._word_phrases = tuple(phrase for phrase in self.phrases if _TOKEN_PATTERN.fullmatch(phrase))
+        self._other_phrases = tuple(phrase for phrase in self.phrases if phrase not in self._word_phrases)
+        self._token_hits: Dict[str, FrozenSet[str]] = {}
+
+    def find_all(self, text: str, tokens: Iterable[str]) -> FrozenSet[str]:
+        token_hits = self._token_hits
+        found = set()
+        for token in tokens:
+            hits = token_hits.get(token)
+            if hits is None:
+                hits = frozenset(phrase for phrase in self._word_phrases if phrase in token)
+                if len(token_hits) >= self.max_cached_tokens:
+                    token_hits.clear()
+                token_hits[token] = hits
+            found |= hits
+        found.update([phrase for phrase in self._other_phrases if phrase in text])
+        return frozenset(found)
+
+
+PHRASE_MATCHER = PhraseMatcher(ALL_PHRASES)
+_PRICE_MATCHER = re.compile('(?=' + '|'.join(f'(?:{pattern})' for pattern in PRICE_PATTERNS) + ')')
+_PRICE_RANGE_MATCHER = re.compile(PRICE_RANGE_PATTERN)
+
+
+class QueryMatch:
+    """Everything the query helpers need to know about one message (treat as read-only)"""
+    __slots__ = ('text', 'phrases', 'tokens', 'price_max', 'price_min')
+
+    def __init__(self, text: str, phrases: FrozenSet[str], tokens: Tuple[str, ...],
+                 price_max: Optional[float] = None, price_min: Optional[float] = None):
+        self.text = text
+        self.phrases = phrases
+        self.tokens = tokens
+        self.price_max = price_max
+        self.price_min = price_min
+
+    def has(self, phrase: str) -> bool:
+        return phrase in self.phrases
+
+    def has_any(self, phrases: Iterable[str]) -> bool:
+        return not self.phrases.isdisjoint(phrases)
+
+    def count(self, phrases: Iterable[str]) -> int:
+        return len(self.phrases.intersection(phrases))
+
+    def first_of(self, phrases: Iterable[str]) -> Optional[str]:
+        """First phrase of phrases (in their order) that occurs in the message"""
+        if self.phrases.isdisjoint(phrases):
+            return None
+        for phrase in phrases:
+            if phrase in self.phrases:
+                return phrase
+        return None
+
+
+def compile_match(message: str) -> QueryMatch:
+    """Scan a message once and return its QueryMatch (uncached)"""
+    text = message.lower()
+
+    price_min = price_max = None
+    if '$' in text:  # every price pattern needs a dollar sign
+        price_hits = _PRICE_MATCHER.findall(text)
+        # Each hit is a tuple with one group per pattern; keep the highest-priority pattern
+        for index in range(len(PRICE_PATTERNS)):
+            value = next((hit[index] for hit in price_hits if hit[index]), None)
+            if value:
+                price_max = float(value)
+                break
+        range_match = _PRICE_RANGE_MATCHER.search(text)
+        if range_match:
+            price_min = float(range_match.group(1))
+            price_max = float(range_match.group(2))
+
+    tokens = tuple(_TOKEN_PATTERN.findall(text))
+    return QueryMatch(text, PHRASE_MATCHER.find_all(text, tokens), tokens, price_max, price_min)
+
+
+@lru_cache(maxsize=2048)
+def match_query(message: str) -> QueryMatch:
+    """Cached compile_match: every helper that looks at the same message shares one scan"""
+    return compile_match(message)
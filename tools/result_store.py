@@ -0,0 +1,58 @@
+# tools/result_store.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional
+
+_current_store: ContextVar[Optional['ToolResultStore']] = ContextVar('tool_result_store', default=None)
+
+
+class ToolResult:
+    """Structured output of one tool call"""
+    __slots__ = ('tool', 'query', 'items')
+
+    def __init__(self, tool: str, query: str, items: List[Dict[str, Any]]):
+        self.tool = tool
+        self.query = query
+        self.items = items
+
+
+class ToolResultStore:
+    """
+    Per-request record of tool outputs. Tools put their structured results here and
+    hand the LLM only a text rendering; the agent builds its response from this store
+    instead of parsing observations back out of intermediate_steps.
+    """
+
+    def __init__(self):
+        self.results: List[ToolResult] = []
+
+    def record(self, tool: str, query: str, items: List[Dict[str, Any]]):
+        self.results.append(ToolResult(tool, query, items))
+
+    def called(self, tool: str) -> bool:
+        return any(result.tool == tool for result in self.results)
+
+    def latest(self, tool: str) -> List[Dict[str, Any]]:
+        """Items of the most recent call of tool that returned anything"""
+        for result in reversed(self.results):
+            if result.tool == tool and result.items:
+                return result.items
+        return []
+
+
+@contextmanager
+def result_scope():
+    """Collect the tool results of everything run inside the block"""
+    store = ToolResultStore()
+    token = _current_store.set(store)
+    try:
+        yield store
+    finally:
+        _current_store.reset(token)
+
+
+def record_result(tool: str, query: str, items: List[Dict[str, Any]]):
+    store = _current_store.get()
+    if store is not None:
+        store.record(tool, query, items)
@@ -0,0 +1,96 @@
+# tools/single_flight.py
+
+import asyncio
+import threading
+from typing import Dict, Any, Callable, Awaitable, Tuple
+
+
+class _Call:
+    """One execution in progress on the sync path; waiters block on done"""
+    __slots__ = ('done', 'thread', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.thread = threading.get_ident()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent executions with the same key: the first caller runs the
+    computation and every caller arriving while it is in flight gets the same result
+    (or the same exception) instead of starting its own. Nothing is kept afterwards;
+    that is left to the caches in front of it.
+
+    Both methods return (value, shared), shared being True for the callers that waited.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            # A computation re-entering its own key on the same thread would wait on itself
+            leader = call is None or call.thread == threading.get_ident()
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = compute()
+            return call.value, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async variant. The computation runs as its own task, in a copy of the first caller's
+        context, and each caller awaits it shielded: one caller going away (client
+        disconnected, request cancelled) does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get(key)
+            shared = task is not None and task.get_loop() is loop
+            if shared:
+                self.coalesced += 1
+            else:
+                task = self._tasks[key] = asyncio.ensure_future(compute())
+                task.add_done_callback(lambda done: self._finished(key, done))
+                self.executions += 1
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': len(self._calls) + len(self._tasks),
+            'executions': self.executions,
+            'coalesced': self.coalesced
+        }
+
+    def _finished(self, key: str, task: asyncio.Future):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            # Retrieved here so an exception nobody awaited any more is not reported as lost
+            task.exception()
@@ -0,0 +1,112 @@
+# tools/tool_memo.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from tools.single_flight import SingleFlight
+
+# Results memoized for the agent run currently executing in this context
+_request_results: ContextVar[Optional[Dict[str, Any]]] = ContextVar('tool_request_results', default=None)
+
+
+def memo_key(tool_name: str, canonical_input: Any) -> str:
+    """Key for a tool call; canonical_input is e.g. the filter dict from _parse_query"""
+    return tool_name + ':' + json.dumps(canonical_input, sort_keys=True)
+
+
+class ToolMemo:
+    """
+    Memoizes tool results by canonical input at two levels: for the whole of one agent
+    run (no expiry) and across runs for a short TTL. Misses for a key that another run is
+    already computing wait for that computation instead of repeating it, so a burst of
+    identical searches costs one catalog or Firestore query even with the TTL at 0.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._shared: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._in_flight = SingleFlight()
+        self.request_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def request_scope(self):
+        """Results computed inside the block are reused for the rest of the block"""
+        token = _request_results.set({})
+        try:
+            yield
+        finally:
+            _request_results.reset(token)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        found, value = self._lookup(key)
+        if found:
+            return value
+        value, _ = self._in_flight.do(key, compute)
+        self._store(key, value)
+        return value
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        found, value = self._lookup(key)
+        if found:
+            return value
+        value, _ = await self._in_flight.ado(key, compute)
+        self._store(key, value)
+        return value
+
+    def clear(self, tool_name: str = None):
+        """Drop shared entries, all of them or only those of one tool"""
+        with self._lock:
+            if tool_name is None:
+                self._shared.clear()
+            else:
+                for key in [k for k in self._shared if k.startswith(tool_name + ':')]:
+                    del self._shared[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.request_hits + self.shared_hits + self.misses
+        return {
+            'entries': len(self._shared),
+            'request_hits': self.request_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'coalesced': self._in_flight.coalesced,
+            'hit_ratio': (self.request_hits + self.shared_hits) / lookups if lookups else 0.0
+        }
+
+    def _lookup(self, key: str):
+        request_results = _request_results.get()
+        if request_results is not None and key in request_results:
+            self.request_hits += 1
+            return True, request_results[key]
+
+        with self._lock:
+            entry = self._shared.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._shared.move_to_end(key)
+                self.shared_hits += 1
+                if request_results is not None:
+                    request_results[key] = entry[1]
+                return True, entry[1]
+            self.misses += 1
+        return False, None
+
+    def _store(self, key: str, value: Any):
+        request_results = _request_results.get()
+        if request_results is not None:
+            request_results[key] = value
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._shared[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._shared.move_to_end(key)
+            while len(self._shared) > self.max_entries:
+                self._shared.popitem(last=False)